@@ -0,0 +1,257 @@
+"""Process pool vector environment exchanging steps through shared memory."""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+import pickle
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import gymnasium as gym
+from gymnasium.vector import VectorEnv
+import numpy as np
+
+from highway_simulation.environments.relative_to_ego_highway_env import HighwayEnv
+
+STEP = b"s"  # the only per step message, everything else travels through the shared arrays
+
+
+class SharedArrays:
+    """Named numpy arrays laid out in one shared memory block."""
+
+    def __init__(self, specs: Dict[str, Tuple[Tuple[int, ...], str]], name: Optional[str] = None) -> None:
+        """
+        :param specs: Array name -> (shape, dtype string).
+        :param name: Attach to an existing block instead of creating one.
+        """
+        self.specs = specs
+        offsets, size = {}, 0
+        for key, (shape, dtype) in specs.items():
+            offsets[key] = size
+            size += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8  # keep every array 8 byte aligned
+        self.owner = name is None
+        self.memory = SharedMemory(create=True, size=max(size, 1)) if self.owner else SharedMemory(name=name)
+        self.arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=offsets[key])
+            for key, (shape, dtype) in specs.items()
+        }
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.arrays[key]
+
+    def close(self) -> None:
+        self.arrays = {}
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def _worker(
+    index: int,
+    env_fn: Callable[[], gym.Env],
+    connection: Connection,
+    parent_connection: Connection,
+    shared_name: str,
+    specs: Dict[str, Tuple[Tuple[int, ...], str]],
+) -> None:
+    """Step one environment whenever STEP arrives, auto-resetting it like SyncVectorEnv."""
+    parent_connection.close()
+    shared = SharedArrays(specs, shared_name)
+    env = env_fn()
+    try:
+        while True:
+            message = connection.recv_bytes()
+            try:
+                if message == STEP:
+                    observation, reward, terminated, truncated, info = env.step(shared["actions"][index].item())
+                    shared["rewards"][index] = reward
+                    shared["terminations"][index] = terminated
+                    shared["truncations"][index] = truncated
+                    if terminated or truncated:
+                        shared["final_observations"][index] = observation
+                        final_info = info
+                        observation, info = env.reset()
+                        info = {**info, "final_info": final_info}
+                    shared["observations"][index] = observation
+                    # empty infos, the common case, cost no pickling
+                    connection.send_bytes(pickle.dumps(("ok", info)) if info else b"")
+                    continue
+                command, data = pickle.loads(message)
+                if command == "reset":
+                    observation, info = env.reset(**data)
+                    shared["observations"][index] = observation
+                    connection.send(("ok", info))
+                elif command == "call":
+                    name, args, kwargs = data
+                    connection.send(("ok", getattr(env, name)(*args, **kwargs)))
+                elif command == "close":
+                    connection.send(("ok", None))
+                    break
+            except Exception:  # report to the parent instead of dying silently
+                connection.send(("error", traceback.format_exc()))
+    finally:
+        env.close()
+        shared.close()
+        connection.close()
+
+
+class HighwayProcessVectorEnv(VectorEnv):
+    """
+    num_envs environments (HighwayEnv by default) stepped in worker processes.
+    Actions, observations, rewards and done flags live in shared memory, a step only sends
+    one byte per worker, so small observations do not pay for pickling as in SubprocVecEnv.
+    step_async returns right away, the policy can work while the workers simulate.
+    Finished environments are reset automatically, as in gymnasium's SyncVectorEnv the last
+    observation is reported in infos["final_observation"].
+    """
+
+    def __init__(
+        self,
+        num_envs: int = 4,
+        env_fn: Callable[[], gym.Env] = HighwayEnv,
+        context: Optional[str] = None,
+        copy: bool = True,
+    ) -> None:
+        """
+        :param env_fn: Creates the environment of a worker, must be picklable for the spawn context.
+        :param context: multiprocessing start method, the platform default if None.
+        :param copy: Return copies of the shared observation array instead of the array itself.
+        """
+        probe = env_fn()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        probe.close()
+        super().__init__(num_envs, observation_space, action_space)
+        self.copy = copy
+
+        shape = (num_envs, *observation_space.shape)
+        dtype = observation_space.dtype.str
+        specs = {
+            "actions": ((num_envs,), np.dtype(np.int64).str),
+            "observations": (shape, dtype),
+            "final_observations": (shape, dtype),
+            "rewards": ((num_envs,), np.dtype(np.float64).str),
+            "terminations": ((num_envs,), np.dtype(np.bool_).str),
+            "truncations": ((num_envs,), np.dtype(np.bool_).str),
+        }
+        self.shared = SharedArrays(specs)
+
+        ctx = mp.get_context(context)
+        self.connections: List[Connection] = []
+        self.processes = []
+        for index in range(num_envs):
+            parent_connection, child_connection = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"HighwayWorker-{index}",
+                args=(index, env_fn, child_connection, parent_connection, self.shared.name, specs),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    def _receive(self, connection: Connection) -> Any:
+        status, payload = connection.recv()
+        if status == "error":
+            raise RuntimeError(f"Highway worker failed:\n{payload}")
+        return payload
+
+    def reset_async(
+        self,
+        seed: Optional[Union[int, Sequence[Optional[int]]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """An int seed s gives environment i the seed s + i."""
+        if seed is None or isinstance(seed, int):
+            seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+        for connection, env_seed in zip(self.connections, seeds):
+            connection.send(("reset", {"seed": env_seed, "options": options}))
+
+    def reset_wait(
+        self,
+        seed: Optional[Union[int, Sequence[Optional[int]]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        infos: Dict[str, Any] = {}
+        for i, connection in enumerate(self.connections):
+            infos = self._add_info(infos, self._receive(connection), i)
+        return self._observations(), infos
+
+    def step_async(self, actions: Union[np.ndarray, Sequence[int]]) -> None:
+        self.shared["actions"][:] = actions
+        for connection in self.connections:
+            connection.send_bytes(STEP)
+
+    def step_wait(
+        self, timeout: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        :param timeout: Seconds to wait for each worker, raises multiprocessing.TimeoutError when exceeded.
+        """
+        messages = []
+        for i, connection in enumerate(self.connections):
+            if timeout is not None and not connection.poll(timeout):
+                raise mp.TimeoutError(f"Highway worker {i} did not finish its step within {timeout} seconds.")
+            messages.append(connection.recv_bytes())
+
+        # only after every worker answered, so a failure leaves no reply behind in a pipe
+        infos: Dict[str, Any] = {}
+        for i, message in enumerate(messages):
+            info = self._receive_info(message)
+            if self.shared["terminations"][i] or self.shared["truncations"][i]:
+                info = {**info, "final_observation": self.shared["final_observations"][i].copy()}
+            if info:
+                infos = self._add_info(infos, info, i)
+        return (
+            self._observations(),
+            self.shared["rewards"].copy(),
+            self.shared["terminations"].copy(),
+            self.shared["truncations"].copy(),
+            infos,
+        )
+
+    def _receive_info(self, message: bytes) -> Dict[str, Any]:
+        if not message:
+            return {}
+        status, payload = pickle.loads(message)
+        if status == "error":
+            raise RuntimeError(f"Highway worker failed:\n{payload}")
+        return payload
+
+    def call(self, name: str, *args: Any, **kwargs: Any) -> Tuple[Any, ...]:
+        """Call a method of every worker's environment and return the results."""
+        for connection in self.connections:
+            connection.send(("call", (name, args, kwargs)))
+        return tuple(self._receive(connection) for connection in self.connections)
+
+    def _observations(self) -> np.ndarray:
+        observations = self.shared["observations"]
+        return observations.copy() if self.copy else observations
+
+    def close_extras(self, timeout: Optional[float] = None, terminate: bool = False, **kwargs: Any) -> None:
+        """
+        :param terminate: Kill the workers instead of asking them to close their environments.
+        """
+        if not terminate:
+            for connection in self.connections:
+                try:
+                    connection.send(("close", None))
+                    connection.recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+        for process in self.processes:
+            if terminate:
+                process.terminate()
+            process.join(timeout)
+        for connection in self.connections:
+            connection.close()
+        self.shared.close()
@@ -0,0 +1,181 @@
+"""Vectorized Gymnasium environment stepping many highways in lockstep in one process."""
+
+from __future__ import annotations
+
+from copy import copy as shallow_copy
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from gymnasium import spaces
+from gymnasium.vector import VectorEnv
+import numpy as np
+
+from highway_simulation.environments.relative_to_ego_highway_env import HighwayEnv
+from highway_simulation.scripts.highway import Highway
+from highway_simulation.scripts.laneManager import LaneManager
+from highway_simulation.scripts.observationBuilder import build_observations
+from highway_simulation.scripts.util.action import Action
+from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.vehicle.batched_mobil import mobil_lane_changes
+from highway_simulation.scripts.vehicle.mpc import MPCController
+from highway_simulation.scripts.vehicle.traffic_engine import TrafficEngine
+
+
+class HighwayVectorEnv(VectorEnv):
+    """
+    Opt-in lockstep alternative to gymnasium's SyncVectorEnv over HighwayEnv, created directly or with
+    gym.make("highway_vector_env", num_envs=B).
+    num_envs independent highways whose non-ego vehicles live in one shared TrafficEngine,
+    each highway being one traffic group. IDM and vehicle dynamics of every highway advance
+    in a single batched engine step, relative positions are derived from the engine columns and
+    the observations of all highways are built from them in one pass into one (num_envs, 15) buffer.
+    Actions, rewards and resets stay per highway, as do lane changes unless batched_mobil evaluates
+    them in one pass. This roughly doubles the env steps per second of SyncVectorEnv.
+    Terminated and truncated highways are reset automatically, as in gymnasium's SyncVectorEnv the last
+    observation is then reported in infos["final_observation"].
+    """
+
+    metadata = {"render_modes": []}
+
+    def __init__(self, num_envs: int = 8, config: Optional[Config] = None, copy: bool = True) -> None:
+        """
+        :param config: Highway configuration, HighwayEnv.default_config() if None. use_traffic_engine is forced on.
+        :param copy: Return copies of the observation buffer instead of the buffer itself.
+        """
+        if config is not None and config.adaptive_time_step:
+            # the highways share one engine step, their tick lengths would have to agree
+            raise ValueError("HighwayVectorEnv does not support adaptive_time_step.")
+        # a shallow copy, dataclasses.replace would apply the aggressive driver adjustments of __post_init__ twice
+        self.config = shallow_copy(config or HighwayEnv.default_config())
+        self.config.use_traffic_engine = True
+        self.traffic_engine = TrafficEngine()
+        self.highways = [
+            Highway(self.config, traffic_engine=self.traffic_engine, engine_group=i) for i in range(num_envs)
+        ]
+        self.batched_mpc = (
+            MPCController(horizon=10, dt=self.config.time_step) if self.config.batched_mpc_steering else None
+        )
+        V = 5  # Number of vehicles (including ego)
+        F = 3  # Features per vehicle (x, y, v_x)
+        super().__init__(
+            num_envs,
+            spaces.Box(low=0, high=1, shape=(V * F,), dtype=np.float32),
+            spaces.Discrete(len(Action)),
+        )
+        self.copy = copy
+        self.observations = np.zeros((num_envs, V * F), dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float64)
+        self.terminations = np.zeros(num_envs, dtype=np.bool_)
+        self.truncations = np.zeros(num_envs, dtype=np.bool_)
+        self._actions: List[int] = []
+
+    def reset_wait(
+        self,
+        seed: Optional[Union[int, Sequence[Optional[int]]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Reset every highway, an int seed s gives highway i the seed s + i."""
+        if seed is None or isinstance(seed, int):
+            seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+        for highway, highway_seed in zip(self.highways, seeds):
+            highway.reset(highway_seed)
+        build_observations([highway.observation_builder for highway in self.highways], self.observations)
+        return self._observations(), {}
+
+    def step_async(self, actions: Union[np.ndarray, Sequence[int]]) -> None:
+        self._actions = np.asarray(actions).tolist()
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Same transitions as Highway.step per highway, with one engine step per substep for all of them."""
+        pending = [highway.begin_step(action) for highway, action in zip(self.highways, self._actions)]
+
+        # intermediate substeps as in Highway.step, a highway whose episode ends there stops moving
+        self.rewards[:] = 0.0
+        active = list(range(self.num_envs))
+        for _ in range(self.config.physics_substeps - 1):
+            self.update(active)
+            remaining = []
+            for i in active:
+                reward, last = self.highways[i].substep_reward()
+                if not last:
+                    self.rewards[i] += reward
+                    remaining.append(i)
+            active = remaining
+        self.update(active)
+
+        # Highway.finish_step with the observations of every highway built at once
+        for i, (highway, (previous_ego, bad_action)) in enumerate(zip(self.highways, pending)):
+            reward, done = highway.calculate_reward(previous_ego, bad_action)
+            self.rewards[i] += reward
+            self.terminations[i] = done
+            self.truncations[i] = highway.is_truncated()
+        build_observations([highway.observation_builder for highway in self.highways], self.observations)
+
+        infos: Dict[str, Any] = {}
+        for i, highway in enumerate(self.highways):
+            if self.terminations[i] or self.truncations[i]:
+                if not infos:
+                    infos = {
+                        "final_observation": np.full(self.num_envs, None, dtype=object),
+                        "_final_observation": np.zeros(self.num_envs, dtype=np.bool_),
+                        "final_info": np.full(self.num_envs, None, dtype=object),
+                        "_final_info": np.zeros(self.num_envs, dtype=np.bool_),
+                    }
+                infos["final_observation"][i] = self.observations[i].copy()
+                infos["_final_observation"][i] = True
+                infos["final_info"][i] = {}
+                infos["_final_info"][i] = True
+                highway.reset(None)
+                build_observations([highway.observation_builder], self.observations[i : i + 1])
+
+        return (
+            self._observations(),
+            self.rewards.copy(),
+            self.terminations.copy(),
+            self.truncations.copy(),
+            infos,
+        )
+
+    def update(self, indices: List[int]) -> None:
+        """LaneManager.update of the given highways, with one engine step for all of them."""
+        if not indices:
+            return
+        engine = self.traffic_engine
+        lane_managers = [self.highways[i].lane_manager for i in indices]
+        # the egos' followers have to see the egos before they move, as in LaneManager.update_positions_with_engine
+        accelerations = engine.idm_accelerations() if self.config.ego_drives_with_mobil else None
+        for lane_manager in lane_managers:
+            lane_manager.find_ahead_vehicles()
+            lane_manager.update_ego_before_engine_step()
+        completed: Dict[int, list] = {i: [] for i in indices}
+        for vehicle in engine.step(self.config.time_step, accelerations, self.batched_mpc, groups=indices):
+            completed[engine.group_of(vehicle)].append(vehicle)
+
+        for lane_manager, i in zip(lane_managers, indices):
+            lane_manager.apply_engine_step(completed[i])
+            lane_manager.update_after_positions()
+        self.update_lane_changes(lane_managers)
+        for lane_manager in lane_managers:
+            lane_manager.update_statistics()
+
+    def update_lane_changes(self, lane_managers: List[LaneManager]) -> None:
+        """MOBIL for the given lane managers, with batched_mobil as a single evaluation over all their lanes."""
+        if not self.config.batched_mobil:
+            for lane_manager in lane_managers:
+                lane_manager.update_non_ego_lane_changes()
+            return
+        lane_changes, v_max_updates = mobil_lane_changes(
+            [lane for lane_manager in lane_managers for lane in lane_manager.lanes],
+            self.config,
+            num_lanes=self.config.num_lanes,
+        )
+        # lane managers share the configuration, one planner call covers every highway
+        lane_managers[0].apply_lane_changes(lane_changes, v_max_updates)
+
+    def _observations(self) -> np.ndarray:
+        return self.observations.copy() if self.copy else self.observations
+
+    def close_extras(self, **kwargs: Any) -> None:
+        for highway in self.highways:
+            highway.close()
@@ -17,11 +17,12 @@ from highway_simulation.scripts.util.metrics import Metrics
 class HighwayEnv(gym.Env):
     """Highway simulation environment compatible with Gymnasium."""
 
-    metadata = {"render_modes": ["human"]}
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 10}
 
     def __init__(self, render_mode: Optional[str] = None) -> None:
+        self.render_mode = render_mode
         self.config = self.default_config()
-        self.highway = Highway(self.config)
+        self.highway = Highway(self.config, render_mode or "human")
         self.action_space = spaces.Discrete(len(Action))
 
         # Define the observation space
@@ -79,7 +80,7 @@ class HighwayEnv(gym.Env):
 
     def set_config(self, config: Config) -> None:
         self.config = config
-        self.highway = Highway(self.config)
+        self.highway = Highway(self.config, self.render_mode or "human")
 
     def seed(self, seed: Optional[int] = None) -> None:
         self.seed_val = seed
@@ -90,10 +91,17 @@ class HighwayEnv(gym.Env):
         options: Optional[Dict[str, Any]] = None,
         no_vehicles: Optional[bool] = None,
     ) -> Tuple[np.ndarray, Dict[str, Any]]:
-        """Reset the environment to an initial state."""
+        """
+        Reset the environment to an initial state.
+        :param options: {"test_case": True} starts the next of the lane manager's test cases,
+            its name is returned in info["test_case_name"].
+        """
         super().reset(seed=self.seed_val)
         self.current_state = self.highway.reset(self.seed_val, no_vehicles)
-        return self.current_state, {}  # Return the initial state
+        info: Dict[str, Any] = {}
+        if options and options.get("test_case"):
+            self.current_state, info["test_case_name"] = self.highway.reset_for_test_cases()
+        return self.current_state, info  # Return the initial state
 
     def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
         """Take an action and return the result."""
@@ -121,12 +129,12 @@ class HighwayEnv(gym.Env):
             if done:
                 self.print_summary()
 
-        # Return the new state, reward, done flag, and additional info (empty here)
-        return new_state, reward, done, False, {}
+        # Return the new state, reward, done flag, truncation and additional info (empty here)
+        return new_state, reward, done, self.highway.is_truncated(), {}
 
-    def render(self, mode: str = "human") -> None:
-        """Render the environment to the screen."""
-        self.highway.render()  # Render the highway environment
+    def render(self) -> Optional[np.ndarray]:
+        """Render the environment to the screen, or return the frame with render_mode="rgb_array"."""
+        return self.highway.render()
 
     def close(self) -> None:
         """Clean up resources if necessary."""
@@ -0,0 +1,195 @@
+"""Episode video recording from the offscreen renderer, encoded on a background thread."""
+
+from __future__ import annotations
+
+import os
+import queue
+import subprocess
+import threading
+from typing import Callable, List, Optional
+
+import gymnasium as gym
+import numpy as np
+
+EncoderCommand = Callable[[int, int, int, str], List[str]]  # (width, height, fps, path) -> command reading raw rgb24 frames from stdin
+
+
+def ffmpeg_command(width: int, height: int, fps: int, path: str) -> List[str]:
+    """Encode raw rgb24 frames from stdin to H.264, padded to even sizes as yuv420p requires."""
+    return [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-an", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-vcodec", "libx264", "-pix_fmt", "yuv420p", path,
+    ]
+
+
+class FrameStream:
+    """
+    Pipe of frames into an encoder process, written by a background thread.
+    Frames wait in a bounded queue, when the encoder falls behind new frames are dropped instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        fps: int,
+        queue_size: int = 64,
+        encoder_command: EncoderCommand = ffmpeg_command,
+    ) -> None:
+        """
+        :param path: Video file written by the encoder.
+        :param width: Frame width in pixels.
+        :param height: Frame height in pixels.
+        :param queue_size: Frames buffered before frames are dropped.
+        """
+        self.path = path
+        self.shape = (height, width, 3)
+        self.queue_size = queue_size
+        self.frames: queue.Queue = queue.Queue(maxsize=queue_size + 1)  # one slot kept free for the end of stream marker
+        self.written_frames = 0
+        self.dropped_frames = 0
+        self.error: Optional[BaseException] = None
+        self.process = subprocess.Popen(
+            encoder_command(width, height, fps, path),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        self.thread = threading.Thread(target=self._write, name=f"FrameStream({os.path.basename(path)})", daemon=True)
+        self.thread.start()
+        self.closed = False
+
+    def write(self, frame: np.ndarray) -> bool:
+        """Queue a (height, width, 3) uint8 frame, False when it was dropped."""
+        if self.closed:
+            raise ValueError(f"write to closed FrameStream {self.path}")
+        if frame.shape != self.shape:
+            raise ValueError(f"frame shape {frame.shape} does not match the stream {self.shape}")
+        # only this thread puts, so a free slot seen here is still free when putting
+        if self.error is not None or self.frames.qsize() >= self.queue_size:
+            self.dropped_frames += 1
+            return False
+        self.frames.put_nowait(np.ascontiguousarray(frame, dtype=np.uint8))
+        return True
+
+    def _write(self) -> None:
+        stdin = self.process.stdin
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                continue  # keep draining so the producer never waits on a dead encoder
+            try:
+                stdin.write(memoryview(frame).cast("B"))
+                self.written_frames += 1
+            except (BrokenPipeError, OSError) as exc:
+                self.error = exc
+        try:
+            stdin.close()
+        except (BrokenPipeError, OSError) as exc:
+            self.error = self.error or exc
+        stderr = self.process.stderr.read()
+        if self.process.wait() != 0 and self.error is None:
+            self.error = RuntimeError(f"encoder exited with {self.process.returncode}: {stderr.decode(errors='replace')}")
+        self.process.stderr.close()
+
+    def close(self, wait: bool = True) -> None:
+        """End the stream, with wait until the encoder has written the file and raise its error if it failed."""
+        if not self.closed:
+            self.closed = True
+            self.frames.put_nowait(None)
+        if wait:
+            self.thread.join()
+            if self.error is not None:
+                raise RuntimeError(f"recording {self.path} failed") from self.error
+
+
+class VideoRecorderWrapper(gym.Wrapper):
+    """
+    Records episodes of an env created with render_mode="rgb_array" into one video file per episode.
+    Each step renders a frame and hands it to a FrameStream, so the simulation never waits on the encoder
+    and no display is needed. Streams of finished episodes finish encoding in the background.
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        video_folder: str,
+        record_every: int = 1,
+        name_prefix: str = "episode",
+        fps: Optional[int] = None,
+        queue_size: int = 64,
+        encoder_command: EncoderCommand = ffmpeg_command,
+    ) -> None:
+        """
+        :param video_folder: Folder of the videos, named <name_prefix>_<episode>.mp4.
+        :param record_every: Record only every k-th episode, starting with the first.
+        :param fps: Frame rate of the videos, by default the env's metadata render_fps.
+        :param queue_size: Frames buffered per stream before frames are dropped, see FrameStream.
+        """
+        super().__init__(env)
+        if env.render_mode != "rgb_array":
+            raise ValueError(f"VideoRecorderWrapper needs render_mode='rgb_array', got {env.render_mode!r}")
+        if record_every < 1:
+            raise ValueError(f"record_every must be at least 1, got {record_every}")
+        os.makedirs(video_folder, exist_ok=True)
+        self.video_folder = video_folder
+        self.record_every = record_every
+        self.name_prefix = name_prefix
+        self.fps = fps or env.metadata.get("render_fps", 30)
+        self.queue_size = queue_size
+        self.encoder_command = encoder_command
+        self.episode = -1
+        self.stream: Optional[FrameStream] = None
+        self.finishing: List[FrameStream] = []  # closed streams still encoding
+        self.dropped_frames = 0
+
+    def reset(self, **kwargs):
+        self.end_recording()
+        observation, info = self.env.reset(**kwargs)
+        self.episode += 1
+        if self.episode % self.record_every == 0:
+            self.record_frame(start=True)
+        return observation, info
+
+    def step(self, action):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        if self.stream is not None:
+            self.record_frame()
+            if terminated or truncated:
+                self.end_recording()
+        return observation, reward, terminated, truncated, info
+
+    def record_frame(self, start: bool = False) -> None:
+        frame = self.env.render()
+        if start:
+            height, width = frame.shape[:2]
+            path = os.path.join(self.video_folder, f"{self.name_prefix}_{self.episode}.mp4")
+            self.stream = FrameStream(path, width, height, self.fps, self.queue_size, self.encoder_command)
+        self.stream.write(frame)
+
+    def end_recording(self) -> None:
+        """Close the stream of the current episode without waiting for its encoder."""
+        if self.stream is not None:
+            self.stream.close(wait=False)
+            self.finishing.append(self.stream)
+            self.stream = None
+        self.finishing = [stream for stream in self.finishing if self._running(stream)]
+
+    def _running(self, stream: FrameStream) -> bool:
+        if stream.thread.is_alive():
+            return True
+        self.dropped_frames += stream.dropped_frames
+        stream.close()  # raises if the encoder failed
+        return False
+
+    def close(self) -> None:
+        self.end_recording()
+        for stream in self.finishing:
+            self.dropped_frames += stream.dropped_frames
+            stream.close()
+        self.finishing = []
+        super().close()
@@ -4,10 +4,19 @@ from gymnasium.envs.registration import register, registry
 
 ENV_ID = "highway_env"
 ENV_ENTRY_POINT = "highway_simulation.environments.relative_to_ego_highway_env:HighwayEnv"
+VECTOR_ENV_ID = "highway_vector_env"
+VECTOR_ENV_ENTRY_POINT = "highway_simulation.environments.highway_vector_env:HighwayVectorEnv"
 
 
 def register_envs() -> None:
     """Register Gymnasium environments if they are not already registered."""
-    if ENV_ID in registry:
-        return
-    register(id=ENV_ID, entry_point=ENV_ENTRY_POINT)
+    if ENV_ID not in registry:
+        register(id=ENV_ID, entry_point=ENV_ENTRY_POINT)
+    if VECTOR_ENV_ID not in registry:
+        # opt in through gym.make(VECTOR_ENV_ID, num_envs=B), the single env checks do not apply
+        register(
+            id=VECTOR_ENV_ID,
+            entry_point=VECTOR_ENV_ENTRY_POINT,
+            disable_env_checker=True,
+            order_enforce=False,
+        )
@@ -2,62 +2,153 @@
 
 from __future__ import annotations
 
+import random
 import time
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
 from highway_simulation.scripts.laneManager import LaneManager
+from highway_simulation.scripts.observationBuilder import ObservationBuilder
 from highway_simulation.scripts.planning.decision_to_trajectory import DecisionToTrajectory
-from highway_simulation.scripts.planning.state import Trajectory
+from highway_simulation.scripts.planning.state import ArrayTrajectory
 from highway_simulation.scripts.plotting.highwayPlotter import HighwayPlotter
 from highway_simulation.scripts.rewards.rewardCalculator import RewardCalculator
+from highway_simulation.scripts.snapshot import (
+    LANE_MANAGER_COUNTERS,
+    REWARD_CALCULATOR_COUNTERS,
+    HighwaySnapshot,
+    VehicleBlock,
+    capture_counters,
+    restore_counters,
+)
 from highway_simulation.scripts.util.action import Action
 from highway_simulation.scripts.util.config import Config
-from highway_simulation.scripts.util.metrics import Metrics
+from highway_simulation.scripts.util.utils import shallow_copy
+from highway_simulation.scripts.vehicle.traffic_engine import TrafficEngine
 from highway_simulation.scripts.vehicle.vehicle import Vehicle
 
 class Highway:
     """Main simulation loop and state management."""
 
-    def __init__(self, config: Config, render_mode: str = "human") -> None:
+    def __init__(
+        self,
+        config: Config,
+        render_mode: str = "human",
+        traffic_engine: Optional[TrafficEngine] = None,
+        engine_group: int = 0,
+    ) -> None:
+        """
+        :param render_mode: "human" or "rgb_array", see HighwayPlotter.
+        :param traffic_engine: TrafficEngine shared with other highways, see HighwayVectorEnv.
+        :param engine_group: Traffic group of this highway in the shared engine.
+        """
+        if config.adaptive_time_step and config.physics_substeps == 1:
+            # ticks never span several steps, with a single substep there is nothing to merge
+            raise ValueError("adaptive_time_step needs physics_substeps > 1.")
         self.config = config
+        self.render_mode = render_mode
         self.vehicle_width = config.vehicle_width
         self.num_lanes = config.num_lanes
         self.effective_sim_length = config.effective_sim_length
         self.effective_sim_time = config.effective_sim_time
 
-        Vehicle.set_config(config)
-        LaneManager.set_config(config)
-        RewardCalculator.set_config(config)
-        HighwayPlotter.set_config(config)
-        DecisionToTrajectory.set_config(config)
-        Trajectory.set_config(config)
-        Metrics.set_config(config)
-        self.lane_manager = LaneManager()
-        self.reward_calculator = RewardCalculator(self.lane_manager)
-        self.highway_plotter = HighwayPlotter(self.lane_manager)
-        self.decision_to_trajectory = DecisionToTrajectory()
+        # the components of this highway keep its config, highways with different configs can coexist
+        self.lane_manager = LaneManager(traffic_engine, engine_group, config)
+        self.reward_calculator = RewardCalculator(self.lane_manager, config)
+        self.highway_plotter = HighwayPlotter(self.lane_manager, config, render_mode)
+        self.decision_to_trajectory = DecisionToTrajectory(config)
+        self.observation_builder = ObservationBuilder(self.lane_manager, config=config)
+        self.reset_cache: Dict[Tuple[int, Optional[bool]], HighwaySnapshot] = {}
+        self._spare_vehicles: List[Vehicle] = []  # detached vehicles reused by restore_vehicles
 
     def reset(self, seed: int, no_vehicles: Optional[bool] = None) -> np.ndarray:
-        if hasattr(self.lane_manager, "ego_vehicle"):
-            del self.lane_manager.ego_vehicle
-        self.lane_manager.remove_all_vehicles()
-        self.lane_manager.add_vehicles_to_sim(seed, no_vehicles)
+        """With Config.reset_cache a seed generated before is restored from its snapshot, the traffic is the same."""
+        key = (seed, no_vehicles)
+        if self.config.reset_cache and key in self.reset_cache:
+            self.restore_vehicles(self.reset_cache[key])
+        else:
+            if hasattr(self.lane_manager, "ego_vehicle"):
+                del self.lane_manager.ego_vehicle
+            self.lane_manager.remove_all_vehicles()
+            self.lane_manager.add_vehicles_to_sim(seed, no_vehicles)
+            if self.config.reset_cache and seed is not None:
+                self.reset_cache[key] = self.snapshot()
+        self.lane_manager.reset_clock()
         self.reward_calculator.sim_start_time = time.time()
+        self.reward_calculator.reset_collision_statistics()
         self.lane_manager.ego_lane_changes = 0
         self.lane_manager.lane_change_in_progress = False
         return self.get_state()
 
+    def snapshot(self) -> HighwaySnapshot:
+        """Capture the state of the simulation, see restore."""
+        pool = self.lane_manager.dormant_pool
+        return HighwaySnapshot(
+            vehicles=VehicleBlock.capture(self.lane_manager.all_vehicles()),
+            lane_sizes=tuple(len(lane.vehicles) for lane in self.lane_manager.lanes),
+            dormant=(pool.x0.copy(), pool.speed.copy(), pool.t0.copy()),
+            rng_state=random.getstate(),
+            lane_manager=capture_counters(self.lane_manager, LANE_MANAGER_COUNTERS),
+            reward_calculator=capture_counters(self.reward_calculator, REWARD_CALCULATOR_COUNTERS),
+            elapsed_wall_time=time.time() - self.reward_calculator.sim_start_time,
+        )
+
+    def restore(self, snapshot: HighwaySnapshot) -> None:
+        """
+        Return to a snapshot, stepping on from there repeats what followed the snapshot.
+        The snapshot is not consumed and can be restored again. The current vehicle objects are reused
+        for the restored ones, references to them held elsewhere do not survive a restore.
+        """
+        self.restore_vehicles(snapshot)
+        restore_counters(self.lane_manager, snapshot.lane_manager)
+        restore_counters(self.reward_calculator, snapshot.reward_calculator)
+        self.reward_calculator.sim_start_time = time.time() - snapshot.elapsed_wall_time
+        # collisions already in progress at the snapshot are counted again when they are seen next
+        self.reward_calculator._collision_pairs = set()
+        self.reward_calculator._near_miss_pairs = set()
+
+    def restore_vehicles(self, snapshot: HighwaySnapshot) -> None:
+        """Put the vehicles of the snapshot on the road and restore the random state, counters are left as they are."""
+        vehicles = self.lane_manager.take_all_vehicles() + self._spare_vehicles
+        block = snapshot.vehicles
+        while len(vehicles) < len(block):
+            # written over by the block, the color is given to keep the random state
+            vehicles.append(Vehicle(0, 0, 0, 0, color=(0, 0, 0), config=self.config))
+        vehicles, self._spare_vehicles = vehicles[: len(block)], vehicles[len(block) :]
+        block.write(vehicles)
+        self.lane_manager.fill_lanes(vehicles, snapshot.lane_sizes)
+        active = sum(snapshot.lane_sizes)
+        self.lane_manager.dormant_pool.load(vehicles[active:], *(values.copy() for values in snapshot.dormant))
+        random.setstate(snapshot.rng_state)
+        if hasattr(self.lane_manager, "ego_vehicle"):
+            self.reward_calculator.set_ego_vehicle(self.lane_manager.ego_vehicle)
+
+    def fork(self) -> "Highway":
+        """
+        Copy of the simulation for lookahead search, stepping and discarding it leaves this highway as it is.
+        Only the dynamic state is copied, see LaneManager.fork, config, planners and the reset cache are shared.
+        Forks do not render.
+        """
+        clones: Dict[int, Vehicle] = {}
+        fork = shallow_copy(self)
+        fork.lane_manager = self.lane_manager.fork(clones)
+        fork.reward_calculator = self.reward_calculator.fork(fork.lane_manager, clones)
+        fork.observation_builder = self.observation_builder.fork(fork.lane_manager)
+        fork.highway_plotter = None
+        fork._spare_vehicles = []
+        return fork
+
     def reset_for_test_cases(self):
         self.lane_manager.remove_all_vehicles()
         test_case_name = self.lane_manager.add_vehicles_to_sim_from_test_case()
+        self.lane_manager.reset_clock()
 
         return self.get_state(), test_case_name
 
-    def update(self) -> None:
-        """Update vehicle positions and clear lanes for re-sorting."""
-        self.lane_manager.update()
+    def update(self, dt: Optional[float] = None) -> None:
+        """Update vehicle positions and clear lanes for re-sorting, dt defaults to config.time_step."""
+        self.lane_manager.update(dt)
 
     def find_vehicle_state(self, vehicle: Optional[Vehicle]) -> Tuple[float, float]:
         if vehicle is None:
@@ -68,19 +159,53 @@ class Highway:
         )
 
     def step(self, action: int):
+        """
+        Advance Config.physics_substeps time steps for one action, the reward is summed over them.
+        An intermediate substep that ends the episode becomes the last one.
+        With Config.adaptive_time_step free flow substeps are merged into longer ticks,
+        whose rewards count once per time step they cover.
+        """
+        previous_ego, bad_action = self.begin_step(action)
+        substep_reward = 0.0
+        remaining = self.config.physics_substeps
+        while True:
+            ticks = self.lane_manager.adaptive_ticks(remaining) if self.config.adaptive_time_step else 1
+            remaining -= ticks
+            self.update(ticks * self.config.time_step)
+            if remaining == 0:
+                break
+            reward, last = self.substep_reward()
+            if last:
+                break
+            substep_reward += ticks * reward
+        state, reward, done, info = self.finish_step(previous_ego, bad_action)
+        return state, substep_reward + ticks * reward, done, info
+
+    def begin_step(self, action: int) -> Tuple[Tuple[float, float, int], Optional[bool]]:
+        """Apply the action, returns what finish_step needs once the vehicles have moved."""
         previous_ego = (
             self.lane_manager.ego_vehicle.x,
             self.lane_manager.ego_vehicle.speed,
             self.lane_manager.ego_vehicle.lane,
         )
         bad_action = self.take_action(action)
-        self.update()
+        return previous_ego, bad_action
+
+    def substep_reward(self) -> Tuple[float, bool]:
+        """Reward after an intermediate substep and whether the step has to end there."""
+        self.reward_calculator.set_ego_vehicle(self.lane_manager.ego_vehicle)
+        reward, collision = self.reward_calculator.normalized_reward_function()
+        return reward, collision or self.reward_calculator.is_done()
+
+    def finish_step(self, previous_ego, bad_action, out: Optional[np.ndarray] = None):
+        """Reward and observation after update, out as in get_state."""
         reward, done = self.calculate_reward(previous_ego, bad_action)
-        new_state = self.get_state()
+        new_state = self.get_state(out)
         return new_state, reward, done, {}
 
-    def render(self) -> None:
-        self.highway_plotter.render()
+    def render(self) -> Optional[np.ndarray]:
+        """Frame as a (height, width, 3) uint8 array in rgb_array mode, None when drawn to the window."""
+        return self.highway_plotter.render()
 
     def close(self) -> None:
         self.highway_plotter.close()
@@ -103,35 +228,16 @@ class Highway:
         v_mean = self.config.max_vel / 2  # because negative speed does not exist
         return np.clip(v / (2*v_mean), 0, 1)
 
-    def get_state(self) -> np.ndarray:
-        V = 5  # Number of vehicles (including ego)
-        F = 3  # Features per vehicle
-
-        # Ego vehicle state
-        ego_vehicle = self.lane_manager.ego_vehicle
-        ego_x, ego_y = ego_vehicle.relative_x, ego_vehicle.y
-        ego_vx = ego_vehicle.speed  # Assuming no lateral velocity
-    
-        surrounding_vehicles = self.lane_manager.get_nearby_vehicles(V - 1)
-        state = np.zeros((V, F), dtype=np.float32)
-        ego_x_norm, ego_y_norm, ego_vx_norm = self.normalize_xyv(
-            ego_x, ego_y, ego_vx
-        )
-        state[0] = [ego_x_norm, ego_y_norm, ego_vx_norm]
-        
-        #print(surrounding_vehicles)
-        for i, vehicle in enumerate(surrounding_vehicles):
-            x = vehicle.relative_x 
-            y = vehicle.y
-            vx = vehicle.speed
-
-            # Normalize features
-            x_norm, y_norm, vx_norm = self.normalize_xyv(x, y, vx)
-            # Add normalized data to the state array
-            state[i + 1] = [x_norm, y_norm, vx_norm]
-
-        #print((state.flatten()))
-        return np.array(state.flatten())
+    def get_state(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Flat observation of the ego and its 4 nearest vehicles, (x, y, vx) normalized per vehicle.
+        :param out: Filled in place and returned when given, otherwise a new array is returned.
+        """
+        if out is None:
+            # single env callers keep observations across steps (obs / next_obs pairs, replay buffers),
+            # so each one gets its own array. The vector envs pass rows of their batch buffer instead.
+            out = np.empty(self.observation_builder.size, dtype=np.float32)
+        return self.observation_builder.build(out)
 
     def take_action(self, action: int):
         """Execute the chosen action. Can not do a lane change while doing a lane change, can not go out of map"""
@@ -174,9 +280,13 @@ class Highway:
             #trajectory.plot_trajectory()
             self.lane_manager.ego_vehicle.trajectory = trajectory
             self.lane_manager.ego_vehicle.ongoing_trajectory = True
-            self.lane_manager.ego_vehicle.stored_planned_trajectory = [state for state in trajectory.trajectory]
-            self.lane_manager.ego_vehicle.current_trajectory_start_index = len(
-                self.lane_manager.ego_vehicle.history_trajectory.trajectory
+            # array trajectories already hand out an immutable view of the remaining plan
+            planned = trajectory.trajectory
+            self.lane_manager.ego_vehicle.stored_planned_trajectory = (
+                planned if isinstance(trajectory, ArrayTrajectory) else list(planned)
+            )
+            self.lane_manager.ego_vehicle.current_trajectory_start_index = (
+                self.lane_manager.ego_vehicle.history_trajectory.recorded
             )  # Store start index
             self.lane_manager.lane_change_in_progress = True
             return
@@ -187,6 +297,10 @@ class Highway:
 
         return 0  # change later TODO
 
+    def is_truncated(self) -> bool:
+        """The episode ran out of Config.wall_clock_budget, reported apart from the termination in done."""
+        return self.reward_calculator.is_over_wall_clock_budget()
+
     def calculate_reward(self, previous_ego, bad_action):
         """Calculate the reward based on the ego vehicle's situation."""
         self.reward_calculator.set_ego_vehicle(self.lane_manager.ego_vehicle)
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-import statistics
-from typing import List
+from operator import sub, truediv
+from typing import Dict, List, Optional, Tuple
 
+from highway_simulation.scripts.util.utils import shallow_copy
 from highway_simulation.scripts.vehicle.vehicle import Vehicle
 
 @dataclass
@@ -15,6 +17,166 @@ class Lane:
     vehicle_width: float
     how_far_to_ego: int = 99
     vehicles: List[Vehicle] = field(default_factory=list)
+    # vehicles ordered by x with their x and speed as of the last position update, kept in sync on add/remove
+    sorted_vehicles: List[Vehicle] = field(default_factory=list, repr=False)
+    positions: List[float] = field(default_factory=list, repr=False)
+    speeds: List[float] = field(default_factory=list, repr=False)
+    # running sums behind avg_speed and avg_time_gap, adjusted on add/remove and on every position update
+    speed_sum: float = field(default=0.0, repr=False)
+    time_gap_sum: float = field(default=0.0, repr=False)
+
+    def __post_init__(self) -> None:
+        self.repair()
+
+    def add(self, vehicle: Vehicle) -> None:
+        """Append the vehicle and insert it into the position index."""
+        self.vehicles.append(vehicle)
+        if len(self.positions) + 1 != len(self.vehicles):
+            self.repair()
+            return
+        index = bisect_right(self.positions, vehicle.x)
+        self.positions.insert(index, vehicle.x)
+        self.speeds.insert(index, vehicle.speed)
+        self.sorted_vehicles.insert(index, vehicle)
+        self.speed_sum += vehicle.speed
+        self.time_gap_sum += self._time_gaps_around(index)
+
+    def remove(self, vehicle: Vehicle) -> None:
+        """Remove the vehicle from the lane and from the position index."""
+        self.vehicles.remove(vehicle)
+        index = self._index_of(vehicle)
+        if index is not None:
+            self.speed_sum -= self.speeds[index]
+            self.time_gap_sum -= self._time_gaps_around(index)
+            del self.sorted_vehicles[index]
+            del self.positions[index]
+            del self.speeds[index]
+        if len(self.positions) != len(self.vehicles):
+            self.repair()
+
+    def _index_of(self, vehicle: Vehicle) -> Optional[int]:
+        """
+        Place of the vehicle in the position index, found by bisecting on its x.
+        A vehicle that moved since the last position update sits just behind that place, vehicles never move backwards.
+        """
+        start = bisect_right(self.positions, vehicle.x) - 1
+        for index in range(start, -1, -1):
+            if self.sorted_vehicles[index] is vehicle:
+                return index
+        for index in range(start + 1, len(self.sorted_vehicles)):
+            if self.sorted_vehicles[index] is vehicle:
+                return index
+        return None
+
+    def fork(self, clones: Dict[int, Vehicle]) -> "Lane":
+        """Copy of the lane holding the clones of its vehicles, keyed by id of the original."""
+        lane = shallow_copy(self)
+        lane.vehicles = [clones[id(vehicle)] for vehicle in self.vehicles]
+        lane.sorted_vehicles = [clones[id(vehicle)] for vehicle in self.sorted_vehicles]
+        lane.positions = list(self.positions)
+        lane.speeds = list(self.speeds)
+        return lane
+
+    def clear(self) -> None:
+        self.vehicles = []
+        self.repair()
+
+    def update_positions(self) -> None:
+        """
+        Refresh the position index after the vehicles moved. The running sums change by each vehicle's
+        speed change and the change of its time gap to the next vehicle, the index is only re-sorted
+        by repair when vehicles changed order.
+        """
+        vehicles = self.sorted_vehicles
+        if len(vehicles) != len(self.vehicles):
+            self.repair()
+            return
+        if not vehicles:
+            return
+        engine = vehicles[0]._engine
+        if engine is not None and all(vehicle._engine is engine for vehicle in vehicles):
+            slots = [vehicle._slot for vehicle in vehicles]
+            x = engine.columns["x"][slots].tolist()
+            speed = engine.columns["speed"][slots].tolist()
+        else:
+            x = [vehicle.x for vehicle in vehicles]
+            speed = [vehicle.speed for vehicle in vehicles]
+        if x != sorted(x):  # a vehicle passed another one
+            self.repair()
+            return
+        positions, speeds = self.positions, self.speeds
+        self.speed_sum += sum(map(sub, speed, speeds))
+        self.time_gap_sum += sum(
+            map(
+                sub,
+                map(truediv, map(sub, x[1:], x), speed),
+                map(truediv, map(sub, positions[1:], positions), speeds),
+            )
+        )
+        self.positions = x
+        self.speeds = speed
+
+    def repair(self) -> None:
+        """Rebuild the position index and its sums in x order. Nearly sorted input keeps this linear."""
+        self.sorted_vehicles = sorted(self.vehicles, key=lambda v: v.x)
+        self.positions = [v.x for v in self.sorted_vehicles]
+        self.speeds = [v.speed for v in self.sorted_vehicles]
+        self.speed_sum = sum(self.speeds)
+        positions = self.positions
+        self.time_gap_sum = sum(map(truediv, map(sub, positions[1:], positions), self.speeds))
+
+    def _time_gap(self, index: int) -> float:
+        """Time gap between the indexed vehicle and the next one in the position index."""
+        return (self.positions[index + 1] - self.positions[index]) / self.speeds[index]
+
+    def _time_gaps_around(self, index: int) -> float:
+        """Change of time_gap_sum from the indexed vehicle being in the position index."""
+        change = 0.0
+        last = len(self.positions) - 1
+        if index > 0:
+            change += self._time_gap(index - 1)
+        if index < last:
+            change += self._time_gap(index)
+        if 0 < index < last:
+            change -= (self.positions[index + 1] - self.positions[index - 1]) / self.speeds[index - 1]
+        return change
+
+    def vehicle_ahead_of(self, x: float, max_distance: float) -> Optional[Vehicle]:
+        """First vehicle strictly ahead of x, None if there is none within max_distance."""
+        if len(self.positions) != len(self.vehicles):
+            self.repair()
+        index = bisect_right(self.positions, x)
+        if index == len(self.positions) or self.positions[index] - x > max_distance:
+            return None
+        return self.sorted_vehicles[index]
+
+    def vehicle_behind_of(self, x: float, max_distance: float) -> Optional[Vehicle]:
+        """Closest vehicle strictly behind x, None if there is none within max_distance."""
+        if len(self.positions) != len(self.vehicles):
+            self.repair()
+        index = bisect_left(self.positions, x) - 1
+        if index < 0 or x - self.positions[index] > max_distance:
+            return None
+        # equal positions are reported in lane order, like a stable reverse sort would
+        key = self.positions[index]
+        while index > 0 and self.positions[index - 1] == key:
+            index -= 1
+        return self.sorted_vehicles[index]
+
+    def free_position_behind(self, x: float, gap: float) -> Tuple[float, Optional[Vehicle]]:
+        """
+        Highest position at most x that is at least gap away from every vehicle of the lane,
+        with the first vehicle ahead of it, None if there is none.
+        """
+        if len(self.positions) != len(self.vehicles):
+            self.repair()
+        index = bisect_right(self.positions, x)
+        if index < len(self.positions):
+            x = min(x, self.positions[index] - gap)
+        while index > 0 and self.positions[index - 1] > x - gap:
+            index -= 1
+            x = self.positions[index] - gap
+        return x, self.sorted_vehicles[index] if index < len(self.positions) else None
 
     @property
     def num_vehicles(self) -> int:
@@ -23,20 +185,18 @@ class Lane:
 
     @property
     def avg_speed(self) -> float:
-        """Return the average speed of vehicles in the lane."""
+        """Return the average speed of vehicles in the lane, as of the last position update or add/remove."""
+        if len(self.positions) != len(self.vehicles):
+            self.repair()
         if self.vehicles:
-            return sum(v.speed for v in self.vehicles) / len(self.vehicles)
+            return self.speed_sum / len(self.vehicles)
         return 0.0
 
     @property
     def avg_time_gap(self) -> float:
-        """Return the average time gap between longitudinally adjacent cars."""
+        """Return the average time gap between longitudinally adjacent cars, as of the last position update or add/remove."""
+        if len(self.positions) != len(self.vehicles):
+            self.repair()
         if len(self.vehicles) < 2:
             return 0
-        vehicles_sorted = sorted(self.vehicles, key=lambda v: v.x)
-        time_gaps = []
-        for i in range(len(vehicles_sorted) - 1):
-            current_vehicle = vehicles_sorted[i]
-            next_vehicle = vehicles_sorted[i + 1]
-            time_gaps.append((next_vehicle.x - current_vehicle.x) / current_vehicle.speed)
-        return statistics.fmean(time_gaps)
+        return self.time_gap_sum / (len(self.vehicles) - 1)
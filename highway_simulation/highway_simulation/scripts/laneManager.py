@@ -2,23 +2,42 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from highway_simulation.scripts.lane import Lane
 from highway_simulation.scripts.planning.decision_to_trajectory import DecisionToTrajectory
 from highway_simulation.scripts.reset.highwayHelper import HighwayHelper
-from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.util.config import Config, default_config
+from highway_simulation.scripts.util.utils import shallow_copy
+from highway_simulation.scripts.vehicle.batched_mobil import mobil_lane_changes
+from highway_simulation.scripts.vehicle.dormant_pool import DormantPool
+from highway_simulation.scripts.vehicle.mpc import MPCController
+from highway_simulation.scripts.vehicle.traffic_engine import TrafficEngine
 from highway_simulation.scripts.vehicle.vehicle import Vehicle
 from highway_simulation.testing.highwayTestCases import HighwayTestCases
 
-class LaneManager:
-    config = Config
+## Adaptive time stepping, see LaneManager.adaptive_ticks
 
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
+## Level of detail, see LaneManager.update_level_of_detail
+LOD_HYSTERESIS = 50.0  # metres beyond the active region before a vehicle goes dormant
+PROMOTION_GAP = 20.0  # room a dormant vehicle needs in its lane to rejoin, as in HighwayHelper.is_position_available
 
-    def __init__(self) -> None:
+class LaneManager:
+    def __init__(
+        self,
+        traffic_engine: Optional[TrafficEngine] = None,
+        engine_group: int = 0,
+        config: Optional[Config] = None,
+    ) -> None:
+        """
+        :param traffic_engine: Engine shared with other lane managers, its step is then driven by the owner.
+        :param engine_group: Traffic group of this lane manager's vehicles in a shared engine.
+        :param config: Configuration of this lane manager and the vehicles it creates, default_config if None.
+        """
+        self.config = config if config is not None else default_config
         self.road_length = self.config.road_length
         self.vehicle_width = self.config.vehicle_width
         self.num_lanes = self.config.num_lanes
@@ -27,11 +46,21 @@ class LaneManager:
             for i in range(self.num_lanes)
         ]
         self.lane_change_in_progress = False
+        # Optional structure-of-arrays backend, vehicles become views over its columns
+        if traffic_engine is None and self.config.use_traffic_engine:
+            traffic_engine = TrafficEngine()
+        self.traffic_engine = traffic_engine
+        self.engine_group = engine_group
+        # vehicles outside config.active_region, not in any lane or engine
+        self.dormant_pool = DormantPool()
+        self.batched_mpc = (
+            MPCController(horizon=10, dt=self.config.time_step) if self.config.batched_mpc_steering else None
+        )
 
         highway_test_cases = HighwayTestCases(self.config)
         self.test_cases = highway_test_cases.define_test_cases()
         self.highway_helper = HighwayHelper(self.config)
-        self.decision_to_trajectory = DecisionToTrajectory()
+        self.decision_to_trajectory = DecisionToTrajectory(self.config)
         self.num_of_vehicles = self.config.num_of_vehicles
 
         ## For metrics
@@ -41,16 +70,24 @@ class LaneManager:
         self.avg_time_gap_per_lane = 0
         self.time_in_lanes = {i: 0 for i in range(self.num_lanes)}  # Time spent in each lane
 
+        ## Simulation clock of the episode
+        self.step_count = 0
+        self.simulation_time = 0.0
+
     def update_time_in_lane(self) -> None:
         self.time_in_lanes[self.ego_vehicle.lane] += 1
 
     def add_vehicle(self, vehicle: Vehicle) -> None:
-        self.lanes[vehicle.lane].vehicles.append(vehicle)
+        self.lanes[vehicle.lane].add(vehicle)
+        if self.traffic_engine is not None:
+            self.traffic_engine.attach(vehicle, self.engine_group)
         if vehicle.is_ego:
             self.ego_vehicle = vehicle
 
     def destroy_vehicle(self, vehicle: Vehicle) -> None:
-        self.lanes[vehicle.lane].vehicles.remove(vehicle)
+        self.lanes[vehicle.lane].remove(vehicle)
+        if self.traffic_engine is not None:
+            self.traffic_engine.detach(vehicle)
 
     def update_lane_attributes(self) -> None:
         assert hasattr(self, "ego_vehicle")
@@ -58,48 +95,129 @@ class LaneManager:
         for lane in self.lanes:
             lane.how_far_to_ego = lane.id - ego_lane_id
 
-    def update(self) -> None:  # MAIN LOOP OF SIMULATION
-        """Update vehicle positions and clear lanes for re-sorting."""
+    def update(self, dt: Optional[float] = None) -> None:  # MAIN LOOP OF SIMULATION
+        """
+        Update vehicle positions and clear lanes for re-sorting.
+        :param dt: Length of the tick, config.time_step if None. See adaptive_ticks for longer ones.
+        """
+        dt = self.config.time_step if dt is None else dt
         self.find_ahead_vehicles()
         if self.config.ego_drives_with_mobil:
-            self.update_positions_mobil()
+            self.update_positions_mobil(dt)
         else:
-            self.update_positions_relative_to_ego()
+            self.update_positions_relative_to_ego(dt)
+        self.update_after_positions(dt)
+        self.update_non_ego_lane_changes()
+        self.update_statistics()
+
+    def reset_clock(self) -> None:
+        self.step_count = 0
+        self.simulation_time = 0.0
+
+    def advance_clock(self, dt: float) -> None:
+        self.step_count += 1
+        self.simulation_time += dt
+
+    def adaptive_ticks(self, remaining: int) -> int:
+        """
+        Number of time steps, at most remaining, the next update may cover in one tick.
+        Close interactions (a trajectory being tracked, a follower within Config.adaptive_min_headway)
+        take single time steps, free flow ticks are bounded by Config.adaptive_max_tick and the smallest
+        time to collision between consecutive vehicles of a lane, evaluated for all lanes at once.
+        """
+        if self.lane_change_in_progress:
+            return 1
+        vehicles = [vehicle for lane in self.lanes for vehicle in lane.sorted_vehicles]
+        if self.traffic_engine is not None:
+            slots = [vehicle._slot for vehicle in vehicles]
+            columns = self.traffic_engine.columns
+            x, speed, length, ongoing = (
+                columns[name][slots] for name in ("x", "speed", "length", "ongoing_trajectory")
+            )
+        else:
+            x = np.array([vehicle.x for vehicle in vehicles], dtype=np.float64)
+            speed = np.array([vehicle.speed for vehicle in vehicles], dtype=np.float64)
+            length = np.array([vehicle.length for vehicle in vehicles], dtype=np.float64)
+            ongoing = np.array([vehicle.ongoing_trajectory for vehicle in vehicles], dtype=np.bool_)
+        # ongoing_trajectory stays set until the tracked trajectory is used up
+        if ongoing.any():
+            return 1
+        lane = np.repeat(np.arange(len(self.lanes)), [len(lane.sorted_vehicles) for lane in self.lanes])
+        pairs = lane[1:] == lane[:-1]
+        gap = (x[1:] - x[:-1] - length[1:])[pairs]
+        follower_speed = speed[:-1][pairs]
+        if np.any(gap < self.config.adaptive_min_headway * follower_speed):
+            return 1
+        closing_speed = follower_speed - speed[1:][pairs]
+        closing = closing_speed > 0
+        tick = self.config.adaptive_max_tick
+        if closing.any():
+            tick = min(tick, np.min(self.config.adaptive_ttc_fraction * gap[closing] / closing_speed[closing]))
+        return max(1, min(remaining, int(tick / self.config.time_step)))
+
+    def update_after_positions(self, dt: Optional[float] = None) -> None:
+        """
+        Re-index the lanes and refresh the ego relative positions once every vehicle has moved.
+        Also advances the simulation clock by dt, one time step if None.
+        """
+        self.advance_clock(self.config.time_step if dt is None else dt)
+        self.repair_lane_indices()
+        self.update_level_of_detail()
         self.reset_positions_wrt_ego()
         self.check_relative_x()
         self.update_lane_attributes()
-        self.update_non_ego_lane_changes()
-        self.update_statistics()
     
+    def update_level_of_detail(self) -> None:
+        """
+        With config.active_region, vehicles farther than that from the ego leave the lanes for the
+        dormant pool, where they drive at constant speed, and dormant vehicles that came back into
+        the region rejoin their lane. A vehicle closer than PROMOTION_GAP to the lane's vehicles rejoins
+        behind them at the speed of the one ahead. Lane indices must be up to date.
+        """
+        region = self.config.active_region
+        if region is None:
+            return
+        ego_x = self.ego_vehicle.x
+        time = self.simulation_time
+
+        leaving = []
+        for lane in self.lanes:
+            low = bisect_left(lane.positions, ego_x - region - LOD_HYSTERESIS)
+            high = bisect_right(lane.positions, ego_x + region + LOD_HYSTERESIS)
+            for vehicle in lane.sorted_vehicles[:low] + lane.sorted_vehicles[high:]:
+                if not vehicle.is_ego and not vehicle.ongoing_trajectory:
+                    leaving.append(vehicle)
+        for vehicle in leaving:
+            self.destroy_vehicle(vehicle)
+        self.dormant_pool.add(leaving, time)
+
+        distance = np.abs(self.dormant_pool.positions(time) - ego_x)
+        self.dormant_pool.take(np.flatnonzero(distance >= 20000), time)  # out of range, as in is_in_range
+        distance = np.abs(self.dormant_pool.positions(time) - ego_x)
+        for vehicle in self.dormant_pool.take(np.flatnonzero(distance <= region), time):
+            lane = self.lanes[vehicle.lane]
+            x, ahead = lane.free_position_behind(vehicle.x, PROMOTION_GAP)
+            if x != vehicle.x:
+                # it would have driven into slower traffic unseen, it rejoins behind that traffic at its speed
+                vehicle.x = x
+                vehicle.speed = min(vehicle.speed, ahead.speed)
+            self.add_vehicle(vehicle)
+
     ## TO USE IN MOBIL ALGORITHM
     def find_vehicle_ahead(self, vehicle: Vehicle, lane: int) -> Optional[Vehicle]:
         """Find the vehicle ahead in the specified lane."""
-        vehicles_in_lane = sorted(self.lanes[lane].vehicles, key=lambda v: v.x)
-        if vehicle.lane == self.lanes[lane].id:
-            vehicles_in_lane.remove(vehicle)
-        for v in vehicles_in_lane:
-            if v.x > vehicle.x:
-                if v.x - vehicle.x > 150: # if it is too far away it does not count as a vehicle ahead
-                    return None
-                return v
-            
-            
-        return None
+        # if it is too far away it does not count as a vehicle ahead
+        return self.lanes[lane].vehicle_ahead_of(vehicle.x, 150)
 
     def find_vehicle_behind(self, vehicle: Vehicle, lane: int) -> Optional[Vehicle]:
         """Find the vehicle behind in the specified lane."""
-        vehicles_in_lane = sorted(self.lanes[lane].vehicles, key=lambda v: v.x, reverse=True)
-        if vehicle.lane == self.lanes[lane].id:
-            vehicles_in_lane.remove(vehicle)
-        for v in vehicles_in_lane:
-            if v.x < vehicle.x:
-                if v.x - vehicle.x < -150:
-                    return None
-                return v
-        return None
+        return self.lanes[lane].vehicle_behind_of(vehicle.x, 150)
 
     def update_non_ego_lane_changes(self) -> None:
         """Update lane changes for non-ego vehicles using the MOBIL model."""
+        if self.config.batched_mobil:
+            self.update_non_ego_lane_changes_batched()
+            return
         for lane in self.lanes:
             for vehicle in lane.vehicles:
                 if not self.config.ego_drives_with_mobil and vehicle.is_ego:
@@ -157,6 +275,31 @@ class LaneManager:
                             vehicle.ongoing_trajectory = True
                             break
 
+    def update_non_ego_lane_changes_batched(self) -> None:
+        """Same decisions as update_non_ego_lane_changes, evaluated for all vehicles at once."""
+        self.apply_lane_changes(*mobil_lane_changes(self.lanes, self.config))
+
+    def apply_lane_changes(
+        self, lane_changes: List[Tuple[Vehicle, int]], v_max_updates: List[Tuple[Vehicle, float]]
+    ) -> None:
+        """Plan and start the lane changes returned by mobil_lane_changes."""
+        if self.config.closed_form_planner and lane_changes:
+            # one batched planner evaluation for every lane change of this step
+            trajectories = self.decision_to_trajectory.calculate_lane_change_trajectories(
+                *zip(*lane_changes)
+            )
+        else:
+            trajectories = [
+                self.decision_to_trajectory.calculate_lane_change_trajectory(vehicle, target_lane)
+                for vehicle, target_lane in lane_changes
+            ]
+        for (vehicle, target_lane), trajectory in zip(lane_changes, trajectories):
+            vehicle.target_lane = target_lane
+            vehicle.trajectory = trajectory
+            vehicle.ongoing_trajectory = True
+        for vehicle, v_max in v_max_updates:
+            vehicle.v_max = v_max
+
     ###### END OF MOBIL ALGORITHM
 
     def find_ahead_vehicles(self) -> None:
@@ -168,8 +311,16 @@ class LaneManager:
                     lane.vehicles[i].vehicle_ahead = lane.vehicles[i + 1]
                 lane.vehicles[-1].vehicle_ahead = None
 
+    def repair_lane_indices(self) -> None:
+        """Refresh the per-lane position indices once vehicles have moved, see Lane.update_positions."""
+        for lane in self.lanes:
+            lane.update_positions()
+
     def reset_positions_wrt_ego(self) -> None:
         assert hasattr(self, "ego_vehicle")
+        if self.traffic_engine is not None:
+            self.traffic_engine.update_relative_positions(self.engine_group)
+            return
         for lane in self.lanes:
             for vehicle in lane.vehicles:
                 if not vehicle.is_ego:
@@ -178,6 +329,8 @@ class LaneManager:
 
     def check_relative_x(self) -> None:
         assert hasattr(self, "ego_vehicle")
+        if self.traffic_engine is not None:
+            return  # the engine derives every relative_x from x in one expression
         for lane in self.lanes:
             for vehicle in lane.vehicles:
                 if not vehicle.is_ego:
@@ -188,19 +341,25 @@ class LaneManager:
                         print("Exception(Relative Position wrt ego does not work")
                         break
 
-    def update_positions_mobil(self) -> None:
+    def update_positions_mobil(self, dt: Optional[float] = None) -> None:
+        if self.traffic_engine is not None:
+            self.update_positions_with_engine(dt)
+            return
         for lane in self.lanes:
             for vehicle in lane.vehicles:
                 # if not self.is_in_update_range(vehicle):
                 #     continue ## only update vehicles that are in the range of the ego vehicle
-                vehicle.update_ego_driven_with_mobil()
+                vehicle.update_ego_driven_with_mobil(dt)
                 if vehicle.trajectory_completed:
                     self.handle_trajectory_complete(vehicle)
             lane.vehicles = [v for v in lane.vehicles if self.is_in_range(v)]
 
-    def update_positions_relative_to_ego(self) -> None:
+    def update_positions_relative_to_ego(self, dt: Optional[float] = None) -> None:
         assert hasattr(self, "ego_vehicle")
-        self.ego_vehicle.update()
+        if self.traffic_engine is not None:
+            self.update_positions_with_engine(dt)
+            return
+        self.ego_vehicle.update(dt)
         if self.ego_vehicle.trajectory_completed:
             self.handle_trajectory_complete(self.ego_vehicle)
             self.lane_change_in_progress = False
@@ -210,14 +369,44 @@ class LaneManager:
                 # if not self.is_in_update_range(vehicle):
                 #     continue ## only update vehicles that are in the range of the ego vehicle
                 if not vehicle.is_ego:
-                    vehicle.update()
+                    vehicle.update(dt)
                     if vehicle.trajectory_completed:
                         self.handle_trajectory_complete(vehicle)
             lane.vehicles = [v for v in lane.vehicles if self.is_in_range(v)]
 
+    def update_positions_with_engine(self, dt: Optional[float] = None) -> None:
+        """Advance the ego with its own controller and every other vehicle in one batched engine step."""
+        dt = self.config.time_step if dt is None else dt
+        # the ego's followers have to see the ego before it moves, as in the sorted lane loop
+        accelerations = self.traffic_engine.idm_accelerations() if self.config.ego_drives_with_mobil else None
+        self.update_ego_before_engine_step(dt)
+        completed = self.traffic_engine.step(dt, accelerations, self.batched_mpc)
+        self.apply_engine_step(completed)
+
+    def update_ego_before_engine_step(self, dt: Optional[float] = None) -> None:
+        assert hasattr(self, "ego_vehicle")
+        if self.config.ego_drives_with_mobil:
+            self.ego_vehicle.update_ego_driven_with_mobil(dt)
+        else:
+            self.ego_vehicle.update(dt)
+        if self.ego_vehicle.trajectory_completed:
+            self.handle_trajectory_complete(self.ego_vehicle)
+
+    def apply_engine_step(self, completed: List[Vehicle]) -> None:
+        """Move vehicles that finished their lane change and drop those out of range after an engine step."""
+        for vehicle in completed:
+            self.handle_trajectory_complete(vehicle)
+
+        # is_in_range on the engine columns
+        engine = self.traffic_engine
+        slots = engine.group_slots(self.engine_group)
+        out_of_range = slots[np.abs(engine.columns["x"][slots] - self.ego_vehicle.x) >= 20000]
+        for vehicle in [engine.vehicles[slot] for slot in out_of_range]:
+            self.destroy_vehicle(vehicle)
+
     def handle_trajectory_complete(self, vehicle: Vehicle) -> None:
-        self.lanes[vehicle.lane].vehicles.remove(vehicle)
-        self.lanes[vehicle.target_lane].vehicles.append(vehicle)
+        self.lanes[vehicle.lane].remove(vehicle)
+        self.lanes[vehicle.target_lane].add(vehicle)
         self.lanes[vehicle.target_lane].vehicles[-1].lane = vehicle.target_lane
         self.lanes[vehicle.target_lane].vehicles[-1].trajectory_completed = False
         
@@ -244,21 +433,20 @@ class LaneManager:
 
     ## USED IN THE COLLISION CALCULATION
     def find_front_back_vehicles(self, lane: Lane) -> Tuple[Optional[Vehicle], Optional[Vehicle]]:
+        """Closest vehicles of the lane strictly ahead of and not ahead of the ego, from its position index."""
         assert hasattr(self, "ego_vehicle")
-        vehicle_list = [v for v in lane.vehicles if not v.is_ego and self.is_in_range(v)]
-        if not vehicle_list:
-            return None, None
-        if self.ego_vehicle in vehicle_list:
-            vehicle_list.remove(self.ego_vehicle)
-        sorted_vehicles = sorted(vehicle_list, key=lambda vehicle: abs(vehicle.x - self.ego_vehicle.x))
-        #sorts from small to large
+        if len(lane.positions) != len(lane.vehicles):
+            lane.repair()
+        vehicles = lane.sorted_vehicles
+        index = bisect_right(lane.positions, self.ego_vehicle.x)
         front, back = None, None
-        for vehicle in sorted_vehicles:
-            if vehicle.x - self.ego_vehicle.x > 0:
-                front = vehicle
-            else:
-                back = vehicle
-            if front is not None and back is not None:
+        for i in range(index, len(vehicles)):
+            if not vehicles[i].is_ego and self.is_in_range(vehicles[i]):
+                front = vehicles[i]
+                break
+        for i in range(index - 1, -1, -1):
+            if not vehicles[i].is_ego and self.is_in_range(vehicles[i]):
+                back = vehicles[i]
                 break
         return front, back
 
@@ -302,7 +490,58 @@ class LaneManager:
 
     def remove_all_vehicles(self) -> None:
         for lane in self.lanes:
-            lane.vehicles = []
+            lane.clear()
+        self.dormant_pool.clear()
+        if self.traffic_engine is not None:
+            self.traffic_engine.clear(self.engine_group)
+
+    def all_vehicles(self) -> List[Vehicle]:
+        """Vehicles lane by lane in lane order, followed by the dormant ones."""
+        vehicles = [vehicle for lane in self.lanes for vehicle in lane.vehicles]
+        return vehicles + self.dormant_pool.vehicles
+
+    def fork(self, clones: Optional[Dict[int, Vehicle]] = None) -> "LaneManager":
+        """
+        Lane manager over copies of the vehicles in the lanes, for rollouts that are discarded afterwards.
+        Config, spawn helper, planners and test cases are shared, dormant vehicles are shared until they
+        rejoin a lane. A shared traffic engine is copied with only this lane manager's group, which the
+        fork then steps itself.
+        :param clones: Filled with the copy of each vehicle in the lanes by id of the original.
+        """
+        clones = {} if clones is None else clones
+        fork = shallow_copy(self)
+        for lane in self.lanes:
+            for vehicle in lane.vehicles:
+                clones[id(vehicle)] = vehicle.fork()
+        fork.lanes = [lane.fork(clones) for lane in self.lanes]
+        if hasattr(self, "ego_vehicle"):
+            fork.ego_vehicle = clones[id(self.ego_vehicle)]
+        if self.traffic_engine is not None:
+            fork.traffic_engine = self.traffic_engine.fork(self.engine_group, clones)
+        fork.dormant_pool = self.dormant_pool.fork()
+        fork.time_in_lanes = dict(self.time_in_lanes)
+        return fork
+
+    def fill_lanes(self, vehicles: List[Vehicle], lane_sizes: Sequence[int]) -> None:
+        """Put vehicles into the empty lanes, lane_sizes[i] of them in lane i in the order given, see Highway.restore."""
+        start = 0
+        for lane, size in zip(self.lanes, lane_sizes):
+            lane.vehicles = vehicles[start : start + size]
+            lane.repair()
+            start += size
+        for vehicle in vehicles[:start]:
+            if vehicle.is_ego:
+                self.ego_vehicle = vehicle
+        if self.traffic_engine is not None:
+            self.traffic_engine.attach_all(vehicles[:start], self.engine_group)
+
+    def take_all_vehicles(self) -> List[Vehicle]:
+        """Remove every vehicle and the ego, the detached vehicles not shared with a fork are returned for reuse."""
+        vehicles = [vehicle for lane in self.lanes for vehicle in lane.vehicles] + self.dormant_pool.owned_vehicles()
+        self.remove_all_vehicles()
+        if hasattr(self, "ego_vehicle"):
+            del self.ego_vehicle
+        return vehicles
     
 
     def update_statistics(self) -> None:
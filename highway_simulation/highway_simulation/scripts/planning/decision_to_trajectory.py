@@ -2,22 +2,18 @@
 
 from __future__ import annotations
 
-from highway_simulation.scripts.planning.state import Acc, Pos, State, Trajectory, Vel
+from typing import List, Optional, Sequence, Union
+
+from highway_simulation.scripts.planning.state import Acc, ArrayTrajectory, Pos, State, Trajectory, Vel
 from highway_simulation.scripts.planning.trajectory_planner import TrajectoryPlanner
 from highway_simulation.scripts.util.action import Action
-from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.util.config import Config, default_config
 
 
 class DecisionToTrajectory:
-    config = Config
-
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
-
-    def __init__(self) -> None:
-        TrajectoryPlanner.set_config(self.config)
-        self.trajectory_planner = TrajectoryPlanner()
+    def __init__(self, config: Optional[Config] = None) -> None:
+        self.config = config if config is not None else default_config
+        self.trajectory_planner = TrajectoryPlanner(config=self.config)
 
     def calculate_lane_change_end_state(
         self, current_state: State, y_diff: int
@@ -78,6 +74,24 @@ class DecisionToTrajectory:
         end_state = self.calculate_lane_change_end_state(current_state, lane_change_delta)
         return self.trajectory_planner.plan_between_points(current_state, end_state)
        
+    def plan_many(
+        self, init_states: Sequence[State], end_states: Sequence[State]
+    ) -> List[Union[Trajectory, ArrayTrajectory]]:
+        """Plan between K pairs of states with one batched planner evaluation."""
+        batch = self.trajectory_planner.plan_many(init_states, end_states, T=3)
+        return self.trajectory_planner.to_trajectories(batch)
+
+    def calculate_lane_change_trajectories(
+        self, vehicles: Sequence, target_lanes: Sequence[int]
+    ) -> List[Union[Trajectory, ArrayTrajectory]]:
+        """Batched calculate_lane_change_trajectory for vehicles changing lanes in the same step."""
+        init_states = [vehicle.return_state for vehicle in vehicles]
+        end_states = [
+            self.calculate_lane_change_end_state(state, target_lane - vehicle.lane)
+            for state, vehicle, target_lane in zip(init_states, vehicles, target_lanes)
+        ]
+        return self.plan_many(init_states, end_states)
+
     def process_decision(self, current_state: State, action: Action) -> Trajectory:
         #action = Action.CHANGE_LANE_LEFT ## manual override TODO
 
@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 from collections import Counter
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
+import numpy as np
 
-from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.util.config import Config, default_config
 @dataclass
 class Vector2D:
     x: float = 0.0
@@ -56,13 +58,38 @@ class State:
             self.angles.steering_angle,
         )
 
+
+ACCELERATION_CATEGORIES: Tuple[str, ...] = (
+    "Strong Braking", "Moderate Braking", "No Acceleration", "Moderate Acceleration", "Strong Acceleration"
+)
+# discrete accelerations of the RL action space, counted when the ego does not drive with MOBIL
+DISCRETE_ACCELERATION_CATEGORIES: Dict[float, str] = {
+    -4: "Strong Braking",
+    -2: "Moderate Braking",
+    0: "No Acceleration",
+    2: "Moderate Acceleration",
+    4: "Strong Acceleration",  # does not exist in RL model
+}
+
+
+def acceleration_category(acc: float) -> str:
+    """Threshold category of a continuous longitudinal acceleration."""
+    if acc < -2.5:
+        return "Strong Braking"
+    if acc < -0.1:
+        return "Moderate Braking"
+    if acc < 0.1:
+        return "No Acceleration"
+    if acc < 1.5:
+        return "Moderate Acceleration"
+    return "Strong Acceleration"
+
+
 @dataclass
 class Trajectory:
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
     trajectory: List[State] = field(default_factory=list)
     acc_category_counts: Dict[str, int] = field(default_factory=dict)
+    config: Config = field(default_factory=lambda: default_config, repr=False, compare=False)  # read by the plotting
 
     def use_next_state(self) -> State:
         state = self.trajectory[0]
@@ -74,6 +101,10 @@ class Trajectory:
     
     def is_trajectory_empty(self) -> bool:
         return len(self.trajectory) == 0
+
+    def copy(self) -> "Trajectory":
+        """Copy that is consumed independently, the states are shared."""
+        return Trajectory(list(self.trajectory), dict(self.acc_category_counts), self.config)
     
     @property
     def trajectory_length(self) -> int:
@@ -139,38 +170,24 @@ class Trajectory:
         avg_ego_speed = sum(velocities_x_kmh) / len(velocities_x_kmh) if velocities_x_kmh else 0
         return avg_ego_speed
     @property
-    
     def return_acceleration_distribution(self) -> Dict[str, float]:
 
         accelerations_x = [state.acc.x for state in self.trajectory]
         total_acc_samples = len(accelerations_x) 
         
         if total_acc_samples == 0:  # Avoid division by zero
-            return {key: 0.0 for key in ["Strong Braking", "Moderate Braking", "No Acceleration", "Moderate Acceleration", "Strong Acceleration"]}
-
-        categories = {
-            "Strong Braking": lambda a: a < -2.5,
-            "Moderate Braking": lambda a: -2.5 <= a < -0.1,
-            "No Acceleration": lambda a: -0.1 <= a < 0.1,
-            "Moderate Acceleration": lambda a: 0.1 <= a < 1.5,
-            "Strong Acceleration": lambda a: a >= 1.5,
-            }
+            return {key: 0.0 for key in ACCELERATION_CATEGORIES}
+
         if self.config.ego_drives_with_mobil:
-            acc_category_counts = {key: sum(1 for a in accelerations_x if condition(a)) for key, condition in categories.items()}
+            acc_category_counts = Counter(map(acceleration_category, accelerations_x))
         else:
-            mapping = {
-                -4: "Strong Braking",
-                -2: "Moderate Braking",
-                0: "No Acceleration",
-                2: "Moderate Acceleration",
-                4: "Strong Acceleration" # does not exist in RL model
-            }
             # Count occurrences of discrete accelerations
-            acceleration_counts = Counter(accelerations_x)
-            acc_category_counts = {key: sum(acceleration_counts[a] for a in mapping if mapping[a] == key) for key in categories.keys()}
+            acc_category_counts = Counter(
+                DISCRETE_ACCELERATION_CATEGORIES[a] for a in accelerations_x if a in DISCRETE_ACCELERATION_CATEGORIES
+            )
         
         acc_category_percentages = {
-            key: (count / total_acc_samples) * 100 for key, count in acc_category_counts.items()
+            key: (acc_category_counts[key] / total_acc_samples) * 100 for key in ACCELERATION_CATEGORIES
         }
         return acc_category_percentages
     
@@ -351,3 +368,199 @@ class Trajectory:
 
         plt.tight_layout(rect=[0, 0, 1, 0.96])
         plt.show()
+
+
+# Column layout of ArrayTrajectory.data
+TRAJECTORY_FEATURES: Tuple[str, ...] = ("x", "y", "vx", "vy", "ax", "ay", "jx", "jy", "heading", "steering")
+
+
+def state_from_row(row: np.ndarray) -> State:
+    x, y, vx, vy, ax, ay, jx, jy, heading, steering = row.tolist()
+    return State(Pos(x, y), Vel(vx, vy), Acc(ax, ay), Jerk(jx, jy), Angles(heading, steering))
+
+
+class StateSequence(Sequence):
+    """Read only list-like view that builds State objects from trajectory rows on access."""
+
+    def __init__(self, rows: np.ndarray) -> None:
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [state_from_row(row) for row in self.rows[index]]
+        return state_from_row(self.rows[index])
+
+    def __iter__(self) -> Iterator[State]:
+        for row in self.rows:
+            yield state_from_row(row)
+
+
+class ArrayTrajectory:
+    """
+    Trajectory stored as one (steps, len(TRAJECTORY_FEATURES)) array with a read cursor.
+    Consuming a state only moves the cursor, States are created on demand when they are read.
+    Mirrors the Trajectory interface used by vehicles, controllers and plots.
+    """
+
+    def __init__(self, data: Optional[np.ndarray] = None) -> None:
+        if data is None:
+            data = np.zeros((0, len(TRAJECTORY_FEATURES)))
+        self.data = data
+        self.cursor = 0
+
+    @property
+    def remaining(self) -> np.ndarray:
+        """Rows that were not consumed yet, as a view."""
+        return self.data[self.cursor :]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """(remaining steps, 2) view of the x, y columns."""
+        return self.data[self.cursor :, :2]
+
+    @property
+    def trajectory(self) -> StateSequence:
+        return StateSequence(self.remaining)
+
+    def use_next_state(self) -> State:
+        state = state_from_row(self.data[self.cursor])
+        self.cursor += 1
+        return state
+
+    def is_trajectory_empty(self) -> bool:
+        return self.cursor >= len(self.data)
+
+    def copy(self) -> "ArrayTrajectory":
+        """Copy with its own cursor, the rows are shared as they are never written."""
+        copied = ArrayTrajectory(self.data)
+        copied.cursor = self.cursor
+        return copied
+
+    @property
+    def trajectory_length(self) -> int:
+        return len(self.data) - self.cursor
+
+    @property
+    def last_state(self) -> Optional[State]:
+        return None if self.is_trajectory_empty() else state_from_row(self.data[-1])
+
+    @property
+    def return_pos(self) -> List[Pos]:
+        return [Pos(x, y) for x, y in self.positions.tolist()]
+
+    def to_trajectory(self) -> Trajectory:
+        """Remaining states as a list backed Trajectory."""
+        return Trajectory(list(self.trajectory))
+
+    def measure_quality_of_trajectory(
+        self, max_allowed_jerk: float, max_allowed_acc: float, time_step: float
+    ) -> Dict[str, float]:
+        """Vectorized Trajectory.measure_quality_of_trajectory, the first state is skipped as there."""
+        rows = self.remaining[1:]
+        acc, jerk = rows[:, 4:6], rows[:, 6:8]
+        acc_violations = int(np.count_nonzero(acc > max_allowed_acc))
+        jerk_violations = int(np.count_nonzero(jerk > max_allowed_jerk))
+        return {
+            "max_acc": float(np.abs(acc).max()) if len(rows) else 0,
+            "max_jerk": float(np.abs(jerk).max()) if len(rows) else 0,
+            "acc_violations": acc_violations,
+            "jerk_violations": jerk_violations,
+            "is_trajectory_valid": acc_violations == 0 and jerk_violations == 0,
+        }
+
+    def plot_trajectory(self, plot_heading: bool = False, plot_history_of_data: bool = False) -> None:
+        self.to_trajectory().plot_trajectory(plot_heading, plot_history_of_data)
+
+
+class HistoryBuffer:
+    """
+    Columnar recorder of driven states with rows as in TRAJECTORY_FEATURES.
+    With max_length only the most recent rows are kept in a preallocated ring, otherwise the buffer grows.
+    Average speed and acceleration distribution are running aggregates over every recorded state.
+    """
+
+    def __init__(self, max_length: Optional[int] = None, config: Optional[Config] = None) -> None:
+        self.config = config if config is not None else default_config
+        self.max_length = max_length
+        self.rows = np.zeros((max_length or 256, len(TRAJECTORY_FEATURES)))
+        self.recorded = 0  # states recorded in total, including those dropped from the ring
+        self._speed_sum_kmh = 0
+        self._category_counts = dict.fromkeys(ACCELERATION_CATEGORIES, 0)
+        self._discrete_category_counts = dict.fromkeys(ACCELERATION_CATEGORIES, 0)
+
+    def record(
+        self, x: float, y: float, vx: float, vy: float, ax: float, ay: float, heading: float, steering: float
+    ) -> None:
+        """Append one state, jerk is recorded as zero like in Vehicle.return_state."""
+        if self.max_length is None and self.recorded == len(self.rows):
+            self.rows = np.concatenate([self.rows, np.zeros_like(self.rows)])
+        self.rows[self.recorded % len(self.rows)] = (x, y, vx, vy, ax, ay, 0.0, 0.0, heading, steering)
+        self.recorded += 1
+        self._speed_sum_kmh += vx * 3.6
+        self._category_counts[acceleration_category(ax)] += 1
+        if ax in DISCRETE_ACCELERATION_CATEGORIES:
+            self._discrete_category_counts[DISCRETE_ACCELERATION_CATEGORIES[ax]] += 1
+
+    def append(self, state: State) -> None:
+        self.record(
+            state.pos.x, state.pos.y, state.vel.x, state.vel.y, state.acc.x, state.acc.y,
+            state.angles.heading, state.angles.steering_angle,
+        )
+
+    @property
+    def data(self) -> np.ndarray:
+        """Retained rows, oldest first."""
+        if self.recorded <= len(self.rows):
+            return self.rows[: self.recorded]
+        start = self.recorded % len(self.rows)
+        return np.concatenate([self.rows[start:], self.rows[:start]])
+
+    @property
+    def trajectory(self) -> StateSequence:
+        return StateSequence(self.data)
+
+    def states_since(self, index: int) -> StateSequence:
+        """States recorded from the index-th recorded state on, as far as they are still retained."""
+        data = self.data
+        return StateSequence(data[max(0, index - (self.recorded - len(data))) :])
+
+    def is_trajectory_empty(self) -> bool:
+        return self.recorded == 0
+
+    def copy(self) -> "HistoryBuffer":
+        """Independent buffer with the same rows and running aggregates."""
+        copied = object.__new__(HistoryBuffer)
+        copied.__dict__ = self.__dict__.copy()
+        copied.rows = self.rows.copy()
+        copied._category_counts = dict(self._category_counts)
+        copied._discrete_category_counts = dict(self._discrete_category_counts)
+        return copied
+
+    @property
+    def trajectory_length(self) -> int:
+        return min(self.recorded, len(self.rows))
+
+    @property
+    def last_state(self) -> Optional[State]:
+        return None if self.recorded == 0 else state_from_row(self.rows[(self.recorded - 1) % len(self.rows)])
+
+    @property
+    def return_avg_vehicle_speed(self) -> float:
+        return self._speed_sum_kmh / self.recorded if self.recorded else 0
+
+    @property
+    def return_acceleration_distribution(self) -> Dict[str, float]:
+        if self.recorded == 0:
+            return {key: 0.0 for key in ACCELERATION_CATEGORIES}
+        counts = self._category_counts if self.config.ego_drives_with_mobil else self._discrete_category_counts
+        return {key: (count / self.recorded) * 100 for key, count in counts.items()}
+
+    def to_trajectory(self) -> Trajectory:
+        """Retained states as a list backed Trajectory."""
+        return Trajectory(list(self.trajectory), config=self.config)  # plotted with the recording vehicle's config
+
+    def plot_trajectory(self, plot_heading: bool = False, plot_history_of_data: bool = False) -> None:
+        self.to_trajectory().plot_trajectory(plot_heading, plot_history_of_data)
@@ -2,29 +2,65 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+
 import numpy as np
 
-from highway_simulation.scripts.planning.state import Acc, Jerk, Pos, State, Trajectory, Vel
-from highway_simulation.scripts.util.config import Config
-class TrajectoryPlanner:
-    config = Config
+from highway_simulation.scripts.planning.state import (
+    TRAJECTORY_FEATURES,
+    ArrayTrajectory,
+    State,
+    Trajectory,
+    state_from_row,
+)
+from highway_simulation.scripts.util.config import Config, default_config
+
 
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
-    
-    def __init__(self, time_horizon: float = 3) -> None:
+@lru_cache(maxsize=16)
+def quintic_basis(T: float, time_step: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse boundary matrix and pos/vel/acc/jerk basis of a quintic polynomial over [0, T].
+    Cached per (T, time_step), the returned arrays are read only.
+    :return: (6, 6) inverse boundary matrix and (4, steps, 6) basis matrices.
+    """
+    A = np.array([
+        [1, 0, 0, 0, 0, 0],
+        [0, 1, 0, 0, 0, 0],
+        [0, 0, 2, 0, 0, 0],
+        [1, T, T**2, T**3, T**4, T**5],
+        [0, 1, 2*T, 3*T**2, 4*T**3, 5*T**4],
+        [0, 0, 2, 6*T, 12*T**2, 20*T**3],
+    ], dtype=np.float64)
+    times = np.linspace(0, T, int(T / time_step))
+    ones, zeros = np.ones_like(times), np.zeros_like(times)
+    basis = np.stack([
+        np.stack([ones, times, times**2, times**3, times**4, times**5], axis=1),
+        np.stack([zeros, ones, 2 * times, 3 * times**2, 4 * times**3, 5 * times**4], axis=1),
+        np.stack([zeros, zeros, 2 * ones, 6 * times, 12 * times**2, 20 * times**3], axis=1),
+        np.stack([zeros, zeros, zeros, 6 * ones, 24 * times, 60 * times**2], axis=1),
+    ])
+    A_inv = np.linalg.inv(A)
+    A_inv.flags.writeable = False
+    basis.flags.writeable = False
+    return A_inv, basis
+
+
+class TrajectoryPlanner:
+    def __init__(self, time_horizon: float = 3, config: Optional[Config] = None) -> None:
         """
         Initialize the trajectory planner.
         :param lane_width: Width of a single lane (meters).
         :param time_horizon: Time horizon for trajectory planning (seconds).
         :param time_step: Time step for generating waypoints (seconds).
+        :param config: Planner configuration, default_config if None.
         """
+        self.config = config if config is not None else default_config
         self.time_horizon = time_horizon
 
     def quintic_polynomial(
         self, init_state: State, final_state: State, T: float
-    ) -> Trajectory:
+    ) -> Union[Trajectory, ArrayTrajectory]:
         """
         Generate a trajectory using a quintic polynomial.
         
@@ -39,8 +75,11 @@ class TrajectoryPlanner:
             num_points (int): Number of points in the trajectory.
             
         Returns:
-            Trajectory: List of states
+            Trajectory: List of states, or an ArrayTrajectory if config.array_trajectories is set
         """
+        if self.config.closed_form_planner:
+            return self.to_trajectory(self.quintic_closed_form(init_state, final_state, T))
+
         # Time powers matrix for quintic polynomial
         A = np.array([
             [1, 0, 0, 0, 0, 0],
@@ -130,20 +169,73 @@ class TrajectoryPlanner:
         lon_jerk = jerk_matrix @ coeffs_lon
         lat_jerk = jerk_matrix @ coeffs_lat
         
-        trajectory = Trajectory()
-        for i in range(len(times)):
-            trajectory.trajectory.append(
-                State(
-                    Pos(lon_pos[i], lat_pos[i]),
-                    Vel(lon_vel[i], lat_vel[i]),
-                    Acc(lon_acc[i], lat_acc[i]),
-                    Jerk(lon_jerk[i], lat_jerk[i]),
-                )
-            )
-        
-        return trajectory
+        data = np.zeros((len(times), len(TRAJECTORY_FEATURES)))
+        data[:, :8] = np.column_stack(
+            [lon_pos, lat_pos, lon_vel, lat_vel, lon_acc, lat_acc, lon_jerk, lat_jerk]
+        )
+        return self.to_trajectory(data)
+
+    def quintic_closed_form(self, init_state: State, final_state: State, T: float) -> np.ndarray:
+        """
+        Same polynomial as quintic_polynomial, using the cached inverse boundary matrix.
+        Longitudinal and lateral coefficients are solved together in one matmul.
+        :return: (steps, len(TRAJECTORY_FEATURES)) array, heading and steering are zero.
+        """
+        A_inv, basis = quintic_basis(T, self.config.time_step)
+        boundary = np.array([
+            [init_state.pos.x, init_state.pos.y],
+            [init_state.vel.x, init_state.vel.y],
+            [init_state.acc.x, init_state.acc.y],
+            [final_state.pos.x, final_state.pos.y],
+            [final_state.vel.x, final_state.vel.y],
+            [final_state.acc.x, final_state.acc.y],
+        ])
+        values = basis @ (A_inv @ boundary)  # (4, steps, 2): pos, vel, acc, jerk of lon and lat
+        steps = basis.shape[1]
+        data = np.zeros((steps, len(TRAJECTORY_FEATURES)))
+        data[:, :8] = values.transpose(1, 0, 2).reshape(steps, 8)
+        return data
+
+    def plan_many(
+        self, init_states: Sequence[State], final_states: Sequence[State], T: float = 3
+    ) -> np.ndarray:
+        """
+        Plan K quintic trajectories with one batched evaluation.
+        :param init_states: K initial states.
+        :param final_states: K final states.
+        :return: (K, steps, len(TRAJECTORY_FEATURES)) array, see to_trajectories for per vehicle views.
+        """
+        A_inv, basis = quintic_basis(T, self.config.time_step)
+        boundary = np.array([
+            [
+                [init.pos.x, init.pos.y],
+                [init.vel.x, init.vel.y],
+                [init.acc.x, init.acc.y],
+                [final.pos.x, final.pos.y],
+                [final.vel.x, final.vel.y],
+                [final.acc.x, final.acc.y],
+            ]
+            for init, final in zip(init_states, final_states)
+        ]).reshape(-1, 6, 2)
+        values = basis[None] @ (A_inv @ boundary)[:, None]  # (K, 4, steps, 2)
+        k, steps = boundary.shape[0], basis.shape[1]
+        data = np.zeros((k, steps, len(TRAJECTORY_FEATURES)))
+        data[:, :, :8] = values.transpose(0, 2, 1, 3).reshape(k, steps, 8)
+        return data
+
+    def to_trajectories(self, batch: np.ndarray) -> List[Union[Trajectory, ArrayTrajectory]]:
+        """Per vehicle trajectories of a plan_many batch, array trajectories are views into the batch."""
+        return [self.to_trajectory(data) for data in batch]
+
+    def to_trajectory(self, data: np.ndarray) -> Union[Trajectory, ArrayTrajectory]:
+        """Wrap planner output rows in the trajectory type selected by config.array_trajectories."""
+        if self.config.array_trajectories:
+            return ArrayTrajectory(data)
+        return Trajectory([state_from_row(row) for row in data], config=self.config)
 
-    def plan_between_points(self, init_state: State, final_state: State) -> Trajectory:
+    def plan_between_points(
+        self, init_state: State, final_state: State
+    ) -> Union[Trajectory, ArrayTrajectory]:
 
         trajectory = self.quintic_polynomial(init_state, final_state, T=3)
 
@@ -2,20 +2,29 @@
 
 from __future__ import annotations
 
+from typing import Dict, Optional, Tuple
+
 import numpy as np
 import pygame
 
 from highway_simulation.scripts.laneManager import LaneManager
-from highway_simulation.scripts.util.config import Config
-
-class HighwayPlotter:
-    config = Config
+from highway_simulation.scripts.util.config import Config, default_config
 
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
+RENDER_MODES = ("human", "rgb_array")
+HEADING_STEP = 0.5  # degrees, vehicle sprites are cached per color and heading rounded to this step
 
-    def __init__(self, lane_manager: LaneManager) -> None:
+class HighwayPlotter:
+    def __init__(
+        self, lane_manager: LaneManager, config: Optional[Config] = None, render_mode: str = "human"
+    ) -> None:
+        """
+        :param render_mode: "human" draws to a window at 60 FPS, "rgb_array" draws offscreen without a display
+            and render returns the frame.
+        """
+        self.config = config if config is not None else default_config
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"render_mode must be one of {RENDER_MODES}, got {render_mode!r}")
+        self.render_mode = render_mode
         self.lane_manager = lane_manager
         self.screen = None
         self.meter_to_pixel = 7.5
@@ -25,35 +34,41 @@ class HighwayPlotter:
         self.vehicle_width = self.config.vehicle_width * self.meter_to_pixel
         self.num_lanes = self.config.num_lanes
         self.marking_offset = 0
+        self.screen_height = int((self.num_lanes + 1) * self.lane_width)
+        self.sprites: Dict[Tuple[Tuple[int, ...], int], pygame.Surface] = {}
+        self.clock: Optional[pygame.time.Clock] = None
+
+    def vehicle_sprite(self, color: Tuple[int, ...], theta: float) -> pygame.Surface:
+        """Vehicle of the color rotated to the heading theta, rendered once per color and heading step."""
+        key = (tuple(color), round(-np.degrees(theta) / HEADING_STEP))
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            vehicle_surface = pygame.Surface((self.vehicle_width, self.vehicle_height), pygame.SRCALPHA)
+            pygame.draw.rect(vehicle_surface, color, vehicle_surface.get_rect(), border_radius=5)
+            sprite = pygame.transform.rotate(vehicle_surface, key[1] * HEADING_STEP)
+            self.sprites[key] = sprite
+        return sprite
 
     def draw(self, screen) -> None:
         """Draw all vehicles in the simulation with proper padding and vehicle height considered."""
         lane_y_padding = 0  # Padding between lanes
+        # a rotated sprite is at most a vehicle width wider than the vehicle, vehicles further off screen are skipped
+        left, right = -2 * self.vehicle_width, self.config.screen_width + self.vehicle_width
 
         for lane_index, lane in enumerate(self.lane_manager.lanes):
             for vehicle in lane.vehicles:
                 x = vehicle.relative_x * self.meter_to_pixel  # stationary with respect to ego
+                if not left < x < right:
+                    continue
                 y = (
                     vehicle.y * self.meter_to_pixel
                     + lane_y_padding * lane_index
                     + (self.lane_width // 2 - self.vehicle_height // 2)
                 )
-                
-                # Create a surface for the vehicle
-                vehicle_surface = pygame.Surface(
-                    (self.vehicle_width, self.vehicle_height), pygame.SRCALPHA
-                )
-                pygame.draw.rect(vehicle_surface, vehicle.color, vehicle_surface.get_rect(), border_radius=5)
-                
-                # Rotate the surface according to the vehicle's heading angle
-                rotated_surface = pygame.transform.rotate(
-                    vehicle_surface, -np.degrees(vehicle.theta)
-                )
+                rotated_surface = self.vehicle_sprite(vehicle.color, vehicle.theta)
                 rotated_rect = rotated_surface.get_rect(
                     center=(x + self.vehicle_width / 2, y + self.vehicle_height / 2)
                 )
-                
-                # Draw the rotated vehicle
                 screen.blit(rotated_surface, rotated_rect.topleft)
 
     def draw_trajectory(self, screen) -> None:
@@ -122,25 +137,26 @@ class HighwayPlotter:
         background_rect = pygame.Surface((self.config.screen_width, 25))
         background_rect.set_alpha(180)  # Set transparency
         background_rect.fill((255, 255, 255))  # White background
-        dynamic_screen_height = (self.num_lanes + 1) * self.lane_width
-        screen.blit(background_rect, (0, dynamic_screen_height - 25))  # Draw background at top of screen
-        screen.blit(text_surface, (10, dynamic_screen_height - 25))    # Draw text slightly offset from left edge
-
-    def render(self) -> None:
-        # Dynamically set the screen height based on number of lanes
-        dynamic_screen_height = (self.num_lanes + 1) * self.lane_width
+        screen.blit(background_rect, (0, self.screen_height - 25))  # Draw background at top of screen
+        screen.blit(text_surface, (10, self.screen_height - 25))    # Draw text slightly offset from left edge
+
+    def open(self) -> None:
+        """Create the window, or in rgb_array mode an offscreen surface that needs no display."""
+        size = (self.config.screen_width, self.screen_height)
+        if self.render_mode == "rgb_array":
+            pygame.font.init()
+            self.screen = pygame.Surface(size)
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode(size, pygame.SRCALPHA, display=0)
+            pygame.display.set_caption("Highway Simulation")
+            self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont("Arial", 10)
 
-        # Initialize Pygame and screen if not already done
+    def render(self) -> Optional[np.ndarray]:
+        """Draw a frame, in rgb_array mode it is returned as a (height, width, 3) uint8 array."""
         if self.screen is None:
-            pygame.init()
-            self.font = pygame.font.SysFont("Arial", 10)
-            self.screen = pygame.display.set_mode(
-                (self.config.screen_width, dynamic_screen_height), 
-                pygame.SRCALPHA, 
-                display=0
-            )
-        pygame.display.set_caption("Highway Simulation")
-        self.clock = pygame.time.Clock()
+            self.open()
         self.screen.fill(self.config.colors["GRAY"])
         self.draw_lane_markings(self.screen)
         #self.draw_x_axis(self.screen)
@@ -148,10 +164,16 @@ class HighwayPlotter:
 
         #self.draw_lane_statistics(self.screen,self.font)
         self.draw_ego_info(self.screen, self.font)
+        if self.render_mode == "rgb_array":
+            frame = bytearray(pygame.image.tobytes(self.screen, "RGB"))
+            return np.frombuffer(frame, dtype=np.uint8).reshape(self.screen_height, self.config.screen_width, 3)
         pygame.display.flip()
         self.clock.tick(60)
+        return None
 
     def close(self) -> None:
         if self.screen is not None:
-            pygame.quit()
+            if self.render_mode == "human":  # offscreen plotters of other highways may still be drawing
+                pygame.quit()
             self.screen = None
+            self.sprites.clear()
@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left, insort
+import math
 import random
-from typing import List, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
 from highway_simulation.scripts.util.config import Config
 from highway_simulation.scripts.vehicle.vehicle import Vehicle
 
+SPAWN_VELOCITY_RANGE = (90, 120)  # km/h, bounds of the random speed of spawned vehicles
+
 
 class HighwayHelper:
     def __init__(self, config: Config) -> None:
@@ -22,14 +26,55 @@ class HighwayHelper:
             if vehicle.lane == lane and abs(vehicle.x - position) < min_distance:
                 return False
         return True
-        
+
+    def _is_position_free(self, position: float, lane: int, min_distance: float = 20) -> bool:
+        """is_position_available on the sorted per-lane positions of the vehicles generated so far."""
+        positions = self.lane_positions.setdefault(lane, [])
+        index = bisect_left(positions, position)
+        if index < len(positions) and positions[index] - position < min_distance:
+            return False
+        return index == 0 or position - positions[index - 1] >= min_distance
+
+    def _free_intervals(self, lane: int, low: int, high: int, min_distance: int) -> List[Tuple[int, int]]:
+        """Integer ranges of [low, high] at least min_distance away from the vehicles generated in the lane so far."""
+        intervals = []
+        start = low
+        for position in self.lane_positions.get(lane, []):
+            end = math.floor(position - min_distance)
+            if end >= start:
+                intervals.append((start, min(end, high)))
+            start = max(start, math.ceil(position + min_distance))
+        if start <= high:
+            intervals.append((start, high))
+        return intervals
+
+    @staticmethod
+    def _spread(intervals: List[Tuple[int, int]], count: int, min_distance: int) -> List[int]:
+        """
+        count positions in the intervals, min_distance apart. Sorted uniform draws over the slack of an
+        interval shifted by multiples of min_distance always fit, so this only needs count within capacity.
+        """
+        capacity = [(end - start) // min_distance + 1 for start, end in intervals]
+        counts = [0] * len(intervals)
+        for _ in range(count):
+            open_intervals = [i for i in range(len(intervals)) if counts[i] < capacity[i]]
+            weights = [intervals[i][1] - intervals[i][0] + min_distance for i in open_intervals]
+            counts[random.choices(open_intervals, weights)[0]] += 1
+
+        positions = []
+        for (start, end), n in zip(intervals, counts):
+            slack = end - start - (n - 1) * min_distance
+            offsets = sorted(random.randint(0, slack) for _ in range(n))
+            positions.extend(start + offset + i * min_distance for i, offset in enumerate(offsets))
+        return positions
+
     def generate_vehicle_list(
         self,
         seed: int,
         num_vehicles: int,
         no_vehicles: Optional[bool] = None,
         ego_position: float = 50,
-        ego_velocity_range: Tuple[int, int] = (90, 120),
+        ego_velocity_range: Tuple[int, int] = SPAWN_VELOCITY_RANGE,
         generation_range: int = 200,
     ) -> List[Vehicle]:
         # for ego # here speeds are given in screen units. 10 units are 1 meters. 120km/h 33.33m/s so 333 in game units. User input will be in terms of kmh
@@ -39,6 +84,8 @@ class HighwayHelper:
         random.seed(seed)
         
         self.vehicle_list = []    
+        # sorted x of the generated vehicles per lane
+        self.lane_positions: Dict[int, List[float]] = {}
         ego_vel = random.randint(*ego_velocity_range)
         if self.config.ego_drives_with_mobil:
             ego_vel = self.config.max_rewardable_vel * 36 / 10
@@ -48,33 +95,64 @@ class HighwayHelper:
             ego_vel = random.randint(*ego_velocity_range)
             
         ego_lane = random.randint(1, self.config.num_lanes - 1)
-        ego_vehicle = Vehicle(ego_position, ego_lane, ego_vel, v_max=ego_vel, is_ego=True)
+        ego_vehicle = Vehicle(ego_position, ego_lane, ego_vel, v_max=ego_vel, is_ego=True, config=self.config)
         if self.config.ego_drives_with_mobil and self.config.aggresive_driver:
             ego_velocity_range = (120, 130)
             ego_vehicle.speed = random.randint(*ego_velocity_range) * 10 / 36
 
         self.vehicle_list.append(ego_vehicle)
+        self.lane_positions[ego_lane] = [ego_vehicle.x]
 
         if no_vehicles:
             return self.vehicle_list
-        
+
+        if self.config.free_interval_spawning:
+            self.place_in_free_intervals(num_vehicles, int(ego_position) - 3000, int(ego_position) + 2000)
+            return self.vehicle_list
+
         for _ in range(num_vehicles):
             lane = random.randint(1, self.config.num_lanes - 1)  # do not generate vehicles on left lane
             position = random.randint(int(ego_position) - 3000, int(ego_position) + 2000)
-            vel_boundaries = 90, 120
-            velocity = random.randint(*vel_boundaries)
+            velocity = random.randint(*SPAWN_VELOCITY_RANGE)
             
             counter = 0
-            while not self.is_position_available(position, lane):
+            while not self._is_position_free(position, lane):
                 counter += 1
                 position = random.randint(int(ego_position) - 3000, int(ego_position) + 2000)
                 if counter == 10: 
                     print("I can not find a place for this vehicle, I will skip it")
                     break
-            self.vehicle_list.append(Vehicle(position, lane, velocity, v_max=velocity))
+            self.vehicle_list.append(Vehicle(position, lane, velocity, v_max=velocity, config=self.config))
+            insort(self.lane_positions[lane], position)
 
         sorted_vehicle_list = sorted(self.vehicle_list, key=lambda veh: veh.x)
         x_list = [vehicle.x for vehicle in sorted_vehicle_list]
         if len(np.unique(x_list)) != len(x_list):
             Exception("problem") 
         return self.vehicle_list
+
+    def place_in_free_intervals(self, num_vehicles: int, low: int, high: int, min_distance: int = 20) -> None:
+        """
+        Add num_vehicles vehicles at least min_distance apart within a lane, dropping none while the lanes have room.
+        Lanes are drawn per vehicle as in the default placement, a full lane hands its vehicle to a random lane
+        with room. Each lane's vehicles are then spread over its free intervals at once.
+        """
+        lanes = range(1, self.config.num_lanes)  # do not generate vehicles on left lane
+        intervals = {lane: self._free_intervals(lane, low, high, min_distance) for lane in lanes}
+        capacity = {lane: sum((end - start) // min_distance + 1 for start, end in intervals[lane]) for lane in lanes}
+        counts = dict.fromkeys(lanes, 0)
+        for placed in range(num_vehicles):
+            lane = random.randint(1, self.config.num_lanes - 1)
+            if counts[lane] == capacity[lane]:
+                open_lanes = [l for l in lanes if counts[l] < capacity[l]]
+                if not open_lanes:
+                    print(f"The road is full, {num_vehicles - placed} vehicles are not placed")
+                    break
+                lane = random.choice(open_lanes)
+            counts[lane] += 1
+
+        for lane in lanes:
+            for position in self._spread(intervals[lane], counts[lane], min_distance):
+                velocity = random.randint(*SPAWN_VELOCITY_RANGE)
+                self.vehicle_list.append(Vehicle(position, lane, velocity, v_max=velocity, config=self.config))
+                insort(self.lane_positions.setdefault(lane, []), position)
@@ -0,0 +1,98 @@
+"""Broad phase collision and near miss detection over longitudinal cells per lane."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from highway_simulation.scripts.util.config import Config, default_config
+
+if TYPE_CHECKING:
+    from highway_simulation.scripts.lane import Lane
+    from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+NEAR_MISS_GAP = 5.0  # metres beyond the collision distance still counted as a near miss
+LATERAL_OVERLAP = 0.75  # share of the vehicle height below which lane changing vehicles overlap laterally
+
+
+@dataclass
+class CollisionReport:
+    """Vehicle pairs in collision and in near misses after one detection pass."""
+
+    collisions: List[Tuple["Vehicle", "Vehicle"]] = field(default_factory=list)
+    near_misses: List[Tuple["Vehicle", "Vehicle"]] = field(default_factory=list)
+
+    @property
+    def npc_collisions(self) -> List[Tuple["Vehicle", "Vehicle"]]:
+        return [pair for pair in self.collisions if not (pair[0].is_ego or pair[1].is_ego)]
+
+    @property
+    def npc_near_misses(self) -> List[Tuple["Vehicle", "Vehicle"]]:
+        return [pair for pair in self.near_misses if not (pair[0].is_ego or pair[1].is_ego)]
+
+
+class CollisionDetector:
+    """
+    Spatial hash of the vehicles keyed by (lane, longitudinal cell).
+    Cells are as long as the near miss distance, so every candidate pair sits in the same or in
+    adjacent cells and one detection pass is linear in the number of vehicles.
+    Lane changing vehicles are listed in their lane and also entered into their target lane.
+    """
+
+    def __init__(self, config: Optional[Config] = None, near_miss_gap: float = NEAR_MISS_GAP) -> None:
+        """
+        :param near_miss_gap: Distance beyond the collision distance still reported as a near miss.
+        """
+        self.config = config if config is not None else default_config
+        self.collision_distance = self.config.collision_threshold + self.config.vehicle_width
+        self.near_miss_distance = self.collision_distance + near_miss_gap
+        self.cell_length = self.near_miss_distance
+        self.cells: Dict[Tuple[int, int], List["Vehicle"]] = {}
+
+    def cell_of(self, x: float) -> int:
+        return math.floor(x / self.cell_length)
+
+    def build(self, lanes: Iterable["Lane"]) -> None:
+        """Bucket the vehicles of the lanes, call once the vehicles moved."""
+        cells: Dict[Tuple[int, int], List["Vehicle"]] = defaultdict(list)
+        for lane in lanes:
+            for vehicle in lane.vehicles:
+                cell = self.cell_of(vehicle.x)
+                cells[(lane.id, cell)].append(vehicle)
+                if vehicle.ongoing_trajectory and vehicle.target_lane != lane.id:
+                    cells[(vehicle.target_lane, cell)].append(vehicle)
+        self.cells = cells
+
+    def detect(self) -> CollisionReport:
+        """
+        Every vehicle pair sharing a lane closer than the near miss distance.
+        Pairs with a lane changing vehicle also have to overlap laterally.
+        """
+        report = CollisionReport()
+        lateral_overlap = LATERAL_OVERLAP * self.config.vehicle_height
+        seen = set()
+        for (lane_id, cell), members in self.cells.items():
+            # pairs within the cell and with the next one, the previous cell covers the other side
+            candidates = members + self.cells.get((lane_id, cell + 1), [])
+            for i, first in enumerate(members):
+                for second in candidates[i + 1 :]:
+                    if first is second:
+                        continue
+                    distance = abs(first.x - second.x)
+                    if distance >= self.near_miss_distance:
+                        continue
+                    if (first.ongoing_trajectory or second.ongoing_trajectory) and abs(
+                        first.y - second.y
+                    ) >= lateral_overlap:
+                        continue
+                    key = (id(first), id(second)) if id(first) < id(second) else (id(second), id(first))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if distance < self.collision_distance:
+                        report.collisions.append((first, second))
+                    else:
+                        report.near_misses.append((first, second))
+        return report
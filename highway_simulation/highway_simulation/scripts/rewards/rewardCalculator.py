@@ -3,28 +3,41 @@
 from __future__ import annotations
 
 import time
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 
 from highway_simulation.scripts.laneManager import LaneManager
+from highway_simulation.scripts.rewards.collision import CollisionDetector
 from highway_simulation.scripts.rewards.near_collision import calculate_continuous_risk
-from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.util.config import Config, default_config
+from highway_simulation.scripts.util.utils import shallow_copy
 from highway_simulation.scripts.vehicle.vehicle import Vehicle
 class RewardCalculator:
-    config = Config
-    
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
-
-    def __init__(self, lane_manager: LaneManager) -> None:
+    def __init__(self, lane_manager: LaneManager, config: Optional[Config] = None) -> None:
+        self.config = config if config is not None else default_config
         self.lane_manager = lane_manager
         self.effective_sim_time = self.config.effective_sim_time
         self.sim_start_time = time.time()
         self.counter = 0
         self.done_in_3_steps = False
         self.ttc_metric = 0
+        self.collision_detector = CollisionDetector(self.config)
+        self.reset_collision_statistics()
+
+    def fork(self, lane_manager: LaneManager, clones: Dict[int, Vehicle]) -> "RewardCalculator":
+        """
+        Copy for a forked lane manager, see Highway.fork.
+        :param clones: Forked vehicle by id of the original, remaps the tracked collision pairs.
+        """
+        fork = shallow_copy(self)
+        fork.lane_manager = lane_manager
+        if hasattr(self, "ego_vehicle"):
+            fork.ego_vehicle = clones.get(id(self.ego_vehicle), self.ego_vehicle)
+        ids = {original: id(clone) for original, clone in clones.items()}
+        fork._collision_pairs = {frozenset(ids.get(i, i) for i in pair) for pair in self._collision_pairs}
+        fork._near_miss_pairs = {frozenset(ids.get(i, i) for i in pair) for pair in self._near_miss_pairs}
+        return fork
 
     def set_ego_vehicle(self, ego_vehicle_sim: Vehicle) -> None:
         self.ego_vehicle = ego_vehicle_sim
@@ -182,11 +195,24 @@ class RewardCalculator:
         return (
             self.ego_vehicle.x > self.config.effective_sim_length
             or self.ego_vehicle.speed < self.config.min_vel
-            or (time.time() - self.sim_start_time) > self.effective_sim_time
+            or self.episode_time() > self.effective_sim_time
         )
 
+    def episode_time(self) -> float:
+        """Seconds compared against effective_sim_time, simulated ones with sim_clock_termination."""
+        if self.config.sim_clock_termination:
+            return self.lane_manager.simulation_time
+        return time.time() - self.sim_start_time
+
+    def is_over_wall_clock_budget(self) -> bool:
+        """Whether the episode ran longer than the optional wall_clock_budget, reported as truncation."""
+        budget = self.config.wall_clock_budget
+        return budget is not None and (time.time() - self.sim_start_time) > budget
+
     
     def check_collision_reward(self) -> Tuple[float, bool]:
+        if self.config.collision_statistics:
+            self.update_collision_statistics()
         if not self.lane_manager.lane_change_in_progress:
             front, back = self.lane_manager.find_front_back_vehicles(
                 self.lane_manager.lanes[self.lane_manager.ego_vehicle.lane]
@@ -218,3 +244,19 @@ class RewardCalculator:
                 ):
                     return -1000, True
         return 0, False
+
+    def reset_collision_statistics(self) -> None:
+        self.npc_collisions = 0
+        self.npc_near_misses = 0
+        self._collision_pairs = set()
+        self._near_miss_pairs = set()
+
+    def update_collision_statistics(self) -> None:
+        """Count NPC pairs that came into collision or into a near miss since the last evaluation."""
+        self.collision_detector.build(self.lane_manager.lanes)
+        report = self.collision_detector.detect()
+        collision_pairs = {frozenset((id(a), id(b))) for a, b in report.npc_collisions}
+        near_miss_pairs = {frozenset((id(a), id(b))) for a, b in report.npc_near_misses}
+        self.npc_collisions += len(collision_pairs - self._collision_pairs)
+        self.npc_near_misses += len(near_miss_pairs - self._near_miss_pairs)
+        self._collision_pairs, self._near_miss_pairs = collision_pairs, near_miss_pairs
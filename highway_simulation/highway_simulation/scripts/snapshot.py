@@ -0,0 +1,135 @@
+"""Array based snapshots of the simulation state, see Highway.snapshot."""
+
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from highway_simulation.scripts.planning.state import ArrayTrajectory, HistoryBuffer, Trajectory
+
+if TYPE_CHECKING:
+    from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+# per vehicle attributes, one matrix column each
+FLOAT_ATTRIBUTES = (
+    "x", "y", "speed", "theta", "steering_angle", "relative_x", "lateral_speed", "one_step_movement",
+    "acc", "lateral_acc", "v_max", "initial_v_max", "a_max", "s0", "T", "b", "delta",
+    "politeness", "a_thr", "b_safe", "length", "L_f", "L_r",
+)
+INT_ATTRIBUTES = (
+    "lane", "target_lane", "current_trajectory_start_index", "number_of_lane_changes", "take_over_time_counter",
+)
+FLAG_ATTRIBUTES = ("is_ego", "ongoing_trajectory", "trajectory_completed")
+# scalars of the lane manager and reward calculator carried from step to step
+LANE_MANAGER_COUNTERS = (
+    "step_count", "simulation_time", "ego_lane_changes", "lane_change_in_progress", "time_in_lanes",
+    "avg_speed_of_all_vehicles", "avg_lane_change_per_vehicle", "avg_time_gap_per_lane",
+)
+REWARD_CALCULATOR_COUNTERS = ("counter", "done_in_3_steps", "ttc_metric", "npc_collisions", "npc_near_misses")
+
+
+def capture_counters(owner: Any, names: Sequence[str]) -> Dict[str, Any]:
+    return {name: copy.copy(getattr(owner, name)) for name in names}
+
+
+def restore_counters(owner: Any, counters: Dict[str, Any]) -> None:
+    for name, value in counters.items():
+        setattr(owner, name, copy.copy(value))
+
+
+def copy_planned(planned: Sequence) -> Sequence:
+    """Lists are copied, the StateSequence of array trajectories is read only and shared."""
+    return list(planned) if isinstance(planned, list) else planned
+
+
+def attribute_matrix(vehicles: Sequence["Vehicle"], names: Sequence[str], dtype: type) -> np.ndarray:
+    """
+    (vehicles, names) matrix of attribute values.
+    Engine columns of vehicles attached to a TrafficEngine are gathered from the engine in one read each.
+    """
+    matrix = np.empty((len(vehicles), len(names)), dtype=dtype)
+    attached = np.array([vehicle._engine is not None for vehicle in vehicles], dtype=np.bool_)
+    engine = vehicles[int(np.argmax(attached))]._engine if attached.any() else None
+    for column, name in enumerate(names):
+        if engine is not None and name in engine.VIEW_COLUMNS:
+            matrix[attached, column] = engine.gather([v for v, a in zip(vehicles, attached.tolist()) if a], name)
+            matrix[~attached, column] = [getattr(v, name) for v, a in zip(vehicles, attached.tolist()) if not a]
+        else:
+            matrix[:, column] = list(map(attrgetter(name), vehicles))
+    return matrix
+
+
+@dataclass
+class VehicleBlock:
+    """State of a list of vehicles, one matrix row per vehicle plus the few objects in flight."""
+
+    floats: np.ndarray
+    ints: np.ndarray
+    flags: np.ndarray
+    colors: np.ndarray
+    trajectories: Dict[int, Union[Trajectory, ArrayTrajectory]] = field(default_factory=dict)
+    planned_trajectories: Dict[int, Sequence] = field(default_factory=dict)
+    warm_starts: Dict[int, np.ndarray] = field(default_factory=dict)  # MPC solutions of the last step
+    ego_history: Optional[HistoryBuffer] = None
+
+    def __len__(self) -> int:
+        return len(self.floats)
+
+    @classmethod
+    def capture(cls, vehicles: Sequence["Vehicle"]) -> "VehicleBlock":
+        block = cls(
+            floats=attribute_matrix(vehicles, FLOAT_ATTRIBUTES, np.float64),
+            ints=attribute_matrix(vehicles, INT_ATTRIBUTES, np.int64),
+            flags=attribute_matrix(vehicles, FLAG_ATTRIBUTES, np.bool_),
+            colors=np.array(list(map(attrgetter("color"), vehicles)), dtype=np.int64).reshape(len(vehicles), -1),
+        )
+        for row, vehicle in enumerate(vehicles):
+            if not vehicle.trajectory.is_trajectory_empty():
+                block.trajectories[row] = vehicle.trajectory.copy()
+            if len(vehicle.stored_planned_trajectory):
+                block.planned_trajectories[row] = copy_planned(vehicle.stored_planned_trajectory)
+            if vehicle.mpc_controller.previous_solution is not None:
+                block.warm_starts[row] = vehicle.mpc_controller.previous_solution.copy()
+            if vehicle.is_ego:
+                block.ego_history = vehicle.history_trajectory.copy()
+        return block
+
+    def write(self, vehicles: Sequence["Vehicle"]) -> None:
+        """Overwrite the state of as many vehicles, which must not be attached to a TrafficEngine."""
+        names = FLOAT_ATTRIBUTES + INT_ATTRIBUTES + FLAG_ATTRIBUTES
+        rows = zip(self.floats.tolist(), self.ints.tolist(), self.flags.tolist(), self.colors.tolist())
+        for row, (vehicle, (floats, ints, flags, color)) in enumerate(zip(vehicles, rows)):
+            vehicle.__dict__.update(zip(names, floats + ints + flags))
+            vehicle.color = tuple(color)
+            trajectory = self.trajectories.get(row)
+            vehicle.trajectory = Trajectory() if trajectory is None else trajectory.copy()
+            planned = self.planned_trajectories.get(row)
+            vehicle.stored_planned_trajectory = [] if planned is None else copy_planned(planned)
+            warm_start = self.warm_starts.get(row)
+            vehicle.mpc_controller.previous_solution = None if warm_start is None else warm_start.copy()
+            # the look-ahead index only speeds up the search, a fresh one gives the same steering
+            vehicle.pure_pursuit.look_ahead_index = 0
+            vehicle.pure_pursuit._tracked = None
+            vehicle.vehicle_ahead = None
+            if vehicle.is_ego and self.ego_history is not None:
+                vehicle.history_trajectory = self.ego_history.copy()
+
+
+@dataclass
+class HighwaySnapshot:
+    """
+    Everything Highway.step depends on: vehicles lane by lane in lane order followed by the dormant ones,
+    the state of the random module and the counters of the lane manager and reward calculator.
+    """
+
+    vehicles: VehicleBlock
+    lane_sizes: Tuple[int, ...]
+    dormant: Tuple[np.ndarray, np.ndarray, np.ndarray]  # DormantPool x0, speed, t0
+    rng_state: Any
+    lane_manager: Dict[str, Any] = field(default_factory=dict)
+    reward_calculator: Dict[str, Any] = field(default_factory=dict)
+    elapsed_wall_time: float = 0.0
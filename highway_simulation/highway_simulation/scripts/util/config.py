@@ -1,7 +1,7 @@
 """Configuration dataclass for simulation parameters."""
 
 from dataclasses import dataclass
-from typing import ClassVar, Dict, Tuple
+from typing import ClassVar, Dict, Optional, Tuple
 
 @dataclass
 class Config:
@@ -27,6 +27,24 @@ class Config:
     ego_drives_with_mobil: bool
     aggresive_driver: bool
     evaluation_mode: bool
+    use_traffic_engine: bool = False  # advance non-ego vehicles with the batched TrafficEngine
+    batched_mobil: bool = False  # evaluate MOBIL lane changes for all vehicles in one vectorized pass
+    array_trajectories: bool = False  # plan into array backed trajectories consumed with a cursor
+    closed_form_planner: bool = False  # quintic planning with cached inverse boundary matrices
+    ego_mpc_steering: bool = False  # ego steers with the warm started analytic-gradient MPC instead of pure pursuit
+    batched_mpc_steering: bool = False  # with use_traffic_engine, steer all lane changing vehicles with one batched MPC solve
+    history_max_length: Optional[int] = None  # ego history keeps only the latest states, its aggregates still cover the episode
+    sim_clock_termination: bool = False  # effective_sim_time counts simulated seconds instead of wall-clock seconds
+    wall_clock_budget: Optional[float] = None  # wall-clock seconds per episode after which it is truncated
+    physics_substeps: int = 1  # time steps advanced per Highway.step, observations and reward bookkeeping only after the last
+    adaptive_time_step: bool = False  # merge free flow substeps into longer ticks, see LaneManager.adaptive_ticks, needs physics_substeps > 1
+    adaptive_max_tick: float = 0.5  # seconds, longest adaptive tick in free flow
+    adaptive_min_headway: float = 3.0  # seconds, closer followers interact through IDM and keep single time steps
+    adaptive_ttc_fraction: float = 0.1  # an adaptive tick covers at most this share of the smallest time to collision
+    collision_statistics: bool = False  # count NPC collisions and near misses of all vehicle pairs, see CollisionDetector
+    active_region: Optional[float] = None  # metres around the ego simulated in full, farther vehicles drive at constant speed outside the lanes
+    free_interval_spawning: bool = False  # draw spawn positions from the free positions of a lane, no vehicle is skipped while there is room
+    reset_cache: bool = False  # resets to an already generated seed restore its snapshot instead of generating again, see Highway.reset
     ego_vehicle_color: ClassVar[Tuple[int, int, int]] = (255, 0, 0)
     colors: ClassVar[Dict[str, Tuple[int, ...]]] = {
         "WHITE": (255, 255, 255),
@@ -12,7 +12,6 @@ from typing import Dict, List, Union
 import pandas as pd
 from tabulate import tabulate
 
-from highway_simulation.scripts.util.config import Config
 
 @dataclass
 class Metrics:
@@ -32,10 +31,6 @@ class Metrics:
     is_aggresive: bool
     is_driven_by_mobil: bool
     
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
-
     def print(self) -> None:
         ego_driven_by = "reinforcement learning" if not self.is_driven_by_mobil else "Mobil+IDM"
         is_aggresive = "Agressively" if self.is_aggresive else "Not agressively"
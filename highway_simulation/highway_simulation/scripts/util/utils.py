@@ -2,7 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List, Sequence, Tuple
+from typing import Iterable, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def shallow_copy(obj: T) -> T:
+    """copy.copy of an object with a plain __dict__, without the __reduce_ex__ round trip. Used when forking."""
+    copied = object.__new__(type(obj))
+    copied.__dict__ = obj.__dict__.copy()
+    return copied
 
 
 def find_mapping(longitudinal_dist: float, speed_diff: float) -> Tuple[int, int]:
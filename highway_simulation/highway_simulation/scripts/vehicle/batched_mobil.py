@@ -0,0 +1,210 @@
+"""Vectorized MOBIL lane change evaluation for all vehicles at once."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.vehicle.traffic_engine import idm_acceleration
+
+if TYPE_CHECKING:
+    from highway_simulation.scripts.lane import Lane
+    from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+NEIGHBOUR_RANGE = 150  # same cutoff as LaneManager.find_vehicle_ahead/behind
+TAKEOVER_GAP = 100  # leftmost lane vehicles return right when the gap ahead there is larger
+TAKEOVER_V_MAX_STEP = 0.05
+CUT_IN_GAP = 20
+
+
+def libm_power(base: np.ndarray, exponent) -> np.ndarray:
+    """
+    Element-wise power through Python floats.
+    NumPy's SIMD pow can differ from libm in the last ulp, this keeps every IDM value
+    bit-identical to Vehicle.calculate_accel so decisions never flip on a threshold.
+    """
+    exponents = np.broadcast_to(exponent, base.shape).tolist()
+    return np.fromiter(map(pow, base.tolist(), exponents), dtype=np.float64, count=base.size)
+
+
+class _TrafficArrays:
+    """
+    Per-vehicle columns in MOBIL processing order (lane by lane, in lane order).
+    Neighbour lookups work on positions in the lanes list, which may hold the lanes of several highways.
+    """
+
+    def __init__(self, lanes: List["Lane"]) -> None:
+        self.vehicles: List["Vehicle"] = [v for lane in lanes for v in lane.vehicles]
+        self.lane_index = np.repeat(np.arange(len(lanes)), [len(lane.vehicles) for lane in lanes])
+        vehicles = self.vehicles
+        engine = vehicles[0]._engine if vehicles else None
+        on_engine = engine is not None and all(v._engine is engine for v in vehicles)
+        if on_engine:
+            # read the engine columns directly instead of going through every vehicle view
+            slots = np.array([v._slot for v in vehicles], dtype=np.int64)
+            column = lambda name, dtype: engine.columns[name][slots]
+        else:
+            column = lambda name, dtype: np.array([getattr(v, name) for v in vehicles], dtype=dtype)
+        self.x = column("x", np.float64)
+        self.speed = column("speed", np.float64)
+        self.length = column("length", np.float64)
+        self.v_max = column("v_max", np.float64)
+        self.initial_v_max = np.array([v.initial_v_max for v in vehicles], dtype=np.float64)
+        self.a_max = column("a_max", np.float64)
+        self.s0 = column("s0", np.float64)
+        self.T = column("T", np.float64)
+        self.b = column("b", np.float64)
+        self.delta = column("delta", np.float64)
+        self.politeness = np.array([v.politeness for v in vehicles], dtype=np.float64)
+        self.a_thr = np.array([v.a_thr for v in vehicles], dtype=np.float64)
+        self.lane = column("lane", np.int64)
+        self.is_ego = column("is_ego", np.bool_)
+        self.idle = np.array([v.trajectory.is_trajectory_empty() for v in vehicles], dtype=np.bool_)
+
+        # sorted position index of every lane as global vehicle indices, concatenated lane after lane
+        if on_engine:
+            index = np.empty(engine.capacity, dtype=np.int64)
+            index[slots] = np.arange(len(vehicles))
+            self.members = index[[v._slot for lane in lanes for v in lane.sorted_vehicles]]
+        else:
+            ids = {id(v): i for i, v in enumerate(vehicles)}
+            self.members = np.array([ids[id(v)] for lane in lanes for v in lane.sorted_vehicles], dtype=np.int64)
+        self.positions = np.array([x for lane in lanes for x in lane.positions], dtype=np.float64)
+        self.lane_start = np.cumsum([0] + [len(lane.positions) for lane in lanes])
+        self.position_lane = np.repeat(np.arange(len(lanes)), np.diff(self.lane_start))
+
+    def neighbours(self, query: np.ndarray, lane: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vehicles ahead of and behind the queried vehicles in the given lanes, -1 for none.
+        Lanes are positions in the lanes list, lanes outside of it have no vehicles.
+        Matches Lane.vehicle_ahead_of/vehicle_behind_of including the tie order.
+        """
+        x = self.x[query]
+        count = self.positions.size
+        # positions ranked with queries, (lane, rank) keys search every lane at once and compare exactly like x
+        values, rank = np.unique(np.concatenate([self.positions, x]), return_inverse=True)
+        keys = self.position_lane * values.size + rank[:count]
+        valid = (lane >= 0) & (lane < self.lane_start.size - 1)
+        lane = np.where(valid, lane, 0)
+        query_keys = lane * values.size + rank[count:]
+        ahead = np.full(query.size, -1, dtype=np.int64)
+        behind = np.full(query.size, -1, dtype=np.int64)
+
+        front = np.searchsorted(keys, query_keys, side="right")
+        found = valid & (front < self.lane_start[lane + 1])
+        found[found] = self.positions[front[found]] - x[found] <= NEIGHBOUR_RANGE
+        ahead[found] = self.members[front[found]]
+
+        back = np.searchsorted(keys, query_keys, side="left") - 1
+        found = valid & (back >= self.lane_start[lane])
+        found[found] = x[found] - self.positions[back[found]] <= NEIGHBOUR_RANGE
+        # first of a group of equal positions, like a stable reverse sort
+        first = np.searchsorted(keys, keys[back[found]], side="left")
+        behind[found] = self.members[first]
+        return ahead, behind
+
+    def accel(self, follower: np.ndarray, v_max: np.ndarray, leader: np.ndarray) -> np.ndarray:
+        """IDM acceleration of follower behind leader (-1 for a free road)."""
+        has_leader = leader >= 0
+        lead = np.where(has_leader, leader, 0)
+        gap = np.where(
+            has_leader, np.maximum(0.1, self.x[lead] - self.x[follower] - self.length[lead]), np.inf
+        )
+        speed = self.speed[follower]
+        delta_v = np.where(has_leader, speed - self.speed[lead], 0.0)
+        return idm_acceleration(
+            speed, v_max, self.a_max[follower], self.s0[follower], self.T[follower],
+            self.b[follower], self.delta[follower], gap, delta_v, power=libm_power,
+        )
+
+
+def mobil_lane_changes(
+    lanes: List["Lane"], config: Config, num_lanes: Optional[int] = None
+) -> Tuple[List[Tuple["Vehicle", int]], List[Tuple["Vehicle", float]]]:
+    """
+    Evaluate the leftmost lane takeover rule and MOBIL for every vehicle in one pass.
+    Gives the same decisions as the sequential loop in LaneManager.update_non_ego_lane_changes,
+    including the v_max changes of leftmost lane vehicles that later vehicles already observe.
+    Lane indices must be up to date (see LaneManager.repair_lane_indices).
+    :param num_lanes: Lanes per highway when lanes concatenates the lanes of several independent highways.
+    :return: (vehicle, target lane) lane changes and (vehicle, new v_max) updates, both in loop order.
+    """
+    traffic = _TrafficArrays(lanes)
+    if num_lanes is None:
+        num_lanes = len(lanes)
+    active = traffic.idle.copy()
+    if not config.ego_drives_with_mobil:
+        active &= ~traffic.is_ego
+    movers = np.flatnonzero(active)
+    if movers.size == 0:
+        return [], []
+    m = movers.size
+    lane = traffic.lane[movers]
+    lane_index = traffic.lane_index[movers]
+    left = np.where(lane > 0, lane_index - 1, -1)
+    right = np.where(lane < num_lanes - 1, lane_index + 1, -1)
+
+    # neighbours in the current, left and right lane with a single search
+    ahead, behind = traffic.neighbours(
+        np.concatenate([movers, movers, movers]), np.concatenate([lane_index, left, right])
+    )
+    ahead_current, ahead_left, ahead_right = ahead[:m], ahead[m : 2 * m], ahead[2 * m :]
+    behind_current, behind_left, behind_right = behind[:m], behind[m : 2 * m], behind[2 * m :]
+
+    ## USE LEFT LANE ONLY FOR TAKEOVER
+    v_max = traffic.v_max.copy()
+    target = np.full(m, -1, dtype=np.int64)
+    leftmost = (lane == 0) & (num_lanes > 1)
+    if config.aggresive_driver:
+        leftmost &= ~traffic.is_ego[movers]
+    gap_right = np.abs(traffic.x[np.where(ahead_right >= 0, ahead_right, 0)] - traffic.x[movers])
+    takeover = leftmost & ((ahead_right < 0) | (gap_right > TAKEOVER_GAP))
+    target[takeover] = 1
+    v_max[movers[takeover]] = traffic.initial_v_max[movers[takeover]]
+    v_max[movers[leftmost & ~takeover]] += TAKEOVER_V_MAX_STEP
+
+    ## MOBIL
+    # followers handled earlier in the loop already carry their updated v_max
+    def follower_v_max(follower: np.ndarray) -> np.ndarray:
+        return np.where(follower < movers, v_max[follower], traffic.v_max[follower])
+
+    followers = [np.where(f >= 0, f, 0) for f in (behind_current, behind_left, behind_right)]
+    no_leader = np.full(m, -1, dtype=np.int64)
+    own_v_max = v_max[movers]
+    # every IDM evaluation MOBIL needs, batched into one call
+    cases = [
+        (movers, own_v_max, ahead_current),
+        (movers, own_v_max, ahead_left),
+        (movers, own_v_max, ahead_right),
+        (followers[0], follower_v_max(followers[0]), no_leader),
+        (followers[0], follower_v_max(followers[0]), ahead_current),
+        (followers[1], follower_v_max(followers[1]), no_leader),
+        (followers[1], follower_v_max(followers[1]), movers),
+        (followers[2], follower_v_max(followers[2]), no_leader),
+        (followers[2], follower_v_max(followers[2]), movers),
+    ]
+    acc = traffic.accel(*(np.concatenate(column) for column in zip(*cases))).reshape(len(cases), m)
+    politeness = traffic.politeness[movers]
+    a_thr = traffic.a_thr[movers]
+    x = traffic.x[movers]
+
+    behind_current_loss = np.where(behind_current >= 0, politeness * (acc[3] - acc[4]), 0.0)
+    targets = (
+        (lane - 1, acc[1], behind_left, acc[5] - acc[6]),
+        (lane + 1, acc[2], behind_right, acc[7] - acc[8]),
+    )
+    for target_lane, new_acc, behind_target, target_follower_change in targets:  # left first
+        valid = (target < 0) & (target_lane >= 0) & (target_lane < num_lanes)
+        acc_gain = new_acc - acc[0]
+        has_behind_target = behind_target >= 0
+        acc_loss = behind_current_loss + np.where(has_behind_target, politeness * target_follower_change, 0.0)
+        # do not allow cut-in
+        cut_in = has_behind_target & (x - traffic.x[np.where(has_behind_target, behind_target, 0)] < CUT_IN_GAP)
+        change = valid & ~takeover & (acc_gain >= a_thr) & ~cut_in & (acc_gain - acc_loss > 0)
+        target[change] = target_lane[change]
+
+    lane_changes = [(traffic.vehicles[i], int(t)) for i, t in zip(movers, target) if t >= 0]
+    v_max_updates = [(traffic.vehicles[i], float(v_max[i])) for i in movers[leftmost]]
+    return lane_changes, v_max_updates
@@ -0,0 +1,53 @@
+"""MPC tracking of every lane changing vehicle solved as one batched problem."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+from highway_simulation.scripts.vehicle.mpc import MPCController
+
+if TYPE_CHECKING:
+    from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+def mpc_controls(vehicles: List["Vehicle"], controller: MPCController) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    MPCController.compute_controls_fast for all vehicles at once, stacked into (K, horizon, 2) controls.
+    Vehicles with a shorter remaining trajectory get their extra steps masked out of the cost, warm
+    starts are kept in each vehicle's own mpc_controller.
+    :param controller: Provides horizon, time step, wheelbase and control bounds.
+    :return: Acceleration and steering arrays aligned with vehicles, zero for an empty trajectory.
+    """
+    acceleration = np.zeros(len(vehicles))
+    steering = np.zeros(len(vehicles))
+    rows = []
+    for i, vehicle in enumerate(vehicles):
+        if vehicle.trajectory.is_trajectory_empty():
+            vehicle.mpc_controller.previous_solution = None
+        else:
+            rows.append(i)
+    if not rows:
+        return acceleration, steering
+
+    horizon = controller.init_horizon
+    tracking = [vehicles[i] for i in rows]
+    horizons = [min(horizon, vehicle.trajectory.trajectory_length) for vehicle in tracking]
+    initial_states = np.array([[v.x, v.y, v.theta, v.speed] for v in tracking], dtype=np.float64)
+    u0 = np.zeros((len(rows), horizon, 2))
+    ref_y = np.empty((len(rows), horizon))
+    weights = np.zeros((len(rows), horizon))
+    for k, (vehicle, steps) in enumerate(zip(tracking, horizons)):
+        reference = vehicle.mpc_controller.reference_y(vehicle.trajectory, steps)
+        ref_y[k, :steps] = reference
+        ref_y[k, steps:] = reference[-1]
+        weights[k, :steps] = 1.0
+        u0[k, :steps] = vehicle.mpc_controller.warm_start(steps)
+
+    solution = controller.solve_box_bounded_batched(u0, initial_states, ref_y, weights)
+    for vehicle, controls, steps in zip(tracking, solution, horizons):
+        vehicle.mpc_controller.previous_solution = controls[:steps]
+    acceleration[rows] = solution[:, 0, 0]
+    steering[rows] = solution[:, 0, 1]
+    return acceleration, steering
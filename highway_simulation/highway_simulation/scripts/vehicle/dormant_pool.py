@@ -0,0 +1,78 @@
+"""Low fidelity pool for vehicles far away from the ego."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+class DormantPool:
+    """
+    Vehicles outside the ego's active region, driving at constant speed in their lane.
+    Positions are evaluated from the time a vehicle went dormant, so advancing the pool costs nothing
+    and locating vehicles is one vectorized evaluation, whatever the number of vehicles.
+    A fork shares the vehicles with its origin, a shared vehicle is copied when it leaves either pool.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.vehicles)
+
+    def add(self, vehicles: Sequence["Vehicle"], time: float) -> None:
+        """Make the vehicles dormant at simulation time."""
+        if not vehicles:
+            return
+        self.vehicles.extend(vehicles)
+        self.x0 = np.concatenate([self.x0, [v.x for v in vehicles]])
+        self.speed = np.concatenate([self.speed, [v.speed for v in vehicles]])
+        self.t0 = np.concatenate([self.t0, np.full(len(vehicles), time)])
+        self.owned = np.concatenate([self.owned, np.ones(len(vehicles), dtype=np.bool_)])
+
+    def positions(self, time: float) -> np.ndarray:
+        return self.x0 + self.speed * (time - self.t0)
+
+    def take(self, indices: Sequence[int], time: float) -> List["Vehicle"]:
+        """Remove the indexed vehicles, moved to where they are at simulation time."""
+        if len(indices) == 0:
+            return []
+        indices = np.asarray(indices, dtype=np.int64)
+        x = self.positions(time)[indices]
+        taken = [
+            vehicle if owned else vehicle.fork()
+            for vehicle, owned in zip([self.vehicles[i] for i in indices.tolist()], self.owned[indices].tolist())
+        ]
+        for vehicle, position in zip(taken, x.tolist()):
+            vehicle.x = position
+        keep = np.ones(len(self.vehicles), dtype=np.bool_)
+        keep[indices] = False
+        self.vehicles = [v for v, kept in zip(self.vehicles, keep.tolist()) if kept]
+        self.x0, self.speed, self.t0 = self.x0[keep], self.speed[keep], self.t0[keep]
+        self.owned = self.owned[keep]
+        return taken
+
+    def owned_vehicles(self) -> List["Vehicle"]:
+        """Vehicles that are not shared with a fork and may be modified."""
+        return [vehicle for vehicle, owned in zip(self.vehicles, self.owned.tolist()) if owned]
+
+    def fork(self) -> "DormantPool":
+        """Copy sharing the vehicles until they are taken, the arrays are shared as they are only ever replaced."""
+        self.owned = np.zeros(len(self.vehicles), dtype=np.bool_)
+        pool = DormantPool()
+        pool.load(list(self.vehicles), self.x0, self.speed, self.t0)
+        pool.owned = self.owned
+        return pool
+
+    def load(self, vehicles: List["Vehicle"], x0: np.ndarray, speed: np.ndarray, t0: np.ndarray) -> None:
+        """Replace the pool by vehicles that went dormant at times t0 at x0, owned by this pool."""
+        self.vehicles = vehicles
+        self.x0, self.speed, self.t0 = x0, speed, t0
+        self.owned = np.ones(len(vehicles), dtype=np.bool_)  # False for vehicles shared with a fork
+
+    def clear(self) -> None:
+        self.load([], np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64))
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-from typing import Sequence, Tuple
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple, Union
 
 import numpy as np
 from scipy.optimize import minimize
 
-from highway_simulation.scripts.planning.state import State, Trajectory
+from highway_simulation.scripts.planning.state import ArrayTrajectory, State, Trajectory
 
 
 class MPCController:
@@ -25,6 +26,12 @@ class MPCController:
         self.L = 2.5  # Wheelbase length
         self.max_steering = np.radians(25)
         self.max_acceleration = 3.0
+        self.control_weight = 0.1
+        self.max_iterations = 5  # Gauss-Newton iterations of compute_controls_fast
+        self.tolerance = 1e-5  # stop once the Gauss-Newton step moves no control further than this
+        self.cost_tolerance = 1e-4  # or once an iteration lowers the cost by less than this fraction
+        # solution of the last compute_controls_fast call, shifted to warm start the next one
+        self.previous_solution: Optional[np.ndarray] = None
 
     def vehicle_dynamics(
         self, state: Sequence[float], control: Sequence[float]
@@ -126,3 +133,175 @@ class MPCController:
 
         optimal_control = result.x.reshape(self.horizon, 2)
         return optimal_control[0, 0], optimal_control[0, 1]  # Return first step of acceleration and steering
+
+    def lateral_rollout(
+        self, u: np.ndarray, initial_state: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        vehicle_dynamics over the horizon, reduced to the parts the tracking cost depends on, for any number
+        of leading batch dimensions.
+        :param u: Controls of shape (..., horizon, 2)
+        :param initial_state: Current states of shape (..., 4)
+        :return: v and theta before each step, tan of the steering and y after each step, all (..., horizon)
+        """
+        acc = u[..., 0]
+        v = initial_state[..., 3:4] + (np.cumsum(acc, axis=-1) - acc) * self.dt
+        tan_delta = np.tan(u[..., 1])
+        turn = v * tan_delta * (self.dt / self.L)
+        theta = initial_state[..., 2:3] + (np.cumsum(turn, axis=-1) - turn)
+        y = initial_state[..., 1:2] + np.cumsum(v * np.sin(theta) * self.dt, axis=-1)
+        return v, theta, tan_delta, y
+
+    def linearize(
+        self, u: np.ndarray, initial_state: np.ndarray, ref_y: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lateral tracking errors of the rollout and their hand derived Jacobian, batch dimensions lead.
+        :param u: Controls of shape (..., horizon, 2)
+        :param initial_state: Current states of shape (..., 4)
+        :param ref_y: Lateral reference positions of shape (..., horizon)
+        :return: Errors of shape (..., horizon) and d error / d u of shape (..., horizon, horizon * 2)
+        """
+        horizon = u.shape[-2]
+        dt_over_L = self.dt / self.L
+        v, theta, tan_delta, y = self.lateral_rollout(u, initial_state)
+        error = y - ref_y
+
+        # sensitivities of v_k and theta_k to the controls of the earlier steps j < k
+        earlier = _strictly_lower(horizon)
+        d_v_d_acc = earlier * self.dt
+        d_theta_d_acc = np.zeros(u.shape[:-2] + (horizon, horizon))
+        d_theta_d_acc[..., 1:, :] = np.cumsum(
+            (tan_delta * dt_over_L)[..., :-1, None] * d_v_d_acc[:-1], axis=-2
+        )
+        d_theta_d_delta = earlier * (v * dt_over_L * (1 + tan_delta * tan_delta))[..., None, :]
+        heading_gain = (v * np.cos(theta) * self.dt)[..., None]
+        jacobian = np.empty(u.shape[:-2] + (horizon, horizon, 2))
+        jacobian[..., 0] = np.cumsum(
+            (np.sin(theta) * self.dt)[..., None] * d_v_d_acc + heading_gain * d_theta_d_acc, axis=-2
+        )
+        jacobian[..., 1] = np.cumsum(heading_gain * d_theta_d_delta, axis=-2)
+        return error, jacobian.reshape(u.shape[:-2] + (horizon, horizon * 2))
+
+    def solve_box_bounded(
+        self, u0: np.ndarray, initial_state: np.ndarray, ref_y: np.ndarray
+    ) -> np.ndarray:
+        """
+        solve_box_bounded_batched for a single problem.
+        :param u0: Initial guess of shape (horizon, 2)
+        :return: Controls of shape (horizon, 2)
+        """
+        return self.solve_box_bounded_batched(u0[None], initial_state[None], ref_y[None])[0]
+
+    def solve_box_bounded_batched(
+        self,
+        u0: np.ndarray,
+        initial_states: np.ndarray,
+        ref_y: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Projected Gauss-Newton on the control box for K independent problems: controls pinned at a bound
+        by the gradient are held fixed, the others take a Gauss-Newton step, clipped and halved until the
+        cost decreases. Problems stop iterating on their own once the step or the cost decrease is negligible.
+        :param u0: Initial guesses of shape (K, horizon, 2)
+        :param initial_states: Current states of shape (K, 4)
+        :param ref_y: Lateral reference positions of shape (K, horizon)
+        :param weights: Per step error weights of shape (K, horizon), 0 masks steps past a shorter horizon.
+        :return: Controls of shape (K, horizon, 2)
+        """
+        count, horizon = u0.shape[:2]
+        if weights is None:
+            weights = np.ones((count, horizon))
+        upper = np.tile([self.max_acceleration, self.max_steering], horizon)
+        identity = np.eye(horizon * 2)
+
+        def costs(u: np.ndarray, rows: np.ndarray) -> np.ndarray:
+            error = (self.lateral_rollout(u.reshape(-1, horizon, 2), initial_states[rows])[3] - ref_y[rows]) * weights[rows]
+            return np.einsum("kh,kh->k", error, error) + self.control_weight * np.einsum("kc,kc->k", u, u)
+
+        u = np.clip(u0.reshape(count, -1), -upper, upper)
+        active = np.arange(count)
+        cost = costs(u, active)
+        for _ in range(self.max_iterations):
+            current = u[active]
+            error, jacobian = self.linearize(current.reshape(-1, horizon, 2), initial_states[active], ref_y[active])
+            error *= weights[active]
+            jacobian *= weights[active][..., None]
+            gradient = np.einsum("khc,kh->kc", jacobian, error) + self.control_weight * current
+            free = ~(((current <= -upper) & (gradient > 0)) | ((current >= upper) & (gradient < 0)))
+            hessian = np.einsum("khi,khj->kij", jacobian, jacobian) + self.control_weight * identity
+            # pinned controls get an identity row and a zero right hand side, so they do not move
+            hessian = np.where(free[:, :, None] & free[:, None, :], hessian, identity)
+            direction = -np.linalg.solve(hessian, (gradient * free)[..., None])[..., 0]
+            negligible = np.max(np.abs(direction), axis=1) < self.tolerance
+            if negligible.any():
+                active, current, direction = active[~negligible], current[~negligible], direction[~negligible]
+                if active.size == 0:
+                    break
+
+            step = np.ones(active.size)
+            candidate = np.empty_like(current)
+            candidate_cost = np.empty(active.size)
+            pending = np.arange(active.size)
+            while pending.size:
+                candidate[pending] = np.clip(current[pending] + step[pending, None] * direction[pending], -upper, upper)
+                candidate_cost[pending] = costs(candidate[pending], active[pending])
+                pending = pending[(candidate_cost[pending] > cost[active[pending]]) & (step[pending] >= 1e-3)]
+                step[pending] *= 0.5
+
+            improved = candidate_cost <= cost[active]
+            progressing = candidate_cost < cost[active] * (1 - self.cost_tolerance)
+            u[active[improved]] = candidate[improved]
+            cost[active[improved]] = candidate_cost[improved]
+            active = active[progressing]
+            if active.size == 0:
+                break
+        return u.reshape(count, horizon, 2)
+
+    def reference_y(self, trajectory: Union[Trajectory, ArrayTrajectory], horizon: int) -> np.ndarray:
+        """Lateral positions of the next horizon trajectory points."""
+        if isinstance(trajectory, ArrayTrajectory):
+            return trajectory.remaining[:horizon, 1]
+        return np.array([state.pos.y for state in trajectory.trajectory[:horizon]])
+
+    def warm_start(self, horizon: int) -> np.ndarray:
+        """The previous solution shifted by one step, the last control repeated, zeros without one."""
+        u0 = np.zeros((horizon, 2))
+        if self.previous_solution is not None and len(self.previous_solution) > 1:
+            shifted = self.previous_solution[1 : horizon + 1]
+            u0[: len(shifted)] = shifted
+            u0[len(shifted) :] = shifted[-1]
+        return u0
+
+    def compute_controls_fast(
+        self, current_state: State, trajectory: Union[Trajectory, ArrayTrajectory]
+    ) -> Tuple[float, float]:
+        """
+        compute_controls with the analytic Jacobian and a box bounded Gauss-Newton solve,
+        warm started from the previous solution shifted by one step.
+        :param current_state: Current state of the vehicle.
+        :param trajectory: Planned trajectory.
+        :return: Optimal acceleration and steering angle.
+        """
+        if trajectory.is_trajectory_empty():
+            self.previous_solution = None
+            return 0.0, 0.0
+
+        self.horizon = min(self.init_horizon, trajectory.trajectory_length)
+        initial_state = np.array(
+            [current_state.pos.x, current_state.pos.y, current_state.angles.heading, current_state.vel.x]
+        )
+        optimal_control = self.solve_box_bounded(
+            self.warm_start(self.horizon), initial_state, self.reference_y(trajectory, self.horizon)
+        )
+        self.previous_solution = optimal_control
+        return float(optimal_control[0, 0]), float(optimal_control[0, 1])
+
+
+@lru_cache(maxsize=None)
+def _strictly_lower(size: int) -> np.ndarray:
+    """Read-only mask of j < k entries, row k marks the steps before step k."""
+    mask = np.tril(np.ones((size, size)), -1)
+    mask.setflags(write=False)
+    return mask
@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+from typing import Optional, Union
+
 import numpy as np
 
-from highway_simulation.scripts.planning.state import State, Trajectory
+from highway_simulation.scripts.planning.state import ArrayTrajectory, State, Trajectory
 
 class PurePursuit:
     """Basic pure pursuit controller for trajectory tracking."""
 
+    # rows checked per vectorized distance evaluation on array trajectories, doubled on a miss
+    SEARCH_WINDOW = 16
+
     def __init__(self, look_ahead_distance: float, wheelbase: float) -> None:
         """
         Initialize the Pure Pursuit controller.
@@ -17,9 +22,12 @@ class PurePursuit:
         """
         self.look_ahead_distance = look_ahead_distance
         self.wheelbase = wheelbase
+        # last look-ahead row of the tracked array trajectory, only moves forward
+        self.look_ahead_index = 0
+        self._tracked: Optional[ArrayTrajectory] = None
 
     def compute_steering_angle(
-        self, current_state: State, trajectory: Trajectory
+        self, current_state: State, trajectory: Union[Trajectory, ArrayTrajectory]
     ) -> float:
         """
         Compute the steering angle to follow the trajectory.
@@ -27,33 +35,68 @@ class PurePursuit:
         :param trajectory: The planned trajectory.
         :return: Steering angle (radians).
         """
+        return self.steering_from_xy(
+            current_state.pos.x, current_state.pos.y, current_state.angles.heading, trajectory
+        )
+
+    def steering_from_xy(
+        self, vehicle_x: float, vehicle_y: float, heading: float, trajectory: Union[Trajectory, ArrayTrajectory]
+    ) -> float:
+        """
+        compute_steering_angle from the raw pose, without building a State.
+        :param heading: Vehicle heading (radians).
+        """
         if trajectory.is_trajectory_empty():
             #print("Trajectory is empty!")
             return 0.0
 
-        # Extract vehicle position
-        vehicle_x, vehicle_y = current_state.pos.x, current_state.pos.y
-
         # Find the closest look-ahead point
-        look_ahead_point = None
-        for state in trajectory.trajectory:
-            dist = np.sqrt((state.pos.x - vehicle_x) ** 2 + (state.pos.y - vehicle_y) ** 2)
-            if dist >= self.look_ahead_distance:
-                look_ahead_point = state
-                break
+        if isinstance(trajectory, ArrayTrajectory):
+            point_x, point_y = trajectory.data[self.find_look_ahead_index(vehicle_x, vehicle_y, trajectory), :2].tolist()
+        else:
+            look_ahead_point = None
+            for state in trajectory.trajectory:
+                dist = np.sqrt((state.pos.x - vehicle_x) ** 2 + (state.pos.y - vehicle_y) ** 2)
+                if dist >= self.look_ahead_distance:
+                    look_ahead_point = state
+                    break
 
-        if look_ahead_point is None:
-            # If no point is found within the look-ahead distance, aim for the last point
-            look_ahead_point = trajectory.trajectory[-1]
+            if look_ahead_point is None:
+                # If no point is found within the look-ahead distance, aim for the last point
+                look_ahead_point = trajectory.trajectory[-1]
+            point_x, point_y = look_ahead_point.pos.x, look_ahead_point.pos.y
 
         # Transform look-ahead point to the vehicle's local frame
-        dx = look_ahead_point.pos.x - vehicle_x
-        dy = look_ahead_point.pos.y - vehicle_y
+        dx = point_x - vehicle_x
+        dy = point_y - vehicle_y
         theta = np.arctan2(dy, dx)  # Direction to the look-ahead point
-        heading_error = theta - current_state.angles.heading  # Heading error relative to vehicle's orientation
+        heading_error = theta - heading  # Heading error relative to vehicle's orientation
 
         # Calculate steering angle using pure pursuit formula
         ld_squared = self.look_ahead_distance ** 2
         steering_angle = np.arctan2(2 * self.wheelbase * np.sin(heading_error), ld_squared)
 
         return steering_angle
+
+    def find_look_ahead_index(self, vehicle_x: float, vehicle_y: float, trajectory: ArrayTrajectory) -> int:
+        """
+        Row of the first remaining point at least look_ahead_distance away, the last row if there is none.
+        The search starts at the trajectory cursor so the result equals a full scan, the remembered
+        look-ahead index only sizes the first window, which usually already contains the answer.
+        """
+        if trajectory is not self._tracked:
+            self._tracked = trajectory
+            self.look_ahead_index = trajectory.cursor
+        positions = trajectory.data
+        start, end = trajectory.cursor, len(positions)
+        stop = min(end, max(self.look_ahead_index, start) + self.SEARCH_WINDOW)
+        while start < end:
+            window = positions[start:stop]
+            dist = np.sqrt((window[:, 0] - vehicle_x) ** 2 + (window[:, 1] - vehicle_y) ** 2)
+            hits = np.flatnonzero(dist >= self.look_ahead_distance)
+            if hits.size:
+                self.look_ahead_index = start + int(hits[0])
+                return self.look_ahead_index
+            start, stop = stop, min(end, stop + 2 * (stop - start))
+        self.look_ahead_index = end - 1
+        return self.look_ahead_index
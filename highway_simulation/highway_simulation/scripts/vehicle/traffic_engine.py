@@ -0,0 +1,362 @@
+"""Structure-of-arrays vehicle storage with batched IDM and bicycle updates."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from highway_simulation.scripts.vehicle.batched_mpc import mpc_controls
+from highway_simulation.scripts.vehicle.mpc import MPCController
+
+if TYPE_CHECKING:
+    from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+def idm_acceleration(
+    speed: np.ndarray,
+    v_max: np.ndarray,
+    a_max: np.ndarray,
+    s0: np.ndarray,
+    T: np.ndarray,
+    b: np.ndarray,
+    delta: np.ndarray,
+    gap: np.ndarray,
+    delta_v: np.ndarray,
+    power: Callable[[np.ndarray, np.ndarray], np.ndarray] = np.power,
+) -> np.ndarray:
+    """
+    Vectorized form of Vehicle.calculate_accel.
+    :param gap: Bumper to bumper distance to the leader, np.inf when there is no leader.
+    :param delta_v: Speed difference to the leader, 0 when there is no leader.
+    :param power: Element-wise power function, see batched_mobil.libm_power for bit-exact results.
+    """
+    s_star = s0 + np.maximum(0.0, speed * T + (speed * delta_v) / (2 * np.sqrt(a_max * b)))
+    accel = a_max * (1 - power(speed / v_max, delta) - power(s_star / gap, 2))
+    return np.maximum(accel, -4)  # bug fix for swolloving vehicles
+
+
+class EngineField:
+    """Vehicle attribute that reads and writes the vehicle's slot in a TrafficEngine column."""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, vehicle: Optional["Vehicle"], owner: Optional[type] = None):
+        if vehicle is None:
+            return self
+        return vehicle._engine.columns[self.name].item(vehicle._slot)
+
+    def __set__(self, vehicle: "Vehicle", value) -> None:
+        vehicle._engine.columns[self.name][vehicle._slot] = value
+
+
+_VIEW_CLASSES: Dict[type, type] = {}
+
+
+def engine_view_class(cls: type) -> type:
+    """
+    Subclass of cls whose engine columns are EngineField views.
+    Attached vehicles are switched to this class, detached ones keep plain attributes
+    so vehicles outside of an engine pay nothing for the indirection.
+    """
+    if cls not in _VIEW_CLASSES:
+        fields = {name: EngineField() for name in TrafficEngine.VIEW_COLUMNS}
+        view_class = type(cls.__name__, (cls,), {"__module__": cls.__module__, **fields})
+        for name, field in fields.items():
+            field.__set_name__(view_class, name)
+        view_class._plain_class = cls
+        _VIEW_CLASSES[cls] = view_class
+    return _VIEW_CLASSES[cls]
+
+
+class TrafficEngine:
+    """
+    Keeps the kinematic and IDM state of every vehicle in contiguous arrays.
+    Attached vehicles become views over their slot (see engine_view_class), so the object
+    based code keeps working while step() advances all non-ego vehicles with one vectorized update.
+    """
+
+    # vehicle attributes that live in the engine while the vehicle is attached
+    VIEW_COLUMNS: Dict[str, type] = {
+        "x": np.float64,
+        "y": np.float64,
+        "speed": np.float64,
+        "theta": np.float64,
+        "steering_angle": np.float64,
+        "lane": np.int64,
+        "v_max": np.float64,
+        "a_max": np.float64,
+        "s0": np.float64,
+        "T": np.float64,
+        "b": np.float64,
+        "delta": np.float64,
+        "ongoing_trajectory": np.bool_,
+        "relative_x": np.float64,
+    }
+    # columns copied once on attach, vehicles never change them afterwards
+    STATIC_COLUMNS: Dict[str, type] = {
+        "length": np.float64,
+        "L_f": np.float64,
+        "L_r": np.float64,
+        "is_ego": np.bool_,
+    }
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self.size = 0  # high water mark of used slots
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype)
+            for name, dtype in {**self.VIEW_COLUMNS, **self.STATIC_COLUMNS}.items()
+        }
+        self.active = np.zeros(capacity, dtype=np.bool_)
+        # independent traffic groups sharing the engine, e.g. the highways of a vector env
+        self.group = np.zeros(capacity, dtype=np.int64)
+        self.vehicles: List[Optional["Vehicle"]] = [None] * capacity
+        self.free_slots: List[int] = []
+
+    def __len__(self) -> int:
+        return self.size - len(self.free_slots)
+
+    def _grow(self) -> None:
+        new_capacity = self.capacity * 2
+        for name, column in self.columns.items():
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[: self.capacity] = column
+            self.columns[name] = grown
+        active = np.zeros(new_capacity, dtype=np.bool_)
+        active[: self.capacity] = self.active
+        self.active = active
+        group = np.zeros(new_capacity, dtype=np.int64)
+        group[: self.capacity] = self.group
+        self.group = group
+        self.vehicles.extend([None] * (new_capacity - self.capacity))
+        self.capacity = new_capacity
+
+    def attach(self, vehicle: "Vehicle", group: int = 0) -> None:
+        """
+        Move the vehicle's state into the arrays and turn the vehicle into a view.
+        :param group: Traffic group of the vehicle, vehicles only follow leaders of their own group.
+        """
+        if vehicle._engine is self:
+            return
+        if vehicle._engine is not None:
+            vehicle._engine.detach(vehicle)
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            slot = self.size
+            self.size += 1
+
+        state = vehicle.__dict__
+        for name in self.VIEW_COLUMNS:
+            self.columns[name][slot] = state.pop(name)
+        for name in self.STATIC_COLUMNS:
+            self.columns[name][slot] = state[name]
+        self.active[slot] = True
+        self.group[slot] = group
+        self.vehicles[slot] = vehicle
+        vehicle._slot = slot
+        vehicle._engine = self
+        vehicle.__class__ = engine_view_class(type(vehicle))
+
+    def detach(self, vehicle: "Vehicle") -> None:
+        """Copy the vehicle's state back into the object and release its slot."""
+        if vehicle._engine is not self:
+            return
+        slot = vehicle._slot
+        vehicle.__class__ = vehicle._plain_class
+        for name in self.VIEW_COLUMNS:
+            vehicle.__dict__[name] = self.columns[name].item(slot)
+        self.active[slot] = False
+        self.vehicles[slot] = None
+        self.free_slots.append(slot)
+        vehicle._engine = None
+        vehicle._slot = -1
+
+    def attach_all(self, vehicles: Sequence["Vehicle"], group: int = 0) -> None:
+        """Attach detached vehicles as attach does one by one, each column is filled in one assignment."""
+        slots = []
+        for _ in vehicles:
+            if self.free_slots:
+                slots.append(self.free_slots.pop())
+            else:
+                if self.size == self.capacity:
+                    self._grow()
+                slots.append(self.size)
+                self.size += 1
+        states = [vehicle.__dict__ for vehicle in vehicles]
+        for name in self.VIEW_COLUMNS:
+            self.columns[name][slots] = [state.pop(name) for state in states]
+        for name in self.STATIC_COLUMNS:
+            self.columns[name][slots] = [state[name] for state in states]
+        self.active[slots] = True
+        self.group[slots] = group
+        for vehicle, slot in zip(vehicles, slots):
+            self.vehicles[slot] = vehicle
+            vehicle._slot = slot
+            vehicle._engine = self
+            vehicle.__class__ = engine_view_class(type(vehicle))
+
+    def clear(self, group: Optional[int] = None) -> None:
+        """Detach every vehicle, or only those of the given group, in slot order like repeated detach."""
+        n = self.size
+        slots = np.flatnonzero(self.active[:n] if group is None else self.active[:n] & (self.group[:n] == group))
+        values = [self.columns[name][slots].tolist() for name in self.VIEW_COLUMNS]
+        slots = slots.tolist()
+        for slot, row in zip(slots, zip(*values)):
+            vehicle = self.vehicles[slot]
+            vehicle.__class__ = vehicle._plain_class
+            vehicle.__dict__.update(zip(self.VIEW_COLUMNS, row))
+            self.vehicles[slot] = None
+            vehicle._engine = None
+            vehicle._slot = -1
+        self.active[slots] = False
+        self.free_slots.extend(slots)
+        if len(self) == 0:
+            self.size = 0
+            self.free_slots = []
+
+    def gather(self, vehicles: Sequence["Vehicle"], name: str) -> np.ndarray:
+        """Column values of attached vehicles, in the given order."""
+        return self.columns[name][[vehicle._slot for vehicle in vehicles]]
+
+    def fork(self, group: int, clones: Dict[int, "Vehicle"]) -> "TrafficEngine":
+        """
+        Engine over copies of the columns holding only the given group, see LaneManager.fork.
+        :param clones: Forked vehicle of each vehicle of the group by id of the original, bound to the new engine.
+        """
+        n = self.size
+        engine = object.__new__(TrafficEngine)
+        engine.capacity = self.capacity
+        engine.size = n
+        engine.columns = {name: column.copy() for name, column in self.columns.items()}
+        engine.group = self.group.copy()
+        engine.active = self.active & (self.group == group)
+        engine.vehicles = [None] * self.capacity
+        for slot in np.flatnonzero(engine.active[:n]).tolist():
+            clone = clones[id(self.vehicles[slot])]
+            clone._engine = engine
+            engine.vehicles[slot] = clone
+        # slots of other groups are handed out after those the origin would use next
+        others = np.flatnonzero(self.active[:n] & ~engine.active[:n]).tolist()
+        engine.free_slots = others[::-1] + self.free_slots
+        return engine
+
+    def group_of(self, vehicle: "Vehicle") -> int:
+        return int(self.group[vehicle._slot])
+
+    def group_slots(self, group: int) -> np.ndarray:
+        """Occupied slots of the given group."""
+        n = self.size
+        return np.flatnonzero(self.active[:n] & (self.group[:n] == group))
+
+    def update_relative_positions(self, group: int) -> None:
+        """relative_x of the group's vehicles as LaneManager.reset_positions_wrt_ego sets it, in one update."""
+        slots = self.group_slots(group)
+        ego = slots[self.columns["is_ego"][slots]]
+        if ego.size == 0:
+            return
+        x = self.columns["x"]
+        relative_x = self.columns["relative_x"]
+        relative_x[slots] = relative_x[ego[0]] + (x[slots] - x[ego[0]])
+
+    def find_leaders(self) -> np.ndarray:
+        """Slot of the next vehicle ahead in the same lane and group for each slot, -1 if there is none."""
+        n = self.size
+        leader = np.full(n, -1, dtype=np.int64)
+        slots = np.flatnonzero(self.active[:n])
+        if slots.size < 2:
+            return leader
+        x = self.columns["x"]
+        lane = self.columns["lane"]
+        group = self.group
+        order = slots[np.lexsort((x[slots], lane[slots], group[slots]))]
+        same_lane = (lane[order[1:]] == lane[order[:-1]]) & (group[order[1:]] == group[order[:-1]])
+        leader[order[:-1][same_lane]] = order[1:][same_lane]
+        return leader
+
+    def idm_accelerations(self) -> np.ndarray:
+        """IDM acceleration of every slot with respect to its current leader."""
+        n = self.size
+        c = self.columns
+        x, speed, length = c["x"][:n], c["speed"][:n], c["length"][:n]
+        leader = self.find_leaders()
+        has_leader = leader >= 0
+        lead = leader[has_leader]
+
+        gap = np.full(n, np.inf)
+        gap[has_leader] = np.maximum(0.1, x[lead] - x[has_leader] - length[lead])
+        delta_v = np.zeros(n)
+        delta_v[has_leader] = speed[has_leader] - speed[lead]
+        return idm_acceleration(
+            speed, c["v_max"][:n], c["a_max"][:n], c["s0"][:n], c["T"][:n],
+            c["b"][:n], c["delta"][:n], gap, delta_v,
+        )
+
+    def step(
+        self,
+        dt: float,
+        accelerations: Optional[np.ndarray] = None,
+        mpc: Optional[MPCController] = None,
+        groups: Optional[Sequence[int]] = None,
+    ) -> List["Vehicle"]:
+        """
+        Advance every attached non-ego vehicle by one time step.
+        Mirrors Vehicle.update: IDM speed update, pure pursuit steering for vehicles that follow
+        a trajectory and the kinematic bicycle model.
+        :param accelerations: Precomputed IDM accelerations, computed from the current state if None.
+        :param mpc: Steer the trajectory followers with one batched MPC solve instead of pure pursuit.
+        :param groups: Only advance the vehicles of these traffic groups.
+        :return: Vehicles that completed their trajectory during this step.
+        """
+        n = self.size
+        c = self.columns
+        if accelerations is None:
+            accelerations = self.idm_accelerations()
+        movable = self.active[:n] & ~c["is_ego"][:n]
+        if groups is not None:
+            movable &= np.isin(self.group[:n], groups)
+        moving = np.flatnonzero(movable)
+        if moving.size == 0:
+            return []
+
+        speed = np.maximum(0.1, c["speed"][moving] + accelerations[moving] * dt)
+        c["speed"][moving] = speed
+
+        # Steering is only non-zero for vehicles that track a trajectory
+        steering = np.zeros(moving.size)
+        tracking = np.flatnonzero(c["ongoing_trajectory"][moving])
+        tracked = [self.vehicles[moving[i]] for i in tracking]
+        for vehicle in tracked:
+            if not vehicle.trajectory.is_trajectory_empty():
+                vehicle.trajectory.use_next_state()
+        if mpc is None:
+            for i, vehicle in zip(tracking, tracked):
+                vehicle.update_steering_angle()
+                steering[i] = vehicle.steering_angle
+        else:
+            _, steering[tracking] = mpc_controls(tracked, mpc)
+        c["steering_angle"][moving] = steering
+
+        # Kinematic bicycle model
+        L_r = c["L_r"][moving]
+        L = c["L_f"][moving] + L_r
+        theta = c["theta"][moving]
+        beta = np.arctan((L_r / L) * np.tan(steering))
+        c["x"][moving] += speed * np.cos(theta + beta) * dt
+        c["y"][moving] += speed * np.sin(theta + beta) * dt
+        c["theta"][moving] = theta + (speed / L) * np.sin(steering) * dt
+
+        completed = []
+        for i in tracking:
+            vehicle = self.vehicles[moving[i]]
+            if vehicle.trajectory.is_trajectory_empty() and not vehicle.trajectory_completed:
+                vehicle.theta = 0.0
+                vehicle.trajectory_completed = True
+                vehicle.ongoing_trajectory = False
+                vehicle.number_of_lane_changes += 1
+                completed.append(vehicle)
+        return completed
@@ -11,25 +11,26 @@ import numpy as np
 
 from highway_simulation.scripts.vehicle.mpc import MPCController
 from highway_simulation.scripts.vehicle.pure_pursuit import PurePursuit
+from highway_simulation.scripts.vehicle.traffic_engine import TrafficEngine
 from highway_simulation.scripts.vehicle.util import IDM_PARAM, MOBIL_PARAM, random_color
 from highway_simulation.scripts.planning.state import (
     Acc,
     Angles,
+    HistoryBuffer,
     Jerk,
     Pos,
     State,
     Trajectory,
     Vel,
 )
-from highway_simulation.scripts.util.config import Config
+from highway_simulation.scripts.util.config import Config, default_config
+from highway_simulation.scripts.util.utils import shallow_copy
 
 
 class Vehicle:
-    config = Config
-
-    @classmethod
-    def set_config(cls, config: Config) -> None:
-        cls.config = config
+    # set while the vehicle is a view over a TrafficEngine slot
+    _engine: Optional[TrafficEngine] = None
+    _slot = -1
 
     def __init__(
         self,
@@ -45,7 +46,9 @@ class Vehicle:
         mobil_param: MOBIL_PARAM = MOBIL_PARAM(politeness=0.5, a_thr=0.2, b_safe=2.0),
         L_f: float = 2.5,
         L_r: float = 2.5,
+        config: Optional[Config] = None,
     ) -> None:
+        self.config = config if config is not None else default_config
         self.ongoing_trajectory = False
         self.trajectory_completed = False  # only true for one time stamp per trajectory
         self.x = x
@@ -86,24 +89,45 @@ class Vehicle:
         self.number_of_lane_changes = 0
         self.take_over_time_counter = 0
 
-        self.history_trajectory: Trajectory = Trajectory()
+        self.history_trajectory = HistoryBuffer(self.config.history_max_length, self.config)
 
         self.vehicle_ahead = None
         self.acc = 0
         self.lateral_acc = 0
 
+    def fork(self) -> "Vehicle":
+        """
+        Copy for a forked simulation, see LaneManager.fork.
+        Parameters, planned trajectories and empty trajectories are shared as they are only ever replaced,
+        a trajectory being followed, its controllers and the ego history are copied.
+        An engine view keeps its slot, TrafficEngine.fork rebinds it to the forked engine.
+        """
+        clone = shallow_copy(self)
+        state = clone.__dict__
+        if not self.trajectory.is_trajectory_empty():
+            state["trajectory"] = self.trajectory.copy()
+            # without a trajectory pure pursuit is idle, and it restarts its search for a new trajectory anyway
+            state["pure_pursuit"] = shallow_copy(self.pure_pursuit)
+        state["mpc_controller"] = shallow_copy(self.mpc_controller)
+        state["vehicle_ahead"] = None  # found again at the start of every update
+        if self.is_ego:
+            state["history_trajectory"] = self.history_trajectory.copy()
+        return clone
+
         
-    def update(self) -> None:
-        
+    def update(self, dt: Optional[float] = None) -> None:
+        """
+        :param dt: Length of the tick, config.time_step if None. Longer ticks are only taken without a trajectory.
+        """
         if not self.trajectory.is_trajectory_empty():
             self.trajectory.use_next_state()
 
-        dt = self.config.time_step
+        dt = self.config.time_step if dt is None else dt
         if self.is_ego:  # change later
             acc = self.acc
             self.speed += dt * acc
             # self.y = self.y + one_step_lateral_movement  # Update position
-            self.history_trajectory.trajectory.append(self.return_state)
+            self.record_history()
             #logger.info(f"Ego state Pos x {self.x},y {self.y} Vel x {self.speed},y {self.lateral_speed} Acc x {self.acc},y {self.lateral_acc}, Steering angle {self.steering_angle}")
 
         else:
@@ -111,9 +135,9 @@ class Vehicle:
             self.speed = max(0.1, self.speed + acc * dt)  # Ensure speed doesn't go below 0
 
         self.update_steering_angle()
-        self.bicycle_model(self.steering_angle)
+        self.bicycle_model(self.steering_angle, dt)
 
-    def update_ego_driven_with_mobil(self) -> None:
+    def update_ego_driven_with_mobil(self, dt: Optional[float] = None) -> None:
         def map_to_closest(value):
             discrete_values = [-4, -2,-1,-0.5, 0, 0.1, 0.25, 0.5,1, 2]
             return min(discrete_values, key=lambda x: abs(x - value))
@@ -123,7 +147,7 @@ class Vehicle:
         if not self.trajectory.is_trajectory_empty():
             self.trajectory.use_next_state()
 
-        dt = self.config.time_step
+        dt = self.config.time_step if dt is None else dt
         
         acc = self.calculate_accel(self.vehicle_ahead)
         ## map acc to action space of RL for fair comparison.
@@ -133,26 +157,28 @@ class Vehicle:
         self.speed = max(0.1, self.speed + acc * dt)  # Ensure speed doesn't go below 0
 
         self.update_steering_angle()
-        self.bicycle_model(self.steering_angle)
+        self.bicycle_model(self.steering_angle, dt)
         
         if self.is_ego:
             self.acc = acc  # plotting purposes
-            self.history_trajectory.trajectory.append(self.return_state)
+            self.record_history()
 
     def update_steering_angle(self) -> None:
 
-        #if self.is_ego:
-        #    _, self.steering_angle = self.mpc_controller.compute_controls(self.return_state, self.trajectory)
-        #
-        # else:
-        self.steering_angle = self.pure_pursuit.compute_steering_angle(
-            self.return_state, self.trajectory
+        if self.is_ego and self.config.ego_mpc_steering:
+            _, self.steering_angle = self.mpc_controller.compute_controls_fast(self.return_state, self.trajectory)
+            return
+        if self.trajectory.is_trajectory_empty():
+            self.steering_angle = 0.0
+            return
+        self.steering_angle = self.pure_pursuit.steering_from_xy(
+            self.x, self.y, self.theta, self.trajectory
         )
             #print(f"pure pursuit angle: {self.steering_angle} mpc angle: {angle}")
         #self.steering_angle, self.acc = self.mpc.compute_control(self.return_state, self.trajectory)
 
-    def bicycle_model(self, steering_angle: float) -> None:
-        dt = self.config.time_step
+    def bicycle_model(self, steering_angle: float, dt: Optional[float] = None) -> None:
+        dt = self.config.time_step if dt is None else dt
 
         L = self.L_f + self.L_r  # Total wheelbase
         beta = np.arctan((self.L_r / L) * np.tan(steering_angle))
@@ -298,6 +324,13 @@ class Vehicle:
             Angles(self.theta, self.steering_angle),
         )
     
+    def record_history(self) -> None:
+        """Append the current state to history_trajectory without building a State."""
+        self.history_trajectory.record(
+            self.x, self.y, self.speed, self.lateral_speed, self.acc, self.lateral_acc,
+            self.theta, self.steering_angle,
+        )
+
     def apply_state(self, state: State) -> None:
         ## these values are currently not used
         self.acc = state.acc.x
@@ -305,7 +338,7 @@ class Vehicle:
         self.lateral_speed = state.vel.y
         
     def __eq__(self, other) -> bool:
-        if isinstance(other, self.__class__):
+        if isinstance(other, Vehicle):
             return (
                 other.x == self.x
                 and other.y == self.y
@@ -325,12 +358,13 @@ class Vehicle:
         planned_y = [state.pos.y for state in self.stored_planned_trajectory]
 
         # Extract actuated Y trajectory (only from the latest trajectory execution)
-        actuated_y = [state.pos.y for state in self.history_trajectory.trajectory[self.current_trajectory_start_index:]]
+        actuated_states = self.history_trajectory.states_since(self.current_trajectory_start_index)
+        actuated_y = [state.pos.y for state in actuated_states]
 
         # Extract steering angles from the actuated trajectory
-        steering_angles = [state.angles.steering_angle for state in self.history_trajectory.trajectory[self.current_trajectory_start_index:]]
+        steering_angles = [state.angles.steering_angle for state in actuated_states]
         
-        heading_angles = [state.angles.heading for state in self.history_trajectory.trajectory[self.current_trajectory_start_index:]]
+        heading_angles = [state.angles.heading for state in actuated_states]
 
         heading_angles[-1] = 0
         # Generate time axis
@@ -13,42 +13,35 @@ import yaml
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from environments.video_recorder import FrameStream
 from rl.Driver_dqn import DriverDQN
+from scripts.plotting.highwayPlotter import HighwayPlotter
 class driver_test(DriverDQN):
     """DriverDQN wrapper for test-case evaluation and recording."""
 
-    def start_screen_recording(
-        self,
-        filename: str = "videos/test_cases_recording.mp4",
-        fps: int = 30,
-        resolution: str = "1920x1080",
-    ):
-        # Start screen recording with ffmpeg in a subprocess
-        command = [
-            'ffmpeg', '-y', '-f', 'x11grab',  
-            '-framerate', str(fps),
-            '-video_size', resolution,
-            '-i', ':1.0',  # You can specify a window instead, e.g. ':0.0+0,0'
-            '-codec:v', 'libx264', filename
-        ]
-        return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    def stop_screen_recording(self) -> None:
-        self.recording_process.terminate()  # Stop the ffmpeg subproces
-    
+    def start_recording(self, filename: str) -> FrameStream:
+        """Stream frames of an offscreen plotter into filename, no display is needed."""
+        self.recording_plotter = HighwayPlotter(self.env.lane_manager, config=self.env.config, render_mode="rgb_array")
+        frame = self.recording_plotter.render()
+        stream = FrameStream(filename, frame.shape[1], frame.shape[0], fps=round(1 / self.recording_plotter.config.time_step))
+        stream.write(frame)
+        return stream
+
     def test_spesific_cases(self, render: bool = True) -> None:
         self.q_network.load_state_dict(torch.load("dqn.pt"))
         self.q_network.eval()
         self.epsilon = 0
         rewards = []
+        recordings = []
         
-        self.recording_process = self.start_screen_recording("videos/test_cases_recording.mp4", fps=30)
         num_of_test_cases = len(self.env.lane_manager.test_cases)
         self.env.effective_sim_length = 5000
         self.env.effective_sim_time = 100
         self.env.lane_manager.num_of_vehicles = 0
         for case_num in range(num_of_test_cases):
             state, test_case_name = self.env.reset_for_test_cases()
+            recording = self.start_recording(f"videos/test_case_{case_num}.mp4")
+            recordings.append(recording)
             self.env.sim_start_time = time.time()
             done = False
             total_reward = 0
@@ -98,19 +91,22 @@ class driver_test(DriverDQN):
                 if render:
                     #self.env_plotter.update_highway(self.env)
                     self.env_plotter.render()
+                recording.write(self.recording_plotter.render())
 
+            recording.close(wait=False)  # encodes while the next test case runs
+            self.recording_plotter.close()  # the next test case starts its own plotter
             rewards.append(total_reward)
 
             # Save the speed plot after the test case ends
             plt.ioff()  # Turn off interactive mode
             plt.savefig(f"images/test_case_{case_num}_speed_plot.png")
             plt.close(fig)  # Close the figure
-        self.stop_screen_recording()
-        time.sleep(1)
+        for recording in recordings:
+            recording.close()  # waits for the videos to be encoded
 
 
 def speed_up_video(
-    input_file: str = "videos/test_cases_recording.mp4",
+    input_file: str = "videos/test_case_0.mp4",
     output_file: str = "videos/output.mp4",
 ) -> None:
     # The ffmpeg command to speed up the video
@@ -141,4 +137,4 @@ if __name__ == "__main__":
     #driver.train(num_episodes= 4000,render=False) 
     #driver.test(render=True)
     driver.test_spesific_cases(render=True)
-    #speed_up_video("videos/test_cases_recording.mp4", "videos/output.mp4")
+    #speed_up_video("videos/test_case_0.mp4", "videos/output.mp4")
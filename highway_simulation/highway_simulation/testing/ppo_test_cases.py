@@ -11,44 +11,30 @@ import matplotlib.pyplot as plt
 from stable_baselines3 import PPO
 
 from environments.relative_to_ego_highway_env import HighwayEnv
+from environments.video_recorder import VideoRecorderWrapper
 
 
 class driver_test:
-    def __init__(self) -> None:
-        self.env: HighwayEnv = gym.make(id="highway_env")
+    def __init__(self, record: bool = True) -> None:
+        self.env: HighwayEnv = gym.make(id="highway_env", render_mode="rgb_array" if record else "human")
+        if record:
+            # one video per test case, rendered offscreen so no display is needed
+            self.env = VideoRecorderWrapper(self.env, "videos", name_prefix="test_case")
         self.env.config.effective_sim_length = 5000
         self.env.config.effective_sim_time = 30
         
         self.env.config.num_of_vehicles = 0
         self.model = PPO.load("rl_scripts/tmp/best_model.zip")
 
-    def start_screen_recording(
-        self,
-        filename: str = "videos/test_cases_recording.mp4",
-        fps: int = 30,
-        resolution: str = "1920x1080",
-    ):
-        # Start screen recording with ffmpeg in a subprocess
-        command = [
-            'ffmpeg', '-y', '-f', 'x11grab',  
-            '-framerate', str(fps),
-            '-video_size', resolution,
-            '-i', ':1.0',  # You can specify a window instead, e.g. ':0.0+0,0'
-            '-codec:v', 'libx264', filename
-        ]
-        return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    def stop_screen_recording(self) -> None:
-        self.recording_process.terminate()  # Stop the ffmpeg subproces
-    
     def test_spesific_cases(self, render: bool = True) -> None:
-        self.recording_process = self.start_screen_recording("videos/test_cases_recording.mp4", fps=30)
+        """:param render: Draw to the window when not recording."""
         num_of_test_cases = len(self.env.highway.lane_manager.test_cases)
         rewards = []
         
         for case_num in range(num_of_test_cases):
-            _, _ = self.env.reset()
-            obs, test_case_name = self.env.highway.reset_for_test_cases()
+            # through reset, so the recorder's first frame shows the test case
+            obs, info = self.env.reset(options={"test_case": True})
+            test_case_name = info["test_case_name"]
             #self.env.highway.lane_manager.sim_start_time = time.time()
             done = False
             total_reward = 0
@@ -94,7 +80,7 @@ class driver_test:
                 plt.draw()
                 plt.pause(0.001)
 
-                if render:
+                if render and self.env.render_mode == "human":
                     #self.env_plotter.update_highway(self.env)
                     self.env.render()
 
@@ -104,12 +90,11 @@ class driver_test:
             plt.ioff()  # Turn off interactive mode
             plt.savefig(f"images/test_case_{case_num}_speed_plot.png")
             plt.close(fig)  # Close the figure
-        self.stop_screen_recording()
-        time.sleep(1)
+        self.env.close()  # waits for the videos to be encoded
 
 
 def speed_up_video(
-    input_file: str = "videos/test_cases_recording.mp4",
+    input_file: str = "videos/test_case_0.mp4",
     output_file: str = "videos/output.mp4",
 ) -> None:
     # The ffmpeg command to speed up the video
@@ -138,4 +123,4 @@ if __name__ == "__main__":
     #driver.train(num_episodes= 4000,render=False) 
     #driver.test(render=True)
     driver.test_spesific_cases(render=True)
-    #speed_up_video("videos/test_cases_recording.mp4", "videos/output.mp4")
+    #speed_up_video("videos/test_case_0.mp4", "videos/output.mp4")
@@ -0,0 +1,57 @@
+"""Tests for the array backed trajectory."""
+
+import dataclasses
+import unittest
+
+from highway_simulation.scripts.planning.state import Acc, ArrayTrajectory, Pos, State, Vel
+from highway_simulation.scripts.planning.trajectory_planner import TrajectoryPlanner
+from highway_simulation.scripts.util.config import default_config
+
+
+class TestArrayTrajectory(unittest.TestCase):
+
+    def setUp(self):
+        self.start_state = State(Pos(0.0, 0.0), Vel(15.0, 0.0), Acc(0.0, 0.0))
+        self.end_state = State(Pos(45.0, 3.5), Vel(15.0, 0.0), Acc(0.0, 0.0))
+        self.list_trajectory = TrajectoryPlanner(config=default_config).plan_between_points(
+            self.start_state, self.end_state
+        )
+        array_config = dataclasses.replace(default_config, array_trajectories=True)
+        self.array_trajectory = TrajectoryPlanner(config=array_config).plan_between_points(
+            self.start_state, self.end_state
+        )
+
+    def test_planner_returns_array_trajectory(self):
+        self.assertIsInstance(self.array_trajectory, ArrayTrajectory)
+        self.assertEqual(self.array_trajectory.trajectory_length, self.list_trajectory.trajectory_length)
+        self.assertEqual(list(self.array_trajectory.trajectory), self.list_trajectory.trajectory)
+        self.assertEqual(self.array_trajectory.last_state, self.list_trajectory.last_state)
+
+    def test_consumption_moves_cursor(self):
+        length = self.array_trajectory.trajectory_length
+        first = self.array_trajectory.use_next_state()
+        self.assertEqual(first, self.list_trajectory.use_next_state())
+        self.assertEqual(self.array_trajectory.trajectory_length, length - 1)
+        self.assertEqual(self.array_trajectory.trajectory[0], self.list_trajectory.trajectory[0])
+
+        while not self.array_trajectory.is_trajectory_empty():
+            self.array_trajectory.use_next_state()
+        self.assertEqual(self.array_trajectory.trajectory_length, 0)
+        self.assertIsNone(self.array_trajectory.last_state)
+        self.assertEqual(list(self.array_trajectory.trajectory), [])
+
+    def test_quality_matches_list_trajectory(self):
+        self.assertEqual(
+            self.array_trajectory.measure_quality_of_trajectory(5.0, 2.0, 0.1),
+            self.list_trajectory.measure_quality_of_trajectory(5.0, 2.0, 0.1),
+        )
+
+    def test_empty_trajectory(self):
+        trajectory = ArrayTrajectory()
+        self.assertTrue(trajectory.is_trajectory_empty())
+        self.assertEqual(trajectory.trajectory_length, 0)
+        self.assertEqual(trajectory.return_pos, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
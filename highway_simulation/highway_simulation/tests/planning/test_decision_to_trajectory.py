@@ -7,21 +7,19 @@ from highway_simulation.scripts.planning.state import Acc, Pos, State, Vel
 from highway_simulation.scripts.planning.trajectory_planner import TrajectoryPlanner
 from highway_simulation.scripts.util.action import Action
 from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
 
 
 class TestDecisionToTrajectory(unittest.TestCase):
     
     def setUp(self):
         """Set up the test environment."""
-        self.planner = TrajectoryPlanner()
-        TrajectoryPlanner.set_config(default_config)
         self.config = default_config
         self.config.lane_width = 3.5  # Example lane width
         self.config.time_step = 0.1  # Example time step
-        DecisionToTrajectory.set_config(self.config)
 
-        self.trajectory_planner = TrajectoryPlanner()
-        self.decision_to_trajectory = DecisionToTrajectory()
+        self.trajectory_planner = TrajectoryPlanner(config=self.config)
+        self.decision_to_trajectory = DecisionToTrajectory(self.config)
 
         # Example initial state
         self.current_state = State(
@@ -76,6 +74,23 @@ class TestDecisionToTrajectory(unittest.TestCase):
         final_state = trajectory.trajectory[-1]
         self.assertAlmostEqual(final_state.pos.x, 37.5)  # x position after accelerating
 
+    def test_calculate_lane_change_trajectories(self):
+        """Batched lane change planning matches planning every vehicle on its own."""
+        vehicles = [
+            Vehicle(x=10, lane=1, speed=90, v_max=100, config=self.config),
+            Vehicle(x=60, lane=0, speed=120, v_max=120, config=self.config),
+            Vehicle(x=90, lane=2, speed=70, v_max=80, config=self.config),
+        ]
+        target_lanes = [0, 1, 1]
+        batched = self.decision_to_trajectory.calculate_lane_change_trajectories(vehicles, target_lanes)
+
+        self.assertEqual(len(batched), len(vehicles))
+        for vehicle, target_lane, trajectory in zip(vehicles, target_lanes, batched):
+            expected = self.decision_to_trajectory.calculate_lane_change_trajectory(vehicle, target_lane)
+            self.assertEqual(trajectory.trajectory_length, expected.trajectory_length)
+            self.assertAlmostEqual(trajectory.last_state.pos.y, target_lane * self.config.lane_width)
+            self.assertAlmostEqual(trajectory.last_state.pos.x, expected.last_state.pos.x, places=9)
+
         
 if __name__ == "__main__":
     unittest.main()
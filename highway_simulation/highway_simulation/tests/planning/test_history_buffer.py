@@ -0,0 +1,58 @@
+"""Tests for the columnar ego history recorder."""
+
+import dataclasses
+import random
+import unittest
+
+from highway_simulation.scripts.planning.state import Acc, Angles, HistoryBuffer, Jerk, Pos, State, Trajectory, Vel
+from highway_simulation.scripts.util.config import default_config
+
+
+class TestHistoryBuffer(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.states = [
+            State(
+                Pos(i * 2.5, rng.choice([0.0, 3.5, 7.0])),
+                Vel(rng.uniform(20, 35), 0.0),
+                Acc(rng.choice([-4, -2, 0, 2, rng.uniform(-5, 3)]), 0.0),
+                Jerk(0, 0),
+                Angles(rng.uniform(-0.1, 0.1), rng.uniform(-0.2, 0.2)),
+            )
+            for i in range(700)
+        ]
+
+    def record(self, max_length=None, config=None) -> HistoryBuffer:
+        history = HistoryBuffer(max_length, config)
+        for state in self.states:
+            history.append(state)
+        return history
+
+    def test_growable_buffer_keeps_every_state(self):
+        history = self.record()
+        self.assertEqual(history.trajectory_length, len(self.states))
+        self.assertEqual(list(history.trajectory), self.states)
+        self.assertEqual(history.last_state, self.states[-1])
+
+    def test_ring_keeps_latest_states(self):
+        history = self.record(max_length=100)
+        self.assertEqual(history.recorded, len(self.states))
+        self.assertEqual(list(history.trajectory), self.states[-100:])
+        self.assertEqual(list(history.states_since(650)), self.states[650:])
+        self.assertEqual(list(history.states_since(0)), self.states[-100:])
+
+    def test_aggregates_match_trajectory(self):
+        for ego_drives_with_mobil in (False, True):
+            config = dataclasses.replace(default_config, ego_drives_with_mobil=ego_drives_with_mobil)
+            history = self.record(max_length=100, config=config)
+            trajectory = Trajectory(self.states, config=config)
+            self.assertEqual(history.return_avg_vehicle_speed, trajectory.return_avg_vehicle_speed)
+            self.assertEqual(
+                history.return_acceleration_distribution, trajectory.return_acceleration_distribution
+            )
+        self.assertEqual(HistoryBuffer().return_avg_vehicle_speed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
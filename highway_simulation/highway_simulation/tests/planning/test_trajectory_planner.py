@@ -1,10 +1,13 @@
 """Tests for trajectory planning."""
 
+import dataclasses
 import unittest
 from math import isclose
 
+import numpy as np
+
 from highway_simulation.scripts.planning.state import Acc, Pos, State, Vel
-from highway_simulation.scripts.planning.trajectory_planner import TrajectoryPlanner
+from highway_simulation.scripts.planning.trajectory_planner import TrajectoryPlanner, quintic_basis
 from highway_simulation.scripts.util.config import default_config
 
 
@@ -12,8 +15,7 @@ class TestTrajectoryPlanner(unittest.TestCase):
 
     def setUp(self):
         """Set up the test environment."""
-        self.planner = TrajectoryPlanner()
-        TrajectoryPlanner.set_config(default_config)
+        self.planner = TrajectoryPlanner(config=default_config)
         # Define a sample start and end state
         self.start_state = State(
             pos=Pos(x=0.0, y=0.0),
@@ -137,6 +139,42 @@ class TestTrajectoryPlanner(unittest.TestCase):
                     abs(curr_state.acc.y - prev_state.acc.y) < 4,
                     f"Failed for {action_name}: Acceleration y discontinuity at step {i}"
                 )
-    
+
+    def test_closed_form_matches_solve(self):
+        """The cached closed form planner gives the same trajectories as the per call solve."""
+        expected = [
+            self.planner.quintic_polynomial(case["start"], case["end"], T=3).trajectory
+            for case in self.action_space
+        ]
+        planner = TrajectoryPlanner(config=dataclasses.replace(default_config, closed_form_planner=True))
+        for case, expected_states in zip(self.action_space, expected):
+            actual = planner.quintic_polynomial(case["start"], case["end"], T=3).trajectory
+            self.assertEqual(len(actual), len(expected_states))
+            for a, e in zip(actual, expected_states):
+                for value, reference in zip(a.extract(), e.extract()):
+                    self.assertAlmostEqual(value, reference, places=9)
+                self.assertAlmostEqual(a.jerk.y, e.jerk.y, places=9)
+
+    def test_plan_many_matches_single_plans(self):
+        starts = [case["start"] for case in self.action_space]
+        ends = [case["end"] for case in self.action_space]
+        batch = self.planner.plan_many(starts, ends, T=3)
+
+        self.assertEqual(batch.shape[0], len(self.action_space))
+        for data, start, end in zip(batch, starts, ends):
+            single = self.planner.quintic_closed_form(start, end, T=3)
+            self.assertEqual(data.shape, single.shape)
+            self.assertTrue(np.allclose(data, single, rtol=0, atol=1e-9))
+
+        planner = TrajectoryPlanner(config=dataclasses.replace(default_config, array_trajectories=True))
+        trajectories = planner.to_trajectories(batch)
+        self.assertTrue(np.shares_memory(trajectories[1].data, batch))
+
+    def test_quintic_basis_is_cached(self):
+        A_inv, basis = quintic_basis(3, default_config.time_step)
+        self.assertIs(quintic_basis(3, default_config.time_step)[0], A_inv)
+        self.assertEqual(basis.shape[0], 4)
+        self.assertFalse(A_inv.flags.writeable)
+
 if __name__ == "__main__":
     unittest.main()
@@ -13,12 +13,9 @@ class TestKinematicBicycleModel(unittest.TestCase):
 
     def setUp(self):
         self.config: Config = default_config
-        Vehicle.set_config(self.config)
-        LaneManager.set_config(self.config)
-        DecisionToTrajectory.set_config(self.config)
         self.vehicle = Vehicle(x=50, lane=1, speed=80, v_max=80, is_ego=True)
-        self.lane_manager = LaneManager()
-        self.decision_to_trajectory = DecisionToTrajectory()
+        self.lane_manager = LaneManager(config=self.config)
+        self.decision_to_trajectory = DecisionToTrajectory(self.config)
 
     def test_lateral_motion(self):
         action = Action.CHANGE_LANE_RIGHT
@@ -0,0 +1,73 @@
+"""Tests for the spatial hash collision detector."""
+
+import copy
+import unittest
+
+from highway_simulation.scripts.laneManager import LaneManager
+from highway_simulation.scripts.rewards.collision import CollisionDetector
+from highway_simulation.scripts.rewards.rewardCalculator import RewardCalculator
+from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+def pairs(vehicle_pairs):
+    """Vehicles compare by value, pairs are compared by identity."""
+    return [{id(a), id(b)} for a, b in vehicle_pairs]
+
+
+class TestCollisionDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.config = default_config
+        self.lane_manager = LaneManager(config=self.config)
+        self.detector = CollisionDetector(self.config)
+        self.add_vehicle(x=0, lane=1, is_ego=True)
+
+    def add_vehicle(self, x, lane, is_ego=False):
+        vehicle = Vehicle(x=x, lane=lane, speed=100, v_max=100, is_ego=is_ego, config=self.config)
+        self.lane_manager.add_vehicle(vehicle)
+        return vehicle
+
+    def detect(self):
+        self.detector.build(self.lane_manager.lanes)
+        return self.detector.detect()
+
+    def test_npc_collision_and_near_miss(self):
+        # the second pair straddles a cell boundary
+        boundary = 10 * self.detector.cell_length
+        first = self.add_vehicle(x=1000, lane=0)
+        second = self.add_vehicle(x=1000 + self.detector.collision_distance / 2, lane=0)
+        third = self.add_vehicle(x=boundary - 1, lane=2)
+        fourth = self.add_vehicle(x=boundary + self.detector.collision_distance, lane=2)
+        self.add_vehicle(x=1000, lane=1)  # alone in its part of the lane
+
+        report = self.detect()
+        self.assertEqual(pairs(report.npc_collisions), [{id(first), id(second)}])
+        self.assertEqual(pairs(report.npc_near_misses), [{id(third), id(fourth)}])
+
+    def test_lane_changing_vehicle_is_in_both_lanes(self):
+        merging = self.add_vehicle(x=500, lane=0)
+        other = self.add_vehicle(x=501, lane=1)
+        self.assertEqual(self.detect().npc_collisions, [])
+
+        merging.ongoing_trajectory = True
+        merging.target_lane = 1
+        merging.y = other.y - 0.5
+        self.assertEqual(pairs(self.detect().npc_collisions), [{id(merging), id(other)}])
+
+        merging.y = 0.0  # not yet overlapping laterally
+        self.assertEqual(self.detect().npc_collisions, [])
+
+    def test_reward_calculator_counts_new_npc_collisions(self):
+        config = copy.copy(self.config)
+        config.collision_statistics = True
+        reward_calculator = RewardCalculator(self.lane_manager, config)
+        self.add_vehicle(x=300, lane=2)
+        self.add_vehicle(x=301, lane=2)
+        self.assertEqual(reward_calculator.check_collision_reward(), (0, False))
+        reward_calculator.check_collision_reward()
+        self.assertEqual(reward_calculator.npc_collisions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Tests for the Highway class."""
 
+import dataclasses
 import unittest
 
 import numpy as np
@@ -57,6 +58,146 @@ class TestHighway(unittest.TestCase):
         _, done = self.highway.calculate_reward((0,0,0),0)
         self.assertTrue(done, "Episode should terminate when the time limit is exceeded.")
 
+    def test_simulation_clock_termination(self) -> None:
+        """With sim_clock_termination the time limit counts simulated seconds, not wall-clock ones."""
+        config = dataclasses.replace(self.config, sim_clock_termination=True, effective_sim_time=1, time_step=0.3)
+        highway = Highway(config)
+        highway.reset(seed=42)
+        highway.reward_calculator.sim_start_time -= 1000  # a slow host does not end the episode
+        for _ in range(3):
+            _, _, done, _ = highway.step(0)
+            self.assertFalse(done)
+        self.assertEqual(highway.lane_manager.step_count, 3)
+        self.assertAlmostEqual(highway.reward_calculator.episode_time(), 3 * config.time_step)
+        _, _, done, _ = highway.step(0)
+        self.assertTrue(done)
+
+        highway.reset(seed=42)
+        self.assertEqual(highway.lane_manager.simulation_time, 0.0)
+
+    def test_physics_substeps(self) -> None:
+        """One step advances physics_substeps time steps, only the last one builds the observation."""
+        config = dataclasses.replace(self.config, physics_substeps=3)
+        highway = Highway(config)
+        highway.reset(seed=7)
+        expected_highway = Highway(self.config)
+        expected_highway.reset(seed=7)
+
+        state, reward, _, _ = highway.step(3)
+        previous_ego, bad_action = expected_highway.begin_step(3)
+        expected_reward = 0.0
+        for _ in range(2):
+            expected_highway.update()
+            expected_reward += expected_highway.substep_reward()[0]
+        expected_highway.update()
+        expected_state, last_reward, _, _ = expected_highway.finish_step(previous_ego, bad_action)
+
+        self.assertEqual(highway.lane_manager.step_count, 3)
+        np.testing.assert_array_equal(state, expected_state)
+        self.assertAlmostEqual(reward, expected_reward + last_reward)
+
+    def test_adaptive_time_step(self) -> None:
+        """Free flow takes one tick per step, lane changes fall back to single time steps."""
+        config = dataclasses.replace(self.config, time_step=0.1, physics_substeps=4, adaptive_time_step=True)
+        highway = Highway(config)
+        highway.reset(seed=7, no_vehicles=True)
+        ego = highway.lane_manager.ego_vehicle
+        x, speed = ego.x, ego.speed
+
+        highway.step(0)
+        self.assertEqual(highway.lane_manager.step_count, 1)
+        self.assertAlmostEqual(highway.lane_manager.simulation_time, 0.4)
+        self.assertAlmostEqual(ego.x, x + 0.4 * speed)
+
+        highway.step(1 if ego.lane == 0 else 2)
+        self.assertTrue(highway.lane_manager.lane_change_in_progress)
+        self.assertEqual(highway.lane_manager.step_count, 5)
+        self.assertAlmostEqual(highway.lane_manager.simulation_time, 0.8)
+
+        with self.assertRaises(ValueError):
+            Highway(dataclasses.replace(config, physics_substeps=1))
+
+    def test_wall_clock_budget_truncates(self) -> None:
+        self.highway.step(0)
+        self.assertFalse(self.highway.is_truncated())
+
+        highway = Highway(dataclasses.replace(self.config, sim_clock_termination=True, wall_clock_budget=5))
+        highway.reset(seed=42)
+        _, _, done, _ = highway.step(0)
+        self.assertFalse(done or highway.is_truncated())
+        highway.reward_calculator.sim_start_time -= 10
+        _, _, done, _ = highway.step(0)
+        self.assertFalse(done)
+        self.assertTrue(highway.is_truncated())
+
+    def test_highways_with_different_configs(self) -> None:
+        """Highways keep their own config when another highway is created or stepped in between."""
+        mobil_config = dataclasses.replace(self.config, ego_drives_with_mobil=True, lane_width=4.0)
+        expected = []
+        for config in (self.config, mobil_config):
+            highway = Highway(config)
+            expected.append([highway.reset(seed=3)] + [highway.step(0)[0] for _ in range(10)])
+
+        highways = [Highway(self.config), Highway(mobil_config)]
+        states = [[highway.reset(seed=3)] for highway in highways]
+        for _ in range(10):
+            for highway, highway_states in zip(highways, states):
+                highway_states.append(highway.step(0)[0])
+
+        for highway, config, highway_states, expected_states in zip(
+            highways, (self.config, mobil_config), states, expected
+        ):
+            np.testing.assert_array_equal(highway_states, expected_states)
+            for lane in highway.lane_manager.lanes:
+                for vehicle in lane.vehicles:
+                    self.assertIs(vehicle.config, config)
+        # objects created without a config use default_config, whichever highway was created last
+        self.assertIs(Vehicle(x=0, lane=0, speed=80, v_max=80).config, default_config)
+
+    def test_fork_rollouts_leave_the_highway_unchanged(self) -> None:
+        actions = [0, 1, 3, 2, 0, 4, 0, 0, 1, 0, 3, 0, 2, 0, 0] * 4
+        for flags in ({}, {"use_traffic_engine": True}, {"active_region": 150.0}):
+            with self.subTest(**flags):
+                config = dataclasses.replace(self.config, num_of_vehicles=60, effective_sim_time=10**9, **flags)
+                highway = Highway(config)
+                highway.reset(seed=5)
+                for action in actions[:20]:
+                    highway.step(action)
+                before = sorted((v.x, v.y, v.speed, v.lane) for v in highway.lane_manager.all_vehicles())
+
+                rollouts = []
+                for _ in range(2):
+                    fork = highway.fork()
+                    rollouts.append([fork.step(action)[:2] for action in actions])
+                after = sorted((v.x, v.y, v.speed, v.lane) for v in highway.lane_manager.all_vehicles())
+                self.assertEqual(after, before)
+
+                expected = [highway.step(action)[:2] for action in actions]
+                for rollout in rollouts:
+                    np.testing.assert_array_equal([state for state, _ in rollout], [state for state, _ in expected])
+                    self.assertEqual([reward for _, reward in rollout], [reward for _, reward in expected])
+
+    def test_rgb_array_render(self) -> None:
+        highway = Highway(self.config, render_mode="rgb_array")
+        highway.reset(seed=42)
+        try:
+            frames = []
+            for action in (0, 1, 0):
+                highway.step(action)
+                frames.append(highway.render())
+            plotter = highway.highway_plotter
+            self.assertEqual(frames[0].shape, (plotter.screen_height, self.config.screen_width, 3))
+            self.assertEqual(frames[0].dtype, np.uint8)
+            self.assertIsNone(plotter.clock)
+            colors = {v.color for lane in highway.lane_manager.lanes for v in lane.vehicles}
+            self.assertLessEqual(len({color for color, _ in plotter.sprites}), len(colors))
+            # the ego is drawn around its relative_x in blue
+            ego = highway.lane_manager.ego_vehicle
+            x = int(ego.relative_x * plotter.meter_to_pixel + plotter.vehicle_width / 2)
+            self.assertIn(tuple(self.config.colors["BLUE"]), {tuple(pixel) for pixel in frames[-1][:, x]})
+        finally:
+            highway.close()
+
     def test_take_action_accelerate(self) -> None:
         """Test that the 'accelerate' action increases the vehicle speed."""
         initial_speed = self.highway.lane_manager.ego_vehicle.speed
@@ -1,5 +1,6 @@
 """Tests for HighwayHelper."""
 
+import copy
 import random
 import unittest
 
@@ -12,7 +13,6 @@ class TestHighwayHelper(unittest.TestCase):
     # TODO can be improved
     def setUp(self) -> None:
         self.config = default_config
-        Vehicle.set_config(self.config)
         self.highway_helper = HighwayHelper(self.config)
         self.highway_helper.vehicle_list = []
 
@@ -68,6 +68,28 @@ class TestHighwayHelper(unittest.TestCase):
         random.seed(seed)
         vehicles2 = self.highway_helper.generate_vehicle_list(seed, num_vehicles)
         self.assertEqual(vehicles1, vehicles2)
-        
+
+    def test_free_interval_spawning_places_every_vehicle(self) -> None:
+        """Dense traffic is placed completely, min_distance apart within each lane and seed-deterministic."""
+        config = copy.copy(self.config)
+        config.free_interval_spawning = True
+        highway_helper = HighwayHelper(config)
+        num_vehicles = 480  # close to the 501 vehicles that fit into the two right lanes
+
+        vehicles = highway_helper.generate_vehicle_list(7, num_vehicles)
+        self.assertEqual(len(vehicles), num_vehicles + 1)
+        positions = sorted((v.lane, v.x) for v in vehicles)
+        for (lane, x), (next_lane, next_x) in zip(positions, positions[1:]):
+            if lane == next_lane:
+                self.assertGreaterEqual(next_x - x, 20)
+        self.assertTrue(all(-2950 <= v.x <= 2050 and v.lane > 0 for v in vehicles))
+        self.assertEqual(
+            [(v.x, v.lane, v.speed) for v in highway_helper.generate_vehicle_list(7, num_vehicles)],
+            [(v.x, v.lane, v.speed) for v in vehicles],
+        )
+
+        # more vehicles than fit, the road is filled up
+        self.assertEqual(len(highway_helper.generate_vehicle_list(7, 600)), 502)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+"""Tests for the shared memory process pool vector environment."""
+
+import unittest
+
+import gymnasium as gym
+from gymnasium import spaces
+import numpy as np
+
+from highway_simulation.environments.highway_process_vector_env import HighwayProcessVectorEnv
+from highway_simulation.environments.relative_to_ego_highway_env import HighwayEnv
+
+
+class CountingEnv(gym.Env):
+    """Observation counts the steps, terminates after three of them and fails on action 9."""
+
+    observation_space = spaces.Box(low=0, high=10, shape=(2,), dtype=np.float32)
+    action_space = spaces.Discrete(10)
+
+    def reset(self, seed=None, options=None):
+        self.steps = 0
+        return np.zeros(2, dtype=np.float32), {}
+
+    def step(self, action):
+        if action == 9:
+            raise ValueError("bad action")
+        self.steps += 1
+        observation = np.array([self.steps, action], dtype=np.float32)
+        return observation, float(action), self.steps == 3, False, {}
+
+
+class TestHighwayProcessVectorEnv(unittest.TestCase):
+
+    def test_matches_sync_vector_env(self) -> None:
+        env = HighwayProcessVectorEnv(2)
+        sync_env = gym.vector.SyncVectorEnv([HighwayEnv, HighwayEnv])
+        try:
+            # HighwayEnv takes its seed from seed(), not from reset
+            env.call("seed", 7)
+            for single_env in sync_env.envs:
+                single_env.seed(7)
+            observations, _ = env.reset()
+            expected, _ = sync_env.reset()
+            np.testing.assert_array_equal(observations, expected)
+
+            for t in range(10):
+                actions = np.array([t % 5, 0])
+                observations, rewards, terminations, _, _ = env.step(actions)
+                expected, expected_rewards, expected_terminations, _, _ = sync_env.step(actions)
+                np.testing.assert_array_equal(observations, expected)
+                np.testing.assert_array_equal(rewards, expected_rewards)
+                np.testing.assert_array_equal(terminations, expected_terminations)
+        finally:
+            env.close()
+            sync_env.close()
+
+    def test_autoreset(self) -> None:
+        env = HighwayProcessVectorEnv(2, CountingEnv)
+        try:
+            env.reset()
+            env.step([1, 2])
+            env.step([1, 2])
+            observations, rewards, terminations, _, infos = env.step([4, 5])
+            np.testing.assert_array_equal(rewards, [4.0, 5.0])
+            self.assertTrue(terminations.all())
+            np.testing.assert_array_equal(observations, np.zeros((2, 2)))
+            np.testing.assert_array_equal(infos["final_observation"][1], [3.0, 5.0])
+            self.assertTrue(infos["_final_observation"].all())
+
+            observations, _, terminations, _, infos = env.step([1, 1])
+            self.assertFalse(terminations.any())
+            self.assertEqual(infos, {})
+        finally:
+            env.close()
+
+    def test_worker_error(self) -> None:
+        env = HighwayProcessVectorEnv(2, CountingEnv)
+        try:
+            env.reset()
+            with self.assertRaises(RuntimeError):
+                env.step([0, 9])
+        finally:
+            env.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
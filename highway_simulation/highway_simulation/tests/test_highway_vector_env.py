@@ -0,0 +1,73 @@
+"""Tests for the lockstep vector environment."""
+
+import copy
+import unittest
+
+import gymnasium as gym
+import numpy as np
+
+from highway_simulation.environments.highway_vector_env import HighwayVectorEnv
+from highway_simulation.registration import VECTOR_ENV_ID, register_envs
+from highway_simulation.scripts.highway import Highway
+from highway_simulation.scripts.util.config import default_config
+
+
+class TestHighwayVectorEnv(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.config = copy.copy(default_config)
+        self.config.use_traffic_engine = True
+        self.config.num_of_vehicles = 30
+
+    def test_matches_separate_highways(self) -> None:
+        for batched_mobil, physics_substeps in ((False, 1), (True, 1), (True, 3)):
+            self.config.batched_mobil = batched_mobil
+            self.config.physics_substeps = physics_substeps
+            env = HighwayVectorEnv(3, self.config)
+            observations, _ = env.reset(seed=5)
+            highways = [Highway(self.config) for _ in range(3)]
+            expected = np.array([highway.reset(5 + i) for i, highway in enumerate(highways)])
+            np.testing.assert_array_equal(observations, expected)
+
+            for t in range(10):
+                actions = [t % 5, (t + 1) % 5, 0]
+                observations, rewards, terminations, _, infos = env.step(actions)
+                for i, (highway, action) in enumerate(zip(highways, actions)):
+                    state, reward, done, _ = highway.step(action)
+                    self.assertEqual(rewards[i], reward)
+                    self.assertEqual(terminations[i], done)
+                    final = infos["final_observation"][i] if done else observations[i]
+                    np.testing.assert_array_equal(final, state)
+                    if done:
+                        highway.reset(None)
+                if terminations.any():
+                    break
+
+    def test_autoreset(self) -> None:
+        env = HighwayVectorEnv(2, self.config)
+        env.reset(seed=0)
+        highway = env.highways[1]
+        highway.lane_manager.ego_vehicle.x = self.config.effective_sim_length + 1
+
+        observations, _, terminations, _, infos = env.step([0, 0])
+        self.assertTrue(terminations[1])
+        self.assertTrue(infos["_final_observation"][1])
+        self.assertFalse(infos["_final_observation"][0])
+        self.assertEqual(infos["final_observation"][1].shape, (15,))
+        np.testing.assert_array_equal(observations[1], highway.get_state())
+        self.assertLess(highway.lane_manager.ego_vehicle.x, self.config.effective_sim_length)
+
+    def test_make(self) -> None:
+        register_envs()
+        env = gym.make(VECTOR_ENV_ID, num_envs=2, config=self.config)
+        observations, _ = env.reset(seed=1)
+        self.assertEqual(observations.shape, (2, 15))
+        self.assertEqual(env.action_space.shape, (2,))
+        _, rewards, terminations, truncations, _ = env.step(env.action_space.sample())
+        self.assertEqual(rewards.shape, (2,))
+        self.assertEqual(terminations.dtype, np.bool_)
+        self.assertFalse(truncations.any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Tests for LaneManager."""
 
+import copy
 import unittest
 
 from highway_simulation.scripts.laneManager import LaneManager
@@ -11,9 +12,7 @@ class TestLaneManager(unittest.TestCase):
 
     def setUp(self):
         self.config = default_config
-        LaneManager.set_config(self.config)
-        Vehicle.set_config(self.config)
-        self.lane_manager = LaneManager()
+        self.lane_manager = LaneManager(config=self.config)
 
     def test_find_front_back_vehicles(self):
         ego_vehicle = Vehicle(x=100, lane=1, speed=20, v_max=33.33, is_ego=True)
@@ -143,5 +142,119 @@ class TestLaneManager(unittest.TestCase):
         self.assertIsNone(self.lane_manager.find_vehicle_behind(vehicle1, 1))
         self.lane_manager.remove_all_vehicles()
 
+    def test_find_vehicle_ignores_far_vehicles(self):
+        vehicle1 = Vehicle(x=50, lane=1, speed=50.0, v_max=50.0)
+        vehicle2 = Vehicle(x=250, lane=1, speed=40.0, v_max=40.0)
+        self.lane_manager.add_vehicle(vehicle1)
+        self.lane_manager.add_vehicle(vehicle2)
+
+        self.assertIsNone(self.lane_manager.find_vehicle_ahead(vehicle1, 1))
+        self.assertIsNone(self.lane_manager.find_vehicle_behind(vehicle2, 1))
+        self.lane_manager.remove_all_vehicles()
+
+    def test_lane_index_follows_moves_after_repair(self):
+        vehicle1 = Vehicle(x=50, lane=1, speed=50.0, v_max=50.0)
+        vehicle2 = Vehicle(x=100, lane=1, speed=40.0, v_max=40.0)
+        vehicle3 = Vehicle(x=120, lane=2, speed=40.0, v_max=40.0)
+        self.lane_manager.add_vehicle(vehicle1)
+        self.lane_manager.add_vehicle(vehicle2)
+        self.lane_manager.add_vehicle(vehicle3)
+
+        vehicle1.x = 110  # overtakes vehicle2
+        self.lane_manager.repair_lane_indices()
+        self.assertEqual(self.lane_manager.find_vehicle_ahead(vehicle2, 1), vehicle1)
+        self.assertEqual(self.lane_manager.find_vehicle_behind(vehicle1, 1), vehicle2)
+        self.assertEqual(self.lane_manager.find_vehicle_ahead(vehicle1, 2), vehicle3)
+
+        self.lane_manager.destroy_vehicle(vehicle2)
+        self.assertIsNone(self.lane_manager.find_vehicle_behind(vehicle1, 1))
+        self.lane_manager.remove_all_vehicles()
+
+    def test_lane_statistics_follow_adds_removes_and_moves(self):
+        vehicles = [Vehicle(x=x, lane=1, speed=speed, v_max=50.0) for x, speed in ((100, 36), (50, 72), (180, 54))]
+        for vehicle in vehicles:
+            self.lane_manager.add_vehicle(vehicle)
+        lane = self.lane_manager.lanes[1]
+        self.assertAlmostEqual(lane.avg_speed, 15.0)
+        self.assertAlmostEqual(lane.avg_time_gap, (50 / 20 + 80 / 10) / 2)
+
+        self.lane_manager.destroy_vehicle(vehicles[0])
+        self.assertAlmostEqual(lane.avg_speed, 17.5)
+        self.assertAlmostEqual(lane.avg_time_gap, 130 / 20)
+
+        vehicles[1].x, vehicles[1].speed = 200, 10.0  # overtakes, seen after the repair
+        self.lane_manager.repair_lane_indices()
+        self.assertAlmostEqual(lane.avg_speed, 12.5)
+        self.assertAlmostEqual(lane.avg_time_gap, 20 / 15)
+        self.lane_manager.remove_all_vehicles()
+        self.assertEqual(lane.avg_speed, 0.0)
+        self.assertEqual(lane.avg_time_gap, 0)
+
+    def test_lane_statistics_follow_moves_in_order(self):
+        vehicles = [Vehicle(x=x, lane=1, speed=speed, v_max=50.0) for x, speed in ((50, 72), (100, 36), (180, 54))]
+        for vehicle in vehicles:
+            self.lane_manager.add_vehicle(vehicle)
+        lane = self.lane_manager.lanes[1]
+        vehicles[0].x, vehicles[0].speed = 60, 25.0
+        vehicles[2].x = 190
+        self.lane_manager.repair_lane_indices()
+        self.assertEqual(lane.sorted_vehicles, vehicles)
+        self.assertAlmostEqual(lane.avg_speed, (25 + 10 + 15) / 3)
+        self.assertAlmostEqual(lane.avg_time_gap, (40 / 25 + 90 / 10) / 2)
+
+        vehicles[1].x = 120  # moved since the position update, still found in the index
+        self.lane_manager.destroy_vehicle(vehicles[1])
+        self.assertEqual(lane.sorted_vehicles, [vehicles[0], vehicles[2]])
+        self.assertAlmostEqual(lane.avg_speed, 20.0)
+        self.assertAlmostEqual(lane.avg_time_gap, 130 / 25)
+        self.lane_manager.remove_all_vehicles()
+
+    def test_level_of_detail(self):
+        config = copy.copy(self.config)
+        config.active_region = 100
+        config.time_step = 0.5
+        lane_manager = LaneManager(config=config)
+        ego_vehicle = Vehicle(x=0, lane=1, speed=100, v_max=100, is_ego=True, config=config)
+        slow_vehicle = Vehicle(x=300, lane=1, speed=36, v_max=36, config=config)
+        lane_manager.add_vehicle(ego_vehicle)
+        lane_manager.add_vehicle(slow_vehicle)
+
+        lane_manager.update()
+        self.assertEqual(lane_manager.lanes[1].vehicles, [ego_vehicle])
+        self.assertEqual(len(lane_manager.dormant_pool), 1)
+
+        # the ego closes in at 17.8 m/s, the dormant vehicle rejoins 100 m ahead of it
+        while len(lane_manager.dormant_pool):
+            lane_manager.update()
+        self.assertIn(slow_vehicle, lane_manager.lanes[1].vehicles)
+        self.assertAlmostEqual(slow_vehicle.x, 300 + 10 * lane_manager.simulation_time)
+        self.assertLessEqual(slow_vehicle.x - ego_vehicle.x, 100)
+        self.assertGreater(slow_vehicle.x - ego_vehicle.x, 90)
+        lane_manager.remove_all_vehicles()
+
+    def test_blocked_promotion_stays_behind_the_lane_leader(self):
+        config = copy.copy(self.config)
+        config.active_region = 100
+        config.time_step = 0.5
+        lane_manager = LaneManager(config=config)
+        ego_vehicle = Vehicle(x=0, lane=2, speed=100, v_max=100, is_ego=True, config=config)
+        leader = Vehicle(x=120, lane=1, speed=36, v_max=36, config=config)
+        fast_vehicle = Vehicle(x=90, lane=1, speed=144, v_max=144, config=config)
+        lane_manager.add_vehicle(ego_vehicle)
+        lane_manager.add_vehicle(leader)
+        lane_manager.dormant_pool.add([fast_vehicle], lane_manager.simulation_time)
+
+        # it enters the region 15 m behind the leader, dormant it would pass the leader in the next step
+        lane_manager.update()
+        self.assertIn(fast_vehicle, lane_manager.lanes[1].vehicles)
+        self.assertLessEqual(fast_vehicle.x, leader.x - 20)
+        self.assertEqual(fast_vehicle.speed, leader.speed)
+        for _ in range(10):
+            lane_manager.update()
+            self.assertEqual(len(lane_manager.dormant_pool), 0)
+            if fast_vehicle.lane == leader.lane:  # it may still overtake through a lane change
+                self.assertLess(fast_vehicle.x, leader.x)
+        lane_manager.remove_all_vehicles()
+
 if __name__ == '__main__':
     unittest.main()
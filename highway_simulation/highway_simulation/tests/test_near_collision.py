@@ -11,11 +11,8 @@ class TestNearCollisionRisk(unittest.TestCase):
 
     def setUp(self):
         self.config = default_config
-        Vehicle.set_config(self.config)
-        LaneManager.set_config(self.config)
-        RewardCalculator.set_config(self.config)
-        self.lane_manager = LaneManager()
-        self.reward_calculator = RewardCalculator(self.lane_manager)
+        self.lane_manager = LaneManager(config=self.config)
+        self.reward_calculator = RewardCalculator(self.lane_manager, self.config)
 
     def test_no_nearby_vehicles(self):
         """Test when there are no nearby vehicles, the risk score should be 0.0."""
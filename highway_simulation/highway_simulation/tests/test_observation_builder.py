@@ -0,0 +1,87 @@
+"""Tests for the vectorized observation builder."""
+
+import unittest
+
+import numpy as np
+
+from highway_simulation.environments.highway_vector_env import HighwayVectorEnv
+from highway_simulation.scripts.highway import Highway
+from highway_simulation.scripts.observationBuilder import build_observations, k_nearest
+from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+class TestObservationBuilder(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.highway = Highway(default_config)
+
+    def sorted_state(self) -> np.ndarray:
+        """The observation as built by sorting every vehicle, equal distances by lane then position."""
+        ego = self.highway.lane_manager.ego_vehicle
+        others = [
+            (index, vehicle.x, vehicle)
+            for index, lane in enumerate(self.highway.lane_manager.lanes)
+            for vehicle in lane.vehicles
+            if not vehicle.is_ego
+        ]
+        others.sort(key=lambda item: item[:2])
+        others.sort(key=lambda item: abs(item[2].relative_x - ego.relative_x))
+        state = np.zeros((5, 3), dtype=np.float32)
+        state[0] = self.highway.normalize_xyv(ego.relative_x, ego.y, ego.speed)
+        for i, (_, _, vehicle) in enumerate(others[:4]):
+            state[i + 1] = self.highway.normalize_xyv(vehicle.relative_x, vehicle.y, vehicle.speed)
+        return state.flatten()
+
+    def test_matches_sorted_selection(self):
+        for seed in range(5):
+            self.highway.reset(seed=seed)
+            for _ in range(20):
+                self.highway.step(0)
+                np.testing.assert_array_equal(self.highway.get_state(), self.sorted_state())
+
+    def test_ties_and_few_vehicles(self):
+        lane_manager = self.highway.lane_manager
+        lane_manager.remove_all_vehicles()
+        lane_manager.add_vehicle(Vehicle(x=250, lane=1, speed=25, v_max=33.33, is_ego=True))
+        lane_manager.add_vehicle(Vehicle(x=270, lane=0, speed=20, v_max=33.33))
+        np.testing.assert_array_equal(self.highway.get_state(), self.sorted_state())
+        self.assertFalse(self.highway.get_state()[6:].any())
+
+        for lane in range(3):
+            lane_manager.add_vehicle(Vehicle(x=230, lane=lane, speed=20 + lane, v_max=33.33))
+            lane_manager.add_vehicle(Vehicle(x=290, lane=lane, speed=30 + lane, v_max=33.33))
+        np.testing.assert_array_equal(self.highway.get_state(), self.sorted_state())
+
+    def test_writes_into_out(self):
+        self.highway.reset(seed=1)
+        out = np.zeros((2, 15), dtype=np.float32)
+        self.assertIs(self.highway.get_state(out[1]).base, out)
+        np.testing.assert_array_equal(out[1], self.highway.get_state())
+        self.assertIsNot(self.highway.get_state(), self.highway.get_state())
+
+    def test_build_observations_of_engine_groups(self):
+        env = HighwayVectorEnv(3, default_config)
+        env.reset(seed=0)
+        # few vehicles and equal distances in the last highway
+        lane_manager = env.highways[2].lane_manager
+        lane_manager.remove_all_vehicles()
+        lane_manager.add_vehicle(Vehicle(x=250, lane=1, speed=25, v_max=33.33, is_ego=True))
+        for lane in (2, 0):
+            lane_manager.add_vehicle(Vehicle(x=230, lane=lane, speed=20 + lane, v_max=33.33))
+        out = np.zeros((3, 15), dtype=np.float32)
+        for _ in range(10):
+            build_observations([highway.observation_builder for highway in env.highways], out)
+            for i, highway in enumerate(env.highways):
+                np.testing.assert_array_equal(out[i], highway.get_state())
+            env.step([0, 0, 0])
+
+    def test_k_nearest_is_stable(self):
+        distances = np.array([3.0, 1.0, 2.0, 1.0, 2.0, 0.5])
+        np.testing.assert_array_equal(k_nearest(distances, 3), [5, 1, 3])
+        np.testing.assert_array_equal(k_nearest(distances, 4), [5, 1, 3, 2])
+        np.testing.assert_array_equal(k_nearest(distances, 10), np.argsort(distances, kind="stable"))
+
+
+if __name__ == "__main__":
+    unittest.main()
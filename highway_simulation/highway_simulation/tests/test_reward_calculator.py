@@ -11,11 +11,8 @@ class TestRewardCalculator(unittest.TestCase):
 
     def setUp(self):
         self.config = default_config
-        LaneManager.set_config(self.config)
-        RewardCalculator.set_config(self.config)
-        Vehicle.set_config(self.config)
-        self.lane_manager = LaneManager()
-        self.reward_calculator = RewardCalculator(self.lane_manager)
+        self.lane_manager = LaneManager(config=self.config)
+        self.reward_calculator = RewardCalculator(self.lane_manager, self.config)
         self.reward_calculator.effective_sim_time = 9999999999
 
     def add_ego_vehicle(self, x, lane, speed):
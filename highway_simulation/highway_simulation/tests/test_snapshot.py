@@ -0,0 +1,63 @@
+"""Tests for Highway.snapshot and Highway.restore."""
+
+import dataclasses
+import unittest
+
+import numpy as np
+
+from highway_simulation.scripts.highway import Highway
+from highway_simulation.scripts.util.config import default_config
+
+ACTIONS = [0, 1, 3, 2, 0, 4, 0, 0, 1, 0, 3, 0, 2, 0, 0, 0, 4, 0, 1, 0]
+
+
+def rollout(highway, actions):
+    states, rewards = [], []
+    for action in actions:
+        state, reward, _, _ = highway.step(action)
+        states.append(state)
+        rewards.append(reward)
+    vehicles = sorted((v.x, v.y, v.speed, v.lane, v.number_of_lane_changes) for v in highway.lane_manager.all_vehicles())
+    return np.array(states), rewards, vehicles
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.config = dataclasses.replace(default_config, num_of_vehicles=60, effective_sim_time=10**9)
+
+    def test_restore_replays_the_same_steps(self) -> None:
+        for flags in ({}, {"use_traffic_engine": True}, {"active_region": 300.0}, {"ego_drives_with_mobil": True}):
+            with self.subTest(**flags):
+                highway = Highway(dataclasses.replace(self.config, **flags))
+                highway.reset(seed=5)
+                rollout(highway, ACTIONS)  # lane changes are in flight at the snapshot
+                snapshot = highway.snapshot()
+                expected = rollout(highway, ACTIONS * 3)
+                highway.restore(snapshot)
+                first = rollout(highway, ACTIONS * 3)
+                highway.restore(snapshot)
+                second = rollout(highway, ACTIONS * 3)
+
+                for replayed in (first, second):
+                    np.testing.assert_array_equal(replayed[0], expected[0])
+                    self.assertEqual(replayed[1:], expected[1:])
+
+    def test_reset_cache_restores_generated_traffic(self) -> None:
+        highway = Highway(self.config)
+        cached = Highway(dataclasses.replace(self.config, reset_cache=True))
+        cached.reset(seed=9)
+        rollout(cached, ACTIONS)
+        cached.reset(seed=10)
+
+        np.testing.assert_array_equal(cached.reset(seed=9), highway.reset(seed=9))
+        self.assertEqual(list(cached.reset_cache), [(9, None), (10, None)])
+        self.assertEqual(cached.lane_manager.step_count, 0)
+        expected = rollout(highway, ACTIONS)
+        replayed = rollout(cached, ACTIONS)
+        np.testing.assert_array_equal(replayed[0], expected[0])
+        self.assertEqual(replayed[1:], expected[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for the video recorder wrapper."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from highway_simulation.environments.relative_to_ego_highway_env import HighwayEnv
+from highway_simulation.environments.video_recorder import FrameStream, VideoRecorderWrapper
+
+
+def copy_to_file(width, height, fps, path):
+    """Encoder stand in writing the raw frames to path."""
+    return [sys.executable, "-c", f"import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open({path!r}, 'wb'))"]
+
+
+def stalled(width, height, fps, path):
+    """Encoder that does not read its input for a while."""
+    return [sys.executable, "-c", "import sys, time; time.sleep(1); sys.stdin.buffer.read()"]
+
+
+class TestVideoRecorder(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def test_records_every_kth_episode(self) -> None:
+        env = VideoRecorderWrapper(
+            HighwayEnv(render_mode="rgb_array"), self.folder.name, record_every=2, encoder_command=copy_to_file
+        )
+        steps = [3, 2, 4]
+        for episode_steps in steps:
+            env.reset()
+            for _ in range(episode_steps):
+                env.step(0)
+        env.close()
+
+        self.assertEqual(sorted(os.listdir(self.folder.name)), ["episode_0.mp4", "episode_2.mp4"])
+        height, width = env.env.highway.highway_plotter.screen_height, env.env.config.screen_width
+        for name, episode_steps in (("episode_0.mp4", steps[0]), ("episode_2.mp4", steps[2])):
+            size = os.path.getsize(os.path.join(self.folder.name, name))
+            self.assertEqual(size, (episode_steps + 1) * height * width * 3)  # the reset frame and one per step
+        self.assertEqual(env.dropped_frames, 0)
+
+    def test_first_frame_shows_the_test_case(self) -> None:
+        env = VideoRecorderWrapper(
+            HighwayEnv(render_mode="rgb_array"), self.folder.name, name_prefix="test_case", encoder_command=copy_to_file
+        )
+        test_case_name = env.env.highway.lane_manager.test_cases[0][0]
+        _, info = env.reset(options={"test_case": True})
+        env.close()
+        reference = HighwayEnv(render_mode="rgb_array")  # the road scrolls with every render, take a fresh first frame
+        reference.reset(options={"test_case": True})
+        first_frame = reference.render()
+        reference.close()
+
+        self.assertEqual(info["test_case_name"], test_case_name)
+        with open(os.path.join(self.folder.name, "test_case_0.mp4"), "rb") as video:
+            self.assertEqual(video.read(), first_frame.tobytes())
+
+    def test_drops_frames_instead_of_blocking(self) -> None:
+        stream = FrameStream(os.path.join(self.folder.name, "x"), 640, 480, 10, queue_size=2, encoder_command=stalled)
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        written = [stream.write(frame) for _ in range(10)]
+        self.assertGreater(stream.dropped_frames, 0)
+        self.assertEqual(written.count(False), stream.dropped_frames)
+        stream.close()
+        self.assertEqual(stream.written_frames, written.count(True))
+
+    def test_needs_rgb_array_render_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            VideoRecorderWrapper(HighwayEnv(), self.folder.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for the batched MOBIL lane change evaluation."""
+
+import dataclasses
+import random
+import unittest
+
+from highway_simulation.scripts.laneManager import LaneManager
+from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.batched_mobil import mobil_lane_changes
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+class TestBatchedMobil(unittest.TestCase):
+
+    def setUp(self):
+        self.config = default_config
+
+    def build_lane_manager(self, seed: int) -> LaneManager:
+        rng = random.Random(seed)
+        lane_manager = LaneManager(config=self.config)
+        lane_manager.add_vehicle(Vehicle(x=500, lane=1, speed=100, v_max=100, is_ego=True))
+        for _ in range(60):
+            speed = rng.uniform(60, 120)
+            lane_manager.add_vehicle(
+                Vehicle(x=rng.uniform(0, 1000), lane=rng.randrange(3), speed=speed, v_max=speed + rng.uniform(0, 20))
+            )
+        lane_manager.repair_lane_indices()
+        return lane_manager
+
+    def scalar_decisions(self, lane_manager: LaneManager):
+        lane_manager.update_non_ego_lane_changes()
+        return [
+            (id(v), v.target_lane, v.v_max)
+            for lane in lane_manager.lanes
+            for v in lane.vehicles
+        ]
+
+    def test_matches_scalar_decisions(self):
+        for seed in range(5):
+            expected = self.scalar_decisions(self.build_lane_manager(seed))
+
+            lane_manager = self.build_lane_manager(seed)
+            vehicles = [v for lane in lane_manager.lanes for v in lane.vehicles]
+            lane_changes, v_max_updates = mobil_lane_changes(lane_manager.lanes, self.config)
+            changes = {id(v): target for v, target in lane_changes}
+            updates = {id(v): v_max for v, v_max in v_max_updates}
+
+            self.assertTrue(lane_changes)
+            for (_, target_lane, v_max), vehicle in zip(expected, vehicles):
+                self.assertEqual(changes.get(id(vehicle), vehicle.lane), target_lane)
+                self.assertEqual(updates.get(id(vehicle), vehicle.v_max), v_max)
+
+    def test_no_cut_in(self):
+        lane_manager = LaneManager(config=self.config)
+        lane_manager.add_vehicle(Vehicle(x=0, lane=1, speed=100, v_max=100, is_ego=True))
+        vehicle = Vehicle(x=50, lane=1, speed=50.0, v_max=50.0)
+        lane_manager.add_vehicle(vehicle)
+        lane_manager.add_vehicle(Vehicle(x=75, lane=1, speed=40.0, v_max=40.0))
+        lane_manager.add_vehicle(Vehicle(x=40, lane=2, speed=50.0, v_max=50.0))
+        lane_manager.add_vehicle(Vehicle(x=45, lane=0, speed=50.0, v_max=50.0))
+
+        lane_changes, _ = mobil_lane_changes(lane_manager.lanes, self.config)
+        self.assertNotIn(vehicle, [v for v, _ in lane_changes])
+
+    def test_batched_flag_uses_batched_path(self):
+        config = dataclasses.replace(self.config, batched_mobil=True)
+        lane_manager = LaneManager(config=config)
+        lane_manager.add_vehicle(Vehicle(x=0, lane=1, speed=100, v_max=100, is_ego=True, config=config))
+        vehicle = Vehicle(x=50, lane=1, speed=50.0, v_max=50.0, config=config)
+        lane_manager.add_vehicle(vehicle)
+        lane_manager.add_vehicle(Vehicle(x=75, lane=1, speed=40.0, v_max=40.0, config=config))
+        lane_manager.update_non_ego_lane_changes()
+        self.assertTrue(vehicle.ongoing_trajectory)
+        self.assertNotEqual(vehicle.target_lane, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Tests for the batched MPC solve."""
+
+import unittest
+
+import numpy as np
+
+from highway_simulation.scripts.planning.decision_to_trajectory import DecisionToTrajectory
+from highway_simulation.scripts.planning.state import Trajectory
+from highway_simulation.scripts.util.action import Action
+from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.batched_mpc import mpc_controls
+from highway_simulation.scripts.vehicle.mpc import MPCController
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+class TestBatchedMPC(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = MPCController(horizon=10, dt=default_config.time_step)
+
+    def test_batched_solve_matches_single_solves(self):
+        rng = np.random.default_rng(0)
+        count = 8
+        initial_states = np.column_stack(
+            [np.zeros(count), rng.uniform(0, 0.5, count), rng.uniform(-0.02, 0.02, count), rng.uniform(15, 30, count)]
+        )
+        ref_y = np.linspace(0.3, 0.8, 10)[None] + rng.uniform(0, 1, (count, 1))
+        u0 = rng.uniform(-0.1, 0.1, (count, 10, 2))
+
+        solution = self.controller.solve_box_bounded_batched(u0, initial_states, ref_y)
+        self.assertEqual(solution.shape, (count, 10, 2))
+        for k in range(count):
+            np.testing.assert_allclose(
+                solution[k], self.controller.solve_box_bounded(u0[k], initial_states[k], ref_y[k]), atol=1e-9
+            )
+        self.assertTrue(np.all(np.abs(solution[..., 1]) <= self.controller.max_steering))
+
+    def test_mpc_controls_match_compute_controls_fast(self):
+        decision_to_trajectory = DecisionToTrajectory(default_config)
+        vehicles = []
+        for lane, action in ((1, Action.CHANGE_LANE_LEFT), (1, Action.CHANGE_LANE_RIGHT), (0, Action.CHANGE_LANE_RIGHT)):
+            vehicle = Vehicle(x=50, lane=lane, speed=80, v_max=80, config=default_config)
+            vehicle.trajectory = decision_to_trajectory.process_decision(vehicle.return_state, action)
+            vehicles.append(vehicle)
+        # shorter than the horizon and empty trajectories
+        vehicles[2].trajectory.trajectory = vehicles[2].trajectory.trajectory[-4:]
+        vehicles.append(Vehicle(x=80, lane=2, speed=80, v_max=80, config=default_config))
+        vehicles[3].trajectory = Trajectory()
+
+        expected = [
+            MPCController(horizon=10, dt=default_config.time_step).compute_controls_fast(v.return_state, v.trajectory)
+            for v in vehicles
+        ]
+        acceleration, steering = mpc_controls(vehicles, self.controller)
+        np.testing.assert_allclose(acceleration, [a for a, _ in expected], atol=1e-9)
+        np.testing.assert_allclose(steering, [d for _, d in expected], atol=1e-9)
+        self.assertEqual(vehicles[2].mpc_controller.previous_solution.shape, (4, 2))
+        self.assertIsNone(vehicles[3].mpc_controller.previous_solution)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,6 @@
 import unittest
 
 from highway_simulation.scripts.laneManager import LaneManager
-from highway_simulation.scripts.planning.decision_to_trajectory import DecisionToTrajectory
 from highway_simulation.scripts.util.config import Config, default_config
 from highway_simulation.scripts.vehicle.vehicle import Vehicle
 
@@ -11,11 +10,7 @@ from highway_simulation.scripts.vehicle.vehicle import Vehicle
 class TestMobilLaneChange(unittest.TestCase):
     def setUp(self):
         self.config: Config = default_config
-        Vehicle.set_config(self.config)
-        LaneManager.set_config(self.config)
-        DecisionToTrajectory.set_config(self.config)
-        self.lane_manager = LaneManager()
-        self.lane_manager.set_config(self.config)
+        self.lane_manager = LaneManager(config=self.config)
         
 
     def test_lane_change_benefit(self):
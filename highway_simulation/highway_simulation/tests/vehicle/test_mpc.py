@@ -0,0 +1,67 @@
+"""Tests for the MPC controller."""
+
+import unittest
+
+import numpy as np
+from scipy.optimize import approx_fprime
+
+from highway_simulation.scripts.planning.state import Acc, Angles, Jerk, Pos, State, Trajectory, Vel
+from highway_simulation.scripts.vehicle.mpc import MPCController
+
+
+class TestMPCController(unittest.TestCase):
+
+    def setUp(self):
+        self.mpc = MPCController(horizon=10, dt=0.01)
+        self.initial_state = np.array([1.0, 0.3, 0.02, 22.0])
+        self.ref_y = np.linspace(0.3, 0.5, 10)
+        self.u = np.random.default_rng(0).uniform(-0.3, 0.3, (10, 2))
+        # lane change reference sampled every time step
+        self.trajectory = Trajectory(
+            [State(Pos(i * 0.22, 3.5 * min(1.0, i / 300)), Vel(22.0, 0.0), Acc(0.0, 0.0)) for i in range(1, 301)]
+        )
+        self.current_state = State(Pos(0.0, 0.0), Vel(22.0, 0.0), Acc(0.0, 0.0), Jerk(0, 0), Angles(0.0, 0.0))
+
+    def test_lateral_rollout_matches_dynamics(self):
+        v, theta, tan_delta, y = self.mpc.lateral_rollout(self.u, self.initial_state)
+        state = self.initial_state
+        for i in range(10):
+            self.assertAlmostEqual(v[i], state[3], places=12)
+            self.assertAlmostEqual(theta[i], state[2], places=12)
+            state = self.mpc.vehicle_dynamics(state, self.u[i])
+            self.assertAlmostEqual(y[i], state[1], places=12)
+        np.testing.assert_allclose(tan_delta, np.tan(self.u[:, 1]))
+
+    def test_analytic_jacobian(self):
+        error, jacobian = self.mpc.linearize(self.u, self.initial_state, self.ref_y)
+        cost = error @ error + self.mpc.control_weight * (self.u.ravel() @ self.u.ravel())
+        self.assertAlmostEqual(cost, self.mpc.cost_function(self.u.ravel(), self.initial_state, None, self.ref_y, None))
+
+        def errors(u):
+            return self.mpc.lateral_rollout(u.reshape(-1, 2), self.initial_state)[3] - self.ref_y
+
+        numerical = np.stack([approx_fprime(self.u.ravel(), lambda u: errors(u)[k], 1e-7) for k in range(10)])
+        np.testing.assert_allclose(jacobian, numerical, atol=1e-6)
+        # the Gauss-Newton gradient of the tracking cost
+        gradient = 2 * (jacobian.T @ error + self.mpc.control_weight * self.u.ravel())
+        numerical = approx_fprime(
+            self.u.ravel(), self.mpc.cost_function, 1e-7, self.initial_state, None, self.ref_y, None
+        )
+        np.testing.assert_allclose(gradient, numerical, atol=1e-5)
+
+    def test_fast_controls_match_slsqp(self):
+        acc, steering = self.mpc.compute_controls(self.current_state, self.trajectory)
+        fast_acc, fast_steering = self.mpc.compute_controls_fast(self.current_state, self.trajectory)
+        self.assertAlmostEqual(fast_steering, steering, places=3)
+        self.assertAlmostEqual(fast_acc, acc, places=3)
+        self.assertLessEqual(abs(fast_steering), self.mpc.max_steering)
+
+    def test_warm_start(self):
+        self.mpc.compute_controls_fast(self.current_state, self.trajectory)
+        self.assertEqual(self.mpc.previous_solution.shape, (10, 2))
+        self.mpc.compute_controls_fast(self.current_state, Trajectory())
+        self.assertIsNone(self.mpc.previous_solution)
+
+
+if __name__ == "__main__":
+    unittest.main()
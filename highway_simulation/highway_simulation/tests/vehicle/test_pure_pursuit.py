@@ -0,0 +1,58 @@
+"""Tests for the pure pursuit look-ahead search."""
+
+import dataclasses
+import unittest
+
+import numpy as np
+
+from highway_simulation.scripts.planning.decision_to_trajectory import DecisionToTrajectory
+from highway_simulation.scripts.util.action import Action
+from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.pure_pursuit import PurePursuit
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+class TestPurePursuit(unittest.TestCase):
+
+    def lane_change_steering(self, action: Action, array_trajectories: bool):
+        """Steering angles of the lane change loop in tests/test_bicycle_model.py."""
+        config = dataclasses.replace(default_config, array_trajectories=array_trajectories)
+        vehicle = Vehicle(x=50, lane=1, speed=80, v_max=80, is_ego=True, config=config)
+        vehicle.trajectory = DecisionToTrajectory(config).process_decision(vehicle.return_state, action)
+        steering = []
+        for _ in range(100):
+            if not vehicle.trajectory.is_trajectory_empty():
+                vehicle.apply_state(vehicle.trajectory.use_next_state())
+            vehicle.update()
+            steering.append(vehicle.steering_angle)
+        return steering
+
+    def test_array_trajectory_steering_matches_list(self):
+        for action in (Action.CHANGE_LANE_RIGHT, Action.CHANGE_LANE_LEFT):
+            expected = self.lane_change_steering(action, array_trajectories=False)
+            self.assertTrue(any(expected))
+            self.assertEqual(self.lane_change_steering(action, array_trajectories=True), expected)
+
+    def test_look_ahead_index_matches_full_scan(self):
+        config = dataclasses.replace(default_config, array_trajectories=True)
+        vehicle = Vehicle(x=50, lane=1, speed=80, v_max=80, is_ego=True, config=config)
+        trajectory = DecisionToTrajectory(config).process_decision(vehicle.return_state, Action.CHANGE_LANE_LEFT)
+        pure_pursuit = PurePursuit(1.9, 2.5)
+        pure_pursuit.SEARCH_WINDOW = 2  # force the window to grow
+        x, y = trajectory.data[0, :2]
+        previous = 0
+        while not trajectory.is_trajectory_empty():
+            remaining = trajectory.remaining
+            dist = np.sqrt((remaining[:, 0] - x) ** 2 + (remaining[:, 1] - y) ** 2)
+            hits = np.flatnonzero(dist >= 1.9)
+            expected = trajectory.cursor + (hits[0] if hits.size else len(remaining) - 1)
+            index = pure_pursuit.find_look_ahead_index(x, y, trajectory)
+            self.assertEqual(index, expected)
+            self.assertGreaterEqual(index, previous)
+            previous = index
+            state = trajectory.use_next_state()
+            x, y = state.pos.x, state.pos.y
+
+
+if __name__ == "__main__":
+    unittest.main()
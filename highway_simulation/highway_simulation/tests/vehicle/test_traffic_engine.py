@@ -0,0 +1,113 @@
+"""Tests for the structure-of-arrays traffic engine."""
+
+import dataclasses
+import unittest
+
+from highway_simulation.scripts.laneManager import LaneManager
+from highway_simulation.scripts.util.config import default_config
+from highway_simulation.scripts.vehicle.traffic_engine import TrafficEngine
+from highway_simulation.scripts.vehicle.vehicle import Vehicle
+
+
+class TestTrafficEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.config = dataclasses.replace(default_config, use_traffic_engine=True)
+        self.engine = TrafficEngine(capacity=2)
+
+    def test_attach_detach_round_trip(self):
+        vehicle = Vehicle(x=120.0, lane=2, speed=90, v_max=110, config=self.config)
+        speed, v_max = vehicle.speed, vehicle.v_max
+        self.engine.attach(vehicle)
+
+        self.assertIsInstance(vehicle, Vehicle)
+        self.assertEqual(vehicle.x, 120.0)
+        self.assertEqual(vehicle.lane, 2)
+        self.assertEqual(vehicle.speed, speed)
+        vehicle.x = 130.0
+        self.assertEqual(self.engine.columns["x"][vehicle._slot], 130.0)
+
+        self.engine.detach(vehicle)
+        self.assertIs(type(vehicle), Vehicle)
+        self.assertEqual(vehicle.x, 130.0)
+        self.assertEqual(vehicle.v_max, v_max)
+        self.assertIsInstance(vehicle.lane, int)
+        self.assertEqual(len(self.engine), 0)
+
+    def test_grow_keeps_attached_state(self):
+        vehicles = [Vehicle(x=10.0 * i, lane=i % 3, speed=80, v_max=100, config=self.config) for i in range(5)]
+        for vehicle in vehicles:
+            self.engine.attach(vehicle)
+        self.assertGreaterEqual(self.engine.capacity, 5)
+        self.assertEqual([v.x for v in vehicles], [10.0 * i for i in range(5)])
+
+    def test_attach_all_and_clear_match_one_by_one(self):
+        vehicles = [Vehicle(x=10.0 * i, lane=i % 3, speed=80, v_max=100, config=self.config) for i in range(5)]
+        other = Vehicle(x=5.0, lane=0, speed=80, v_max=100, config=self.config)
+        self.engine.attach(other, group=1)
+        self.engine.attach_all(vehicles)
+        self.assertEqual([v._slot for v in vehicles], [1, 2, 3, 4, 5])
+        self.assertEqual(self.engine.gather(vehicles[::-1], "x").tolist(), [40.0, 30.0, 20.0, 10.0, 0.0])
+
+        vehicles[2].x = 25.0
+        self.engine.clear(group=0)
+        self.assertEqual(self.engine.free_slots, [1, 2, 3, 4, 5])
+        self.assertEqual(len(self.engine), 1)
+        self.assertIs(type(vehicles[2]), Vehicle)
+        self.assertEqual(vehicles[2].x, 25.0)
+        self.assertIsInstance(vehicles[2].lane, int)
+        self.assertEqual(other.x, 5.0)
+
+    def test_find_leaders(self):
+        back = Vehicle(x=10.0, lane=1, speed=80, v_max=100, config=self.config)
+        front = Vehicle(x=50.0, lane=1, speed=80, v_max=100, config=self.config)
+        other_lane = Vehicle(x=30.0, lane=0, speed=80, v_max=100, config=self.config)
+        for vehicle in (front, other_lane, back):
+            self.engine.attach(vehicle)
+
+        leaders = self.engine.find_leaders()
+        self.assertEqual(leaders[back._slot], front._slot)
+        self.assertEqual(leaders[front._slot], -1)
+        self.assertEqual(leaders[other_lane._slot], -1)
+
+    def test_step_matches_vehicle_update(self):
+        leader = Vehicle(x=60.0, lane=1, speed=70, v_max=80, config=self.config)
+        follower = Vehicle(x=20.0, lane=1, speed=90, v_max=100, config=self.config)
+        ref_leader = Vehicle(x=60.0, lane=1, speed=70, v_max=80, config=self.config)
+        ref_follower = Vehicle(x=20.0, lane=1, speed=90, v_max=100, config=self.config)
+        ref_follower.vehicle_ahead = ref_leader
+        self.engine.attach(leader)
+        self.engine.attach(follower)
+
+        for _ in range(20):
+            accelerations = self.engine.idm_accelerations()
+            ref_accel = ref_follower.calculate_accel(ref_leader)
+            self.assertAlmostEqual(accelerations[follower._slot], ref_accel)
+            self.engine.step(self.config.time_step, accelerations)
+            ref_follower.update()
+            ref_leader.update()
+
+        self.assertAlmostEqual(follower.x, ref_follower.x)
+        self.assertAlmostEqual(follower.speed, ref_follower.speed)
+        self.assertAlmostEqual(leader.x, ref_leader.x)
+        self.assertAlmostEqual(leader.y, ref_leader.y)
+
+    def test_lane_manager_keeps_engine_in_sync(self):
+        lane_manager = LaneManager(config=self.config)
+        ego = Vehicle(x=100.0, lane=1, speed=90, v_max=100, is_ego=True, config=self.config)
+        other = Vehicle(x=150.0, lane=2, speed=80, v_max=100, config=self.config)
+        lane_manager.add_vehicle(ego)
+        lane_manager.add_vehicle(other)
+        self.assertEqual(len(lane_manager.traffic_engine), 2)
+
+        start = other.x
+        lane_manager.update()
+        self.assertGreater(other.x, start)
+
+        lane_manager.remove_all_vehicles()
+        self.assertEqual(len(lane_manager.traffic_engine), 0)
+        self.assertIs(type(other), Vehicle)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,12 +12,10 @@ class TestVehicle(unittest.TestCase):
 
     def setUp(self):
         self.config: Config = default_config
-        Vehicle.set_config(self.config)
-        LaneManager.set_config(self.config)
         self.vehicle = Vehicle(x=50, lane=1, speed=80, v_max=80, is_ego=True)
         self.mobil_param = MOBIL_PARAM(politeness=0.5, a_thr=0.2, b_safe=2.0)
         self.idm_param = IDM_PARAM(a_max=0.7, s0=2.0, T=1.6, b=1.7, delta=4)
-        self.lane_manager = LaneManager()
+        self.lane_manager = LaneManager(config=self.config)
     def test_initialization(self):
         self.assertEqual(self.vehicle.x, 50)
         self.assertEqual(self.vehicle.lane, 1)